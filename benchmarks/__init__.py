@@ -0,0 +1,9 @@
+"""
+Benchmarks of smartcsv against the builtin csv module.
+
+Run them with:
+
+    $ python -m benchmarks --rows 10000 100000
+
+See `python -m benchmarks --help` for all the options.
+"""
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+
+from . import datasets, throughput
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Measures the throughput of smartcsv.')
+    parser.add_argument(
+        '--schemas', nargs='+', default=sorted(datasets.SCHEMAS),
+        choices=sorted(datasets.SCHEMAS))
+    parser.add_argument(
+        '--rows', nargs='+', type=int, default=[10 ** 4],
+        help='Sizes of the datasets (from 10^4 to 10^7 rows).')
+    parser.add_argument(
+        '--error-rates', nargs='+', type=float, default=[0.0, 0.05])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--data-dir', default=None,
+        help='Where the datasets are generated and cached.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='Store these results as the new baseline.')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.1,
+        help='Slowdown over the baseline reported as a regression.')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+
+    results = {}
+    for schema in options.schemas:
+        for rows in options.rows:
+            for error_rate in options.error_rates:
+                path = datasets.generate(
+                    schema, rows, error_rate, directory=options.data_dir)
+                key = throughput.result_key(schema, rows, error_rate)
+                results[key] = throughput.measure(
+                    schema, path, rows, repeat=options.repeat)
+                print('{0:<28} {1}'.format(key, '  '.join(
+                    '{0}: {1:>10,.0f} rows/s {2:>6.1f} MB/s x{3:.2f}'.format(
+                        name, result['rows_per_second'],
+                        result['bytes_per_second'] / 1e6, result['overhead'])
+                    for name, result in sorted(results[key].items()))))
+
+    baseline = throughput.load_baseline(options.baseline)
+    regressions = throughput.find_regressions(
+        results, baseline, options.tolerance)
+    for key, baseline_overhead, overhead in regressions:
+        print('REGRESSION {0}: x{1:.2f} over csv.reader (baseline x{2:.2f})'
+              .format(key, overhead, baseline_overhead))
+
+    if options.save_baseline:
+        baseline.update(results)
+        throughput.save_baseline(options.baseline, baseline)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic datasets for the benchmarks.
+
+Every schema is a pair of smartcsv `columns` and a function building one
+valid row (a list of strings) from a `random.Random`. `generate` writes
+`rows` of them to a CSV file, breaking a fraction (`error_rate`) of them
+so the failure handling is measured too.
+"""
+import csv
+import datetime
+import os
+import random
+import string
+import tempfile
+from decimal import Decimal
+
+
+def is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def is_int(value):
+    return value.isdigit()
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _words(rnd, count):
+    return ' '.join(
+        ''.join(rnd.choice(string.ascii_lowercase)
+                for _ in range(rnd.randint(2, 9)))
+        for _ in range(count))
+
+
+# Same schema of tests/integration/lpnk/test_lpnk.py
+LPNK_LISTING_TYPES = ['free', 'bronze', 'silver', 'gold', 'gold_premium']
+LPNK_BUYING_MODES = ['buy_it_now']
+LPNK_CONDITIONS = ['new', 'used', 'unespecified']
+LPNK_FREE_SHIPPING_OPTIONS = ('yes', '')
+
+LPNK_COLUMNS = [
+    {'name': 'sub', 'required': True},
+    {'name': 'category_ml', 'required': False},
+    {'name': 'title', 'required': True},
+    {'name': 'description', 'required': True},
+    {'name': 'quantity', 'required': True},
+    {'name': 'price', 'required': True},
+    {'name': 'buying_mode', 'required': True, 'choices': LPNK_BUYING_MODES},
+    {'name': 'listing_type', 'required': True,
+     'choices': LPNK_LISTING_TYPES},
+    {'name': 'condition', 'required': True, 'choices': LPNK_CONDITIONS},
+    {'name': 'envio_gratis', 'choices': LPNK_FREE_SHIPPING_OPTIONS},
+    {'name': 'image_1', 'required': False},
+    {'name': 'image_2', 'required': False},
+    {'name': 'image_3', 'required': False},
+]
+
+
+def lpnk_row(rnd):
+    return [
+        _words(rnd, 1).upper(),
+        'MLA{0}'.format(rnd.randint(1000, 999999)),
+        _words(rnd, 6).title(),
+        '{0}\n<br>\n{1}'.format(_words(rnd, 12), _words(rnd, 20)),
+        str(rnd.randint(1, 500)),
+        str(rnd.randint(10, 5000)),
+        'buy_it_now',
+        rnd.choice(LPNK_LISTING_TYPES),
+        rnd.choice(LPNK_CONDITIONS),
+        rnd.choice(LPNK_FREE_SHIPPING_OPTIONS),
+        'http://img.example.com/{0}.jpg'.format(rnd.randint(1, 10 ** 6)),
+        rnd.choice(['', 'http://img.example.com/b.jpg']),
+        '',
+    ]
+
+
+NARROW_COLUMNS = [
+    {'name': 'id', 'required': True, 'validator': is_int},
+    {'name': 'name', 'required': True},
+    {'name': 'price', 'required': True, 'validator': is_number},
+]
+
+
+def narrow_row(rnd):
+    return [str(rnd.randint(1, 10 ** 9)), _words(rnd, 2),
+            '{0:.2f}'.format(rnd.uniform(0, 1000))]
+
+
+WIDE_COLUMN_COUNT = 100
+WIDE_COLUMNS = [
+    {'name': 'field_{0}'.format(i), 'required': i % 10 == 0}
+    for i in range(WIDE_COLUMN_COUNT)
+]
+
+
+def wide_row(rnd):
+    return [str(rnd.randint(0, 10 ** 6)) for _ in range(WIDE_COLUMN_COUNT)]
+
+
+TRANSFORM_CURRENCIES = ['USD', 'ARS', 'JPY', 'EUR']
+TRANSFORM_COLUMNS = [
+    {'name': 'id', 'required': True, 'validator': is_int, 'transform': int},
+    {'name': 'currency', 'required': True, 'choices': TRANSFORM_CURRENCIES},
+    {'name': 'price', 'required': True, 'validator': is_number,
+     'transform': Decimal},
+    {'name': 'quantity', 'required': True, 'validator': is_int,
+     'transform': int},
+    {'name': 'published', 'required': True, 'transform': parse_date},
+    {'name': 'tags', 'required': False,
+     'transform': lambda value: value.split('|')},
+]
+
+
+def transform_row(rnd):
+    return [
+        str(rnd.randint(1, 10 ** 9)),
+        rnd.choice(TRANSFORM_CURRENCIES),
+        '{0:.2f}'.format(rnd.uniform(0, 1000)),
+        str(rnd.randint(0, 100)),
+        '20{0:02d}-{1:02d}-{2:02d}'.format(
+            rnd.randint(0, 30), rnd.randint(1, 12), rnd.randint(1, 28)),
+        '|'.join(_words(rnd, 1) for _ in range(rnd.randint(0, 4))),
+    ]
+
+
+MULTILINE_COLUMNS = [
+    {'name': 'id', 'required': True, 'validator': is_int},
+    {'name': 'title', 'required': True},
+    {'name': 'body', 'required': True},
+]
+
+
+def multiline_row(rnd):
+    paragraphs = [_words(rnd, rnd.randint(5, 15))
+                  for _ in range(rnd.randint(2, 5))]
+    return [str(rnd.randint(1, 10 ** 9)),
+            '"{0}", {1}'.format(_words(rnd, 2), _words(rnd, 2)),
+            '\n'.join(paragraphs)]
+
+
+SCHEMAS = {
+    'lpnk': (LPNK_COLUMNS, lpnk_row),
+    'narrow': (NARROW_COLUMNS, narrow_row),
+    'wide': (WIDE_COLUMNS, wide_row),
+    'transform': (TRANSFORM_COLUMNS, transform_row),
+    'multiline': (MULTILINE_COLUMNS, multiline_row),
+}
+
+
+def break_row(rnd, columns, row):
+    """Makes the row invalid, the same way a real file would"""
+    required = [i for i, column in enumerate(columns)
+                if column.get('required')]
+    kind = rnd.randint(0, 2)
+    if kind == 0 or not required:
+        return row[:-1]
+    row = list(row)
+    row[rnd.choice(required)] = ''
+    return row
+
+
+def iter_rows(schema, rows, error_rate=0.0, seed=0):
+    columns, build_row = SCHEMAS[schema]
+    rnd = random.Random(seed)
+    yield [column['name'] for column in columns]
+    for _ in range(rows):
+        row = build_row(rnd)
+        if error_rate and rnd.random() < error_rate:
+            row = break_row(rnd, columns, row)
+        yield row
+
+
+def generate(schema, rows, error_rate=0.0, seed=0, directory=None):
+    """
+    Writes a dataset (unless it was already generated) and returns its
+    path. Files are named after their parameters, so big datasets are
+    generated once and reused in the next runs.
+
+    Params:
+      - schema: One of the names in SCHEMAS.
+      - rows: The number of rows, header excluded.
+      - error_rate: Optional. The fraction of invalid rows.
+      - seed: Optional. The seed of the random generator.
+      - directory: Optional. Where to write the file. By default it's
+        `smartcsv-benchmarks` in the temp directory.
+    """
+    if directory is None:
+        directory = os.path.join(tempfile.gettempdir(), 'smartcsv-benchmarks')
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    path = os.path.join(directory, '{0}-{1}-{2}-{3}.csv'.format(
+        schema, rows, error_rate, seed))
+    if not os.path.exists(path):
+        partial_path = path + '.partial'
+        with open(partial_path, 'w', newline='') as f:
+            csv.writer(f).writerows(
+                iter_rows(schema, rows, error_rate, seed))
+        os.rename(partial_path, path)
+    return path
@@ -0,0 +1,169 @@
+"""
+Memory benchmarks, measured with tracemalloc.
+
+Every phase of the reading is measured on its own, over a dataset loaded
+in memory (so file buffers aren't counted):
+
+  - parse: the rows produced by `csv.reader` (retained bytes per row).
+  - validate: the validity checks of every row (peak bytes, they shouldn't
+    retain anything).
+  - build: the objects built from the valid rows (retained bytes per row).
+  - errors: what the error store keeps (retained bytes per failed row).
+  - collect: `list(reader)`, the whole pipeline (retained and peak bytes
+    per row).
+
+Run them with:
+
+    $ python -m benchmarks.memory --rows 100000
+
+Results are compared with `memory_baseline.json` and the command exits
+with 1 when a measure grew more than the tolerance.
+"""
+import argparse
+import csv
+import gc
+import io
+import os
+import sys
+import tracemalloc
+
+import smartcsv
+
+from . import datasets, throughput
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(__file__), 'memory_baseline.json')
+
+
+def traced(function):
+    """
+    Runs `function` tracing its allocations. Returns its result, the bytes
+    still allocated when it returned and the peak of allocated bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current - start, peak - start
+
+
+def _per_row(value, rows):
+    return value / float(rows) if rows else 0.0
+
+
+def measure(schema, path, reader_options=None):
+    """
+    Measures every phase of reading the dataset at `path` and returns a
+    dict with the bytes of each measure.
+    """
+    columns = datasets.SCHEMAS[schema][0]
+    reader_options = reader_options or {}
+    with open(path, 'r', newline='') as f:
+        text = f.read()
+
+    def new_reader():
+        return smartcsv.reader(io.StringIO(text), columns=columns,
+                               fail_fast=False, **reader_options)
+
+    stream = io.StringIO(text)
+    csv_rows, retained, _ = traced(lambda: list(csv.reader(stream)))
+    csv_rows = csv_rows[1:]
+    results = {'parse_retained_per_row': _per_row(retained, len(csv_rows))}
+
+    reader = new_reader()
+    _, _, peak = traced(lambda: sum(
+        1 for csv_row in csv_rows if reader.validate_row(csv_row)[0]))
+    results['validate_peak'] = peak
+
+    valid_rows = [
+        csv_row for csv_row in csv_rows if reader.validate_row(csv_row)[0]]
+
+    reader = new_reader()
+    _, retained, _ = traced(
+        lambda: [reader._build_object(csv_row) for csv_row in valid_rows])
+    results['build_retained_per_row'] = _per_row(retained, len(valid_rows))
+
+    reader = new_reader()
+    _, retained, _ = traced(reader.validate)
+    results['errors_retained_per_failure'] = _per_row(
+        retained, reader.failure_count)
+
+    reader = new_reader()
+    objs, retained, peak = traced(lambda: list(reader))
+    results['collect_retained_per_row'] = _per_row(retained, len(objs))
+    results['collect_peak_per_row'] = _per_row(peak, len(objs))
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.1):
+    """
+    Returns a list of `(key, measure, baseline_value, value)` for every
+    measure that grew more than `tolerance` over the baseline.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        for measure_name, value in sorted(result.items()):
+            baseline_value = baseline.get(key, {}).get(measure_name)
+            if baseline_value is None:
+                continue
+            if value > baseline_value * (1 + tolerance):
+                regressions.append((key, measure_name, baseline_value, value))
+    return regressions
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.memory',
+        description='Measures the memory used by smartcsv.')
+    parser.add_argument(
+        '--schemas', nargs='+', default=sorted(datasets.SCHEMAS),
+        choices=sorted(datasets.SCHEMAS))
+    parser.add_argument('--rows', nargs='+', type=int, default=[10 ** 4])
+    parser.add_argument(
+        '--error-rates', nargs='+', type=float, default=[0.05, 0.5])
+    parser.add_argument(
+        '--row-type', default='dict', choices=['dict', 'record'])
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+
+    results = {}
+    for schema in options.schemas:
+        for rows in options.rows:
+            for error_rate in options.error_rates:
+                path = datasets.generate(
+                    schema, rows, error_rate, directory=options.data_dir)
+                key = '{0}/{1}'.format(
+                    throughput.result_key(schema, rows, error_rate),
+                    options.row_type)
+                results[key] = measure(
+                    schema, path, {'row_type': options.row_type})
+                print('{0:<34} {1}'.format(key, '  '.join(
+                    '{0}: {1:,.0f}'.format(name, value)
+                    for name, value in sorted(results[key].items()))))
+
+    baseline = throughput.load_baseline(options.baseline)
+    regressions = find_regressions(results, baseline, options.tolerance)
+    for key, measure_name, baseline_value, value in regressions:
+        print('REGRESSION {0} {1}: {2:,.0f} bytes (baseline {3:,.0f})'.format(
+            key, measure_name, value, baseline_value))
+
+    if options.save_baseline:
+        baseline.update(results)
+        throughput.save_baseline(options.baseline, baseline)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
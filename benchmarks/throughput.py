@@ -0,0 +1,95 @@
+"""
+Throughput benchmarks: rows/sec and bytes/sec of a CSVModelReader
+compared with the builtin `csv.reader` and `csv.DictReader`.
+"""
+import csv
+import json
+import os
+import timeit
+from collections import deque
+
+import smartcsv
+
+from .datasets import SCHEMAS
+
+READERS = ('csv.reader', 'csv.DictReader', 'smartcsv')
+
+
+def _consume(iterable):
+    deque(iterable, maxlen=0)
+
+
+def _read(reader_name, path, columns, reader_options):
+    with open(path, 'r', newline='') as f:
+        if reader_name == 'csv.reader':
+            _consume(csv.reader(f))
+        elif reader_name == 'csv.DictReader':
+            _consume(csv.DictReader(f))
+        else:
+            _consume(smartcsv.reader(
+                f, columns=columns, fail_fast=False, **reader_options))
+
+
+def measure(schema, path, rows, repeat=3, reader_options=None):
+    """
+    Reads the file at `path` (a dataset of the given `schema` and number
+    of `rows`) with every reader in READERS, `repeat` times, and returns
+    a dict with the best time of each one, its rows/sec and bytes/sec and
+    its overhead (how many times slower it is than `csv.reader`).
+    """
+    columns = SCHEMAS[schema][0]
+    size = os.path.getsize(path)
+    reader_options = reader_options or {}
+
+    results = {}
+    for reader_name in READERS:
+        seconds = min(timeit.repeat(
+            lambda: _read(reader_name, path, columns, reader_options),
+            number=1, repeat=repeat))
+        results[reader_name] = {
+            'seconds': seconds,
+            'rows_per_second': rows / seconds,
+            'bytes_per_second': size / seconds,
+        }
+
+    base = results['csv.reader']['seconds']
+    for result in results.values():
+        result['overhead'] = result['seconds'] / base
+    return results
+
+
+def result_key(schema, rows, error_rate):
+    return '{0}/{1}/{2}'.format(schema, rows, error_rate)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(results, baseline, tolerance=0.1):
+    """
+    Compares the smartcsv results with the baseline ones and returns a
+    list of `(key, baseline_overhead, overhead)` for the benchmarks in
+    which smartcsv got more than `tolerance` slower.
+
+    The overhead over `csv.reader` is compared instead of the absolute
+    times, so baselines recorded in other machines are still meaningful.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        overhead = result['smartcsv']['overhead']
+        baseline_overhead = baseline[key]['smartcsv']['overhead']
+        if overhead > baseline_overhead * (1 + tolerance):
+            regressions.append((key, baseline_overhead, overhead))
+    return regressions
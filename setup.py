@@ -35,6 +35,7 @@ setup(
     author_email='santiago.basulto@gmail.com',
     license='MIT',
     packages=['smartcsv'],
+    python_requires='>=3.8',
     maintainer='Santiago Basulto',
     tests_require=[
         'cov-core==1.14.0',
@@ -22,6 +22,24 @@ __author__ = 'Santiago Basulto'
 __license__ = 'MIT'
 __copyright__ = 'Copyright 2014 Santiago Basulto'
 
-from .reader import CSVModelReader
+import importlib
+
+from .reader import CSVModelReader, validate_file
 
 reader = CSVModelReader
+
+# Imported when first used: they need asyncio or multiprocessing, which
+# plain readers don't
+_LAZY_READERS = {
+    'AsyncCSVModelReader': 'aio',
+    'KeyLookup': 'lookup',
+    'ParallelCSVModelReader': 'parallel',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_READERS:
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name))
+    module = importlib.import_module('.' + _LAZY_READERS[name], __name__)
+    return getattr(module, name)
@@ -0,0 +1,315 @@
+import asyncio
+import codecs
+import csv
+import inspect
+from collections import deque
+
+from .cache import AsyncCachedCallable
+from .exceptions import CSVTransformException
+from .reader import CSVModelReader
+from .streams import sniff_encoding
+
+
+class _RecordFeed(object):
+    """
+    Line iterator consumed by the `csv.reader` of an AsyncCSVModelReader.
+
+    Lines are pushed only once they complete a record (an even number of
+    quote characters), so the csv reader never runs out of lines in the
+    middle of a multi-line quoted field.
+    """
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.lines:
+            return self.lines.popleft()
+        raise StopIteration()
+
+    next = __next__
+
+
+async def _await_if_needed(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class AsyncCSVModelReader(CSVModelReader):
+    def __init__(self, stream, concurrency=10, yield_every=1000,
+                 chunk_size=64 * 1024, **kwargs):
+        """
+        Asynchronous version of CSVModelReader, to be used with
+        `async for`.
+
+        Params:
+          - stream: The source of the CSV. Either an object with a `read`
+            coroutine (like `asyncio.StreamReader`) or an async iterable,
+            producing bytes (decoded with `encoding`) or text.
+          - concurrency: Optional. How many rows are validated at the same
+            time. Objects are always returned in their original order.
+          - yield_every: Optional. Control is given back to the event loop
+            every `yield_every` rows, even if the stream doesn't block.
+          - chunk_size: Optional. Size of the chunks read from `stream`.
+
+        Validators and transforms can be coroutine functions (or return
+        awaitables). All the other arguments are the ones of
+        CSVModelReader (`metrics` emitters don't get the `row_seconds`
+        histogram, since rows overlap).
+        """
+        if kwargs.get('stats'):
+            raise ValueError(
+                "Stats are not supported by AsyncCSVModelReader")
+        if kwargs.get('engine', 'csv') != 'csv':
+            # The fast engine reads lines ahead, records arrive one by one.
+            raise ValueError(
+                "AsyncCSVModelReader only supports the 'csv' engine")
+        self.stream = stream
+        self.concurrency = concurrency
+        self.yield_every = yield_every
+        self.chunk_size = chunk_size
+
+        self._feed = _RecordFeed()
+        self._decoder = None
+        self._head = b''
+        self._stream_iterator = None
+        self._partial_line = ''
+        self._record_lines = []
+        self._quote_count = 0
+        self._eof = False
+        self._started = False
+        self._exhausted = False
+        self._window = deque()
+        self._rows_since_yield = 0
+
+        super(AsyncCSVModelReader, self).__init__(self._feed, **kwargs)
+
+        self._quotechar = self.reader.dialect.quotechar
+        if self.reader.dialect.quoting == csv.QUOTE_NONE:
+            self._quotechar = None
+
+    def _cached_callable(self, function, size):
+        return AsyncCachedCallable(function, size)
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        raise TypeError(
+            "AsyncCSVModelReader reads from streams, not from paths")
+
+    def _read_preamble(self):
+        # Nothing can be read before the event loop is running, see _start
+        pass
+
+    def __iter__(self):
+        raise TypeError(
+            "AsyncCSVModelReader must be iterated with 'async for'")
+
+    def __aiter__(self):
+        return self
+
+    async def _read_chunk(self):
+        if hasattr(self.stream, 'read'):
+            return await self.stream.read(self.chunk_size)
+        if self._stream_iterator is None:
+            self._stream_iterator = self.stream.__aiter__()
+        try:
+            return await self._stream_iterator.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def _decode(self, chunk, final=False):
+        if not isinstance(chunk, bytes):
+            return chunk
+        if self._decoder is None:
+            # Like ByteLineStream, a BOM in the first bytes tells the
+            # Unicode encoding (and isn't part of the text)
+            self._head += chunk
+            if len(self._head) < 4 and not final:
+                return ''
+            encoding, start = sniff_encoding(self._head, self.encoding)
+            self._decoder = codecs.getincrementaldecoder(encoding)()
+            chunk, self._head = self._head[start:], b''
+        return self._decoder.decode(chunk, final)
+
+    def _push_line(self, line):
+        self._record_lines.append(line)
+        if self._quotechar is not None:
+            self._quote_count += line.count(self._quotechar)
+        if self._quote_count % 2 == 0:
+            self._feed.lines.extend(self._record_lines)
+            self._record_lines = []
+            self._quote_count = 0
+
+    async def _fill(self):
+        """Reads from the stream until there's a complete record to parse
+        or the stream is exhausted."""
+        while not self._feed.lines and not self._eof:
+            chunk = await self._read_chunk()
+            if not chunk:
+                self._eof = True
+                text = self._partial_line
+                if self._decoder is not None or self._head:
+                    text += self._decode(b'', True)
+                if text:
+                    self._record_lines.append(text)
+                self._feed.lines.extend(self._record_lines)
+                self._record_lines = []
+                self._partial_line = ''
+                return
+
+            lines = (self._partial_line + self._decode(chunk)).split('\n')
+            self._partial_line = lines.pop()
+            for line in lines:
+                self._push_line(line + '\n')
+
+    async def _next_row(self):
+        await self._fill()
+        try:
+            return next(self.reader)
+        except StopIteration:
+            return None
+
+    async def _start(self):
+        self._started = True
+        for i in range(0, self.skip_lines):
+            if await self._next_row() is None:
+                raise AttributeError("Skip lines had an invalid argument")
+
+        if self.header_included:
+            self.csv_header = None
+            while True:
+                csv_row = await self._next_row()
+                if csv_row is None or not self.is_empty_row(csv_row):
+                    self.csv_header = csv_row
+                    break
+            self._validate_header()
+
+    async def _evaluate_row_async(self, csv_row):
+        """
+        Async version of `_process_row`. Returns a tuple
+        `(obj, errors, transform_exception)`.
+
+        The loop is a copy of the one of `_process_row` that awaits the
+        validators and transforms: sharing it (e.g. as a generator of the
+        calls to make) makes the sync one much slower.
+        `test_same_results_as_the_sync_reader` runs both over the same
+        rows.
+        """
+        if not self._fused:
+            try:
+                obj, errors = self._evaluate_row(csv_row)
+            except CSVTransformException as e:
+                return None, None, e.original_exception
+            return obj, errors, None
+
+        if len(csv_row) != self._row_length:
+            return None, self._row_error(
+                'row_length', 'row_length',
+                self.ROW_LENGTH_INVALID_MESSAGE), None
+
+        obj = self._new_row()
+        pending_transforms = []
+        strip = self.strip_white_spaces
+
+        for value, column in zip(self._cells(csv_row), self._plan):
+            (name, required, skip, choices, validator,
+             transform, has_default, default, key) = column
+            if not value:
+                if required:
+                    return None, self._row_error(
+                        'required', name, self.REQUIRED_FIELD_MESSAGE), None
+                if not skip:
+                    obj[key] = default if has_default else value
+                continue
+
+            if skip:
+                continue
+
+            if choices is not None and value not in choices:
+                return None, self._row_error(
+                    'choices', name, self.INVALID_CHOICE_MESSAGE, value,
+                    choices), None
+
+            if validator is not None and not await _await_if_needed(
+                    validator(value)):
+                return None, self._row_error(
+                    'validator', name, self.VALIDATION_FAILED_MESSAGE,
+                    value), None
+
+            if strip:
+                value = value.strip()
+            if transform is not None:
+                pending_transforms.append((key, transform))
+            obj[key] = value
+
+        for key, transform in pending_transforms:
+            try:
+                obj[key] = await _await_if_needed(transform(obj[key]))
+            except Exception as e:
+                return None, None, e
+
+        if self._finish_row is not None:
+            return self._finish_row(obj), {}, None
+        return obj, {}, None
+
+    async def _fill_window(self):
+        while not self._exhausted and len(self._window) < self.concurrency:
+            csv_row = await self._next_row()
+            if csv_row is None:
+                self._exhausted = True
+                break
+            if self._is_skippable_row(csv_row):
+                continue
+            self._window.append((csv_row, asyncio.ensure_future(
+                self._evaluate_row_async(csv_row))))
+
+    def _cancel_window(self):
+        for _, task in self._window:
+            task.cancel()
+        self._window.clear()
+
+    async def next_value_async(self):
+        await self._fill_window()
+        if not self._window:
+            raise StopAsyncIteration()
+
+        csv_row, task = self._window.popleft()
+        obj, errors, transform_exception = await task
+
+        self._rows_since_yield += 1
+        if self._rows_since_yield >= self.yield_every:
+            self._rows_since_yield = 0
+            await asyncio.sleep(0)
+
+        if transform_exception is not None:
+            self._handle_transform_error(csv_row, transform_exception)
+            return None
+
+        if obj is None:
+            self._handle_invalid_row(csv_row, errors)
+            return None
+
+        self.row_counter += 1
+        if self.metrics is not None:
+            self.metrics.increment('rows_read')
+            self.metrics.tick()
+        return obj
+
+    async def __anext__(self):
+        try:
+            if not self._started:
+                await self._start()
+
+            val = None
+            while val is None:
+                val = await self.next_value_async()
+            return val
+        except BaseException:
+            self._cancel_window()
+            # Exhausted or aborted (e.g. an InvalidCSVException)
+            if self.metrics is not None:
+                self.metrics.flush()
+            raise
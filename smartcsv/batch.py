@@ -0,0 +1,241 @@
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from .exceptions import CSVTransformException
+
+
+class CSVBatch(object):
+    """
+    A batch of rows read at once from a CSVModelReader.
+
+    Valid rows are stored by column: `columns` maps every (not skipped)
+    column name to a NumPy object array with one value per valid row.
+    `row_numbers` holds the row number (the one used in `errors`) of every
+    valid row and `failed` is a boolean mask over all the rows of the batch
+    marking the ones that failed validation or transformation.
+    """
+    def __init__(self, columns, row_numbers, failed, first_row=0):
+        self.columns = columns
+        self.row_numbers = row_numbers
+        self.failed = failed
+        self.first_row = first_row
+
+    @property
+    def failed_rows(self):
+        """Row numbers of the rows that failed"""
+        return np.flatnonzero(self.failed) + self.first_row
+
+    def __len__(self):
+        return len(self.row_numbers)
+
+    def __getitem__(self, column_name):
+        return self.columns[column_name]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required to read CSV batches")
+
+
+def _read_raw_rows(reader, size):
+    rows = list(islice(reader.reader, size))
+    if not rows:
+        return None
+    if reader._fused:
+        # Blank rows are the only ones with less than 2 cells or without
+        # any value, so the per-row checks only run for those.
+        if reader.allow_empty_rows:
+            rows = list(filter(any, rows))
+        return [csv_row for csv_row in rows
+                if len(csv_row) > 1 or not reader.row_has_values(csv_row)]
+    return [csv_row for csv_row in rows
+            if not reader._is_skippable_row(csv_row)]
+
+
+def _to_array(values):
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _choices_mask(values, choices):
+    """
+    Membership of every value in choices, checked value by value: the
+    choices of the plan are hashed (or backends with their own lookups),
+    and np.isin on object arrays would compare every value with every
+    choice.
+    """
+    return np.fromiter(
+        (value in choices for value in values.tolist()),
+        dtype=bool, count=len(values))
+
+
+def _validate_columns(reader, table, errors):
+    """
+    Applies the column checks column by column over the `table` of raw
+    values. Rows are checked in column order and a row stops being
+    checked at its first error, so the errors reported (and the validators
+    invoked) are the same as in the row by row path.
+
+    Returns the mask of rows still valid.
+    """
+    alive = np.ones(table.shape[0], dtype=bool)
+
+    for index, column in zip(reader._cell_indices, reader._plan):
+        name, required, skip, choices, validator = column[:5]
+        values = table[:, index]
+        empty = values == ''
+
+        if required:
+            failed = alive & empty
+            for row in np.flatnonzero(failed):
+                errors[row] = reader._row_error(
+                    'required', name, reader.REQUIRED_FIELD_MESSAGE)
+            alive &= ~failed
+
+        if skip:
+            continue
+
+        if choices is not None:
+            candidates = np.flatnonzero(alive & ~empty)
+            if len(candidates):
+                valid = _choices_mask(values[candidates], choices)
+                for row in candidates[~valid]:
+                    errors[row] = reader._row_error(
+                        'choices', name, reader.INVALID_CHOICE_MESSAGE,
+                        values[row], choices)
+                    alive[row] = False
+
+        if validator is not None:
+            candidates = np.flatnonzero(alive & ~empty)
+            for row, value in zip(candidates, values[candidates].tolist()):
+                if not validator(value):
+                    errors[row] = reader._row_error(
+                        'validator', name, reader.VALIDATION_FAILED_MESSAGE,
+                        value)
+                    alive[row] = False
+
+    return alive
+
+
+def _build_columns(reader, table, alive, transform_errors):
+    """Builds the output arrays of the valid rows"""
+    columns = []
+    for index, column in zip(reader._cell_indices, reader._plan):
+        (name, required, skip, choices, validator,
+         transform, has_default, default, key) = column
+        if skip:
+            continue
+
+        values = table[alive, index]
+        empty = values == ''
+        if reader.strip_white_spaces:
+            values = _to_array(list(map(str.strip, values.tolist())))
+
+        if transform is not None:
+            items = values.tolist()
+            for position in np.flatnonzero(~empty).tolist():
+                if position in transform_errors:
+                    continue
+                try:
+                    items[position] = reader._transform(
+                        transform, items[position])
+                except CSVTransformException as e:
+                    transform_errors[position] = e.original_exception
+            values = _to_array(items)
+
+        if has_default:
+            values[empty] = default
+
+        columns.append((name, values))
+    return columns
+
+
+def _evaluate_rows(reader, rows):
+    """Row by row fallback for readers with custom validity checks"""
+    errors = {}
+    transform_errors = {}
+    objs = []
+    for position, csv_row in enumerate(rows):
+        try:
+            obj, row_errors = reader._evaluate_row(csv_row)
+        except CSVTransformException as e:
+            transform_errors[position] = e.original_exception
+            continue
+        if obj is None:
+            errors[position] = row_errors
+        else:
+            objs.append(obj)
+
+    columns = dict(
+        (name, _to_array([obj[name] for obj in objs]))
+        for name in reader.output_fields)
+    return columns, errors, transform_errors
+
+
+def read_batch(reader, size):
+    _require_numpy()
+
+    rows = _read_raw_rows(reader, size)
+    if rows is None:
+        return None
+
+    total = len(rows)
+    first_row = reader.row_counter
+
+    if reader._fused:
+        errors = {}
+        lengths = np.fromiter(map(len, rows), dtype=np.intp, count=total)
+        well_formed = np.flatnonzero(lengths == reader._row_length)
+        for position in np.flatnonzero(lengths != reader._row_length):
+            errors[position] = reader._row_error(
+                'row_length', 'row_length', reader.ROW_LENGTH_INVALID_MESSAGE)
+
+        table = np.empty((len(well_formed), reader._row_length),
+                         dtype=object)
+        if len(well_formed):
+            table[:] = [rows[position] for position in well_formed.tolist()]
+
+        table_errors = {}
+        alive = _validate_columns(reader, table, table_errors)
+        for target, row_errors in table_errors.items():
+            errors[well_formed[target]] = row_errors
+
+        built_errors = {}
+        built = _build_columns(reader, table, alive, built_errors)
+
+        valid_positions = well_formed[alive]
+        transform_errors = dict(
+            (valid_positions[position], exception)
+            for position, exception in built_errors.items())
+        keep = np.ones(len(valid_positions), dtype=bool)
+        keep[list(built_errors.keys())] = False
+        columns = dict((name, values[keep]) for name, values in built)
+    else:
+        columns, errors, transform_errors = _evaluate_rows(reader, rows)
+
+    failed = np.zeros(total, dtype=bool)
+    for position in sorted(set(errors) | set(transform_errors)):
+        failed[position] = True
+        reader.row_counter = first_row + position
+        csv_row = rows[position]
+        if position in transform_errors:
+            reader._handle_transform_error(
+                csv_row, transform_errors[position])
+        else:
+            reader._handle_invalid_row(csv_row, errors[position])
+
+    reader.row_counter = first_row + total
+    return CSVBatch(
+        columns, np.flatnonzero(~failed) + first_row, failed, first_row)
+
+
+def iter_batches(reader, size):
+    while True:
+        batch = reader.read_batch(size)
+        if batch is None:
+            return
+        if len(batch.failed):
+            yield batch
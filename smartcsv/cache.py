@@ -0,0 +1,74 @@
+import functools
+import inspect
+
+
+class CachedCallable(object):
+    """
+    Memoizes the results of a column validator or transform, keeping the
+    `size` most recently used values (LRU). Exceptions raised by the
+    wrapped function are cached too, and raised again on later calls
+    with the same value (without their previous traceback, which would
+    grow with every raise and keep its frames alive).
+    """
+    DEFAULT_SIZE = 4096
+
+    def __init__(self, function, size=DEFAULT_SIZE):
+        def call(value):
+            try:
+                return True, function(value)
+            except Exception as e:
+                return False, e.with_traceback(None)
+
+        self.function = function
+        self.size = size
+        self._cached = functools.lru_cache(maxsize=size)(call)
+
+    def __call__(self, value):
+        succeeded, result = self._cached(value)
+        if succeeded:
+            return result
+        raise result.with_traceback(None)
+
+    @property
+    def stats(self):
+        info = self._cached.cache_info()
+        # Every miss adds an entry, so the ones not in the cache anymore
+        # have been evicted.
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'evictions': info.misses - info.currsize,
+            'size': info.currsize,
+        }
+
+
+class AsyncCachedCallable(CachedCallable):
+    """
+    CachedCallable of the async reader, whose functions may return
+    awaitables (like coroutine functions). An awaitable can only be
+    awaited once, so the awaited results are cached instead: calls return
+    a coroutine.
+    """
+    def __init__(self, function, size=CachedCallable.DEFAULT_SIZE):
+        self.function = function
+        self.size = size
+        # Every value gets an entry that's filled the first time its
+        # result is known
+        self._cached = functools.lru_cache(maxsize=size)(lambda value: [])
+
+    async def __call__(self, value):
+        entry = self._cached(value)
+        if not entry:
+            try:
+                result = self.function(value)
+                if inspect.isawaitable(result):
+                    result = await result
+                succeeded = True
+            except Exception as e:
+                succeeded, result = False, e.with_traceback(None)
+            if not entry:
+                entry.extend((succeeded, result))
+        succeeded, result = entry
+        if succeeded:
+            return result
+        raise result.with_traceback(None)
@@ -0,0 +1,55 @@
+import hashlib
+import json
+
+CHECKPOINT_VERSION = 1
+
+DIALECT_ATTRIBUTES = ('delimiter', 'quotechar', 'escapechar', 'doublequote',
+                      'skipinitialspace', 'quoting', 'strict')
+
+
+def _callable_name(function):
+    if function is None:
+        return None
+    return '{0}.{1}'.format(
+        getattr(function, '__module__', None),
+        getattr(function, '__qualname__', type(function).__name__))
+
+
+def _choices_description(choices):
+    if choices is None:
+        return None
+    if isinstance(choices, (list, tuple, set, frozenset)):
+        return sorted(repr(choice) for choice in choices)
+    # Like SQLiteChoices, described by their type (and path if any)
+    return [_callable_name(type(choices)), getattr(choices, 'path', None)]
+
+
+def schema_fingerprint(reader):
+    """
+    Hash of everything that decides how the rows of a reader are counted
+    and validated: the columns (names, requirements, choices and the names
+    of their validators and transforms), the dialect and the options that
+    decide which rows are read. A checkpoint can only be resumed by a
+    reader with the same fingerprint.
+    """
+    columns = [[
+        column['name'],
+        column.get('required', False),
+        column.get('skip', False),
+        _choices_description(column.get('choices')),
+        _callable_name(column.get('validator')),
+        _callable_name(column.get('transform')),
+        repr(column.get('default')),
+    ] for column in reader.columns]
+    dialect = reader.reader.dialect
+    description = {
+        'columns': columns,
+        'dialect': [getattr(dialect, attribute, None)
+                    for attribute in DIALECT_ATTRIBUTES],
+        'header_included': reader.header_included,
+        'projection': reader.projection,
+        'strip_white_spaces': reader.strip_white_spaces,
+        'allow_empty_rows': reader.allow_empty_rows,
+    }
+    return hashlib.sha1(json.dumps(
+        description, sort_keys=True).encode('utf-8')).hexdigest()
@@ -0,0 +1,174 @@
+import bisect
+import hashlib
+import math
+import os
+import sqlite3
+
+
+class ChoicesBackend(object):
+    """
+    Base class for the membership backends of a column `choices`.
+
+    Backends only need to implement `__contains__`. Their `repr` is used
+    in the "Invalid choice" error messages, so it shouldn't include all
+    the choices.
+    """
+    def __contains__(self, value):
+        raise NotImplementedError()
+
+    def __repr__(self):
+        return '<{0}>'.format(type(self).__name__)
+
+
+class HashedChoices(frozenset):
+    """
+    Hashed version of a list or tuple of choices. It's a frozenset (so
+    membership checks don't depend on the number of choices) that keeps
+    the original choices for error messages.
+    """
+    def __new__(cls, choices):
+        hashed = super(HashedChoices, cls).__new__(cls, choices)
+        hashed.choices = choices
+        return hashed
+
+    def __repr__(self):
+        return repr(self.choices)
+
+
+class SortedChoices(ChoicesBackend):
+    """Keeps the choices in a sorted list and checks them with bisect"""
+    def __init__(self, choices):
+        self.choices = sorted(set(choices))
+
+    def __contains__(self, value):
+        choices = self.choices
+        index = bisect.bisect_left(choices, value)
+        return index != len(choices) and choices[index] == value
+
+    def __len__(self):
+        return len(self.choices)
+
+    def __repr__(self):
+        return '<SortedChoices: {0} choices>'.format(len(self.choices))
+
+
+class BloomFilterChoices(ChoicesBackend):
+    """
+    Checks the choices against a Bloom filter before checking them in
+    the `backend` (by default a SortedChoices backend). Values that aren't
+    choices are rejected by the filter most of the time, so the (usually
+    slower) backend is only checked for the valid ones.
+
+    Params:
+      - choices: An iterable with all the choices.
+      - backend: Optional. The backend with the exact set of choices.
+      - error_rate: Optional. The false positive rate of the filter.
+    """
+    def __init__(self, choices, backend=None, error_rate=0.01):
+        choices = list(choices)
+        if backend is None:
+            backend = SortedChoices(choices)
+        self.backend = backend
+
+        count = max(len(choices), 1)
+        self.size = int(math.ceil(
+            -count * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(
+            int(round(self.size / float(count) * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        for choice in choices:
+            for position in self._positions(choice):
+                self.bits[position >> 3] |= 1 << (position & 7)
+
+    def _positions(self, value):
+        digest = hashlib.md5(
+            value.encode('utf-8') if hasattr(value, 'encode')
+            else repr(value).encode('utf-8')).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def might_contain(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, value):
+        return self.might_contain(value) and value in self.backend
+
+    def __repr__(self):
+        return '<BloomFilterChoices: {0!r}>'.format(self.backend)
+
+
+class SQLiteChoices(ChoicesBackend):
+    """
+    Keeps the choices in a SQLite database, for sets of choices that don't
+    fit comfortably in memory.
+
+    Params:
+      - path: The path of the database file. It's created if it doesn't
+        exist.
+      - choices: Optional. An iterable of choices to add to the database.
+      - table: Optional. The name of the table holding the choices
+        (in a `value` column).
+    """
+    def __init__(self, path, choices=None, table='choices'):
+        self.path = path
+        self.table = table
+        self._connection = None
+        self._pid = None
+
+        connection = self._connect()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS "{0}" '
+            '(value TEXT PRIMARY KEY) WITHOUT ROWID'.format(table))
+        if choices is not None:
+            self.add(choices)
+
+    def _connect(self):
+        # SQLite connections can't be shared with forked processes
+        # (e.g. the workers of a ParallelCSVModelReader).
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path)
+            self._pid = os.getpid()
+        return self._connection
+
+    def add(self, choices):
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO "{0}" (value) VALUES (?)'.format(
+                    self.table),
+                ((choice,) for choice in choices))
+
+    def __contains__(self, value):
+        cursor = self._connect().execute(
+            'SELECT 1 FROM "{0}" WHERE value = ?'.format(self.table),
+            (value,))
+        return cursor.fetchone() is not None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    def __repr__(self):
+        return '<SQLiteChoices: {0}>'.format(self.path)
+
+
+def normalize_choices(choices):
+    """
+    Returns the container used to check the membership of the given
+    choices: lists and tuples are hashed, other containers (sets, dicts,
+    backends) are used as they are.
+    """
+    if isinstance(choices, (list, tuple)):
+        try:
+            return HashedChoices(choices)
+        except TypeError:
+            # Unhashable choices, the list is used as it is.
+            pass
+    return choices
@@ -0,0 +1,170 @@
+import bz2
+import lzma
+import os
+import queue
+import threading
+import zlib
+
+from .streams import DEFAULT_SLAB_SIZE, ByteLineStream
+
+DECOMPRESSORS = {
+    'gzip': lambda: zlib.decompressobj(16 + zlib.MAX_WBITS),
+    'bz2': bz2.BZ2Decompressor,
+    'xz': lzma.LZMADecompressor,
+}
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.lzma': 'xz',
+}
+
+
+def infer_compression(path):
+    """The compression of the file at `path` from its extension, or None"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def _decompress(decompressor, data, max_length):
+    """Yields the decompressed data of `data` in chunks of at most
+    `max_length` bytes, so very compressible input doesn't explode"""
+    chunk = decompressor.decompress(data, max_length)
+    while True:
+        if chunk:
+            yield chunk
+        if decompressor.eof:
+            return
+        tail = getattr(decompressor, 'unconsumed_tail', None)
+        if tail is None:
+            # bz2 and lzma keep the input they didn't consume
+            if decompressor.needs_input:
+                return
+            tail = b''
+        elif not tail and len(chunk) < max_length:
+            return
+        chunk = decompressor.decompress(tail, max_length)
+
+
+def decompressed_chunks(path, compression, chunk_size=DEFAULT_SLAB_SIZE):
+    """
+    Yields the decompressed data of the file at `path`, decompressing
+    chunks of `chunk_size` compressed bytes at a time (which runs without
+    the GIL) into chunks of at most `chunk_size` bytes. Files made of
+    several members or streams (like concatenated gzip files) are read
+    whole.
+    """
+    new_decompressor = DECOMPRESSORS[compression]
+    decompressor = None
+    with open(path, 'rb') as f:
+        data = f.read(chunk_size)
+        while data:
+            # A stream can end right at the end of a read: the next data
+            # is the start of another one
+            if decompressor is None or decompressor.eof:
+                decompressor = new_decompressor()
+            for chunk in _decompress(decompressor, data, chunk_size):
+                yield chunk
+            data = decompressor.unused_data if decompressor.eof else b''
+            if not data:
+                data = f.read(chunk_size)
+    if decompressor is not None and not decompressor.eof:
+        raise EOFError("Compressed file ended before the end-of-stream "
+                       "marker was reached")
+
+
+class BackgroundReader(object):
+    """
+    Iterates `chunks` (an iterable of bytes) on a background thread,
+    `prefetch` chunks ahead. It's an iterable of the same chunks.
+
+    With compressed files it overlaps the decompression with the reading.
+    Errors (like corrupted data) are raised when their chunk is reached.
+    """
+    def __init__(self, chunks, prefetch=4):
+        self.chunks = chunks
+        self._queue = queue.Queue(prefetch)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._read)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _read(self):
+        try:
+            for chunk in self.chunks:
+                if self._stopped.is_set():
+                    return
+                self._put(chunk)
+            self._put(b'')
+        except Exception as e:
+            self._put(e)
+
+    def __iter__(self):
+        while True:
+            chunk = self._queue.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+        close = getattr(self.chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class CompressedLineStream(ByteLineStream):
+    """
+    ByteLineStream of the compressed file at `path`, for
+    `CSVModelReader.from_path`. The file is decompressed on a background
+    thread (see BackgroundReader) and offsets are positions in the
+    decompressed data. The file is closed once it's read to the end.
+
+    Params:
+      - path: The path of the file.
+      - compression: 'gzip', 'bz2' or 'xz'.
+      - encoding: Optional. The encoding of the decompressed data.
+      - slab_size: Optional. Approximate size of the decoded slabs.
+      - prefetch: Optional. Decompressed slabs kept ahead of the reading.
+      - start: Optional. Offset in the decompressed data where the reading
+        starts.
+    """
+    def __init__(self, path, compression, encoding='utf-8',
+                 slab_size=DEFAULT_SLAB_SIZE, prefetch=4, start=0):
+        if compression not in DECOMPRESSORS:
+            raise ValueError(
+                "Invalid compression {0}. Expected one of {1}".format(
+                    compression, sorted(DECOMPRESSORS)))
+        self.path = path
+        self.compression = compression
+        self.prefetch = prefetch
+        self._background = BackgroundReader(
+            decompressed_chunks(path, compression, slab_size),
+            prefetch=prefetch)
+        super(CompressedLineStream, self).__init__(
+            self._background, encoding=encoding, slab_size=slab_size,
+            start=start)
+
+    # Offsets are in the decompressed data
+    random_access = False
+
+    def reopen(self, start, slab_size=None):
+        self.close()
+        return CompressedLineStream(
+            self.path, self.compression, encoding=self.encoding,
+            slab_size=slab_size or self.slab_size, prefetch=self.prefetch,
+            start=start)
+
+    def close(self):
+        self._background.close()
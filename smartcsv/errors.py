@@ -0,0 +1,501 @@
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
+
+class RowError(Mapping):
+    """
+    The error of an invalid row, as a compact record: the `code` of the
+    check that failed ('row_length', 'required', 'choices', 'validator' or
+    'transform'), the `column` it's reported under, the `position` of the
+    cell in the CSV row and the offending `value`.
+
+    It's a mapping in the format of `reader.errors` (`{column: message}`)
+    whose message is only formatted when it's read: `template` formatted
+    with `detail` (like the choices) and the value, or as is if there's no
+    detail.
+    """
+    __slots__ = ('code', 'column', 'template', 'position', 'value', 'detail')
+
+    def __init__(self, code, column, template, position=None, value=None,
+                 detail=None):
+        self.code = code
+        self.column = column
+        self.template = template
+        self.position = position
+        self.value = value
+        self.detail = detail
+
+    @property
+    def check(self):
+        """Name of the check of `validity_checks` that failed ('transform'
+        for transformations)"""
+        if self.code == 'row_length':
+            return '_is_valid_row_length'
+        if self.code == 'transform':
+            return 'transform'
+        return '_is_valid_row_values'
+
+    @property
+    def message(self):
+        if self.detail is None:
+            return self.template
+        return self.template.format(self.detail, self.value)
+
+    def __getitem__(self, key):
+        if key != self.column:
+            raise KeyError(key)
+        return self.message
+
+    def __iter__(self):
+        yield self.column
+
+    def __len__(self):
+        return 1
+
+    def __repr__(self):
+        return repr({self.column: self.message})
+
+    def __reduce__(self):
+        # Details (like choices backed by a database) may not be picklable
+        return (RowError, (self.code, self.column, self.message,
+                           self.position, self.value))
+
+
+class CheckErrors(dict):
+    """The errors returned by a custom check of `validity_checks`, tagged
+    with the name of the `check`"""
+    __slots__ = ('check',)
+
+    def __init__(self, errors, check):
+        super(CheckErrors, self).__init__(errors)
+        self.check = check
+
+
+class ErrorStore(object):
+    """
+    Base class of the stores that keep the rows that failed while reading
+    a CSV (see `CSVModelReader._add_error`).
+
+    Every failed row is stored by its row number as a dict with the
+    original `row` and its `errors`, the same format of `reader.errors`.
+    """
+    def add(self, row_number, csv_row, errors):
+        raise NotImplementedError()
+
+    def get(self, row_number):
+        """Returns the error of the given row or raises a KeyError"""
+        raise NotImplementedError()
+
+    def row_numbers(self):
+        """Iterates the numbers of the failed rows, in order"""
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def __iter__(self):
+        """Iterates `(row_number, row_error)` tuples, in order"""
+        for row_number in self.row_numbers():
+            yield row_number, self.get(row_number)
+
+    def by_column(self, column_name):
+        """Iterates the `(row_number, row_error)` tuples of the rows that
+        failed because of the given column"""
+        for row_number, row_error in self:
+            if column_name in row_error['errors']:
+                yield row_number, row_error
+
+    @property
+    def errors(self):
+        """The errors in the format of `reader.errors`"""
+        return ErrorsView(self)
+
+    def checkpoint(self):
+        """A JSON serializable state of the store, to restore it in an
+        empty one (see `CSVModelReader.checkpoint`)"""
+        return {'rows': [[row_number, row_error['row'],
+                          dict(row_error['errors'])]
+                         for row_number, row_error in self]}
+
+    def restore(self, state):
+        for row_number, csv_row, errors in state['rows']:
+            self.add(row_number, csv_row, errors)
+
+
+def _render(row_error):
+    """Replaces the RowError of a stored row by a plain dict"""
+    errors = row_error['errors']
+    if isinstance(errors, RowError):
+        row_error['errors'] = dict(errors)
+    return row_error
+
+
+class MemoryErrorStore(ErrorStore):
+    """
+    Keeps all the errors in a dict. This is the default store.
+
+    RowErrors are kept as they are (their messages aren't formatted) until
+    the errors are read, when they're replaced by plain dicts.
+    """
+    def __init__(self):
+        self._errors = {}
+        # Rows whose errors are still RowErrors
+        self._unrendered = []
+
+    def add(self, row_number, csv_row, errors):
+        if isinstance(errors, RowError):
+            self._unrendered.append(row_number)
+        else:
+            errors = dict(errors or {})
+        row_error = {
+            'row': csv_row,
+            'errors': errors,
+        }
+        self._errors.setdefault('rows', {})[row_number] = row_error
+
+    def get(self, row_number):
+        return _render(self._errors.get('rows', {})[row_number])
+
+    def row_numbers(self):
+        return iter(sorted(self._errors.get('rows', {})))
+
+    def __len__(self):
+        return len(self._errors.get('rows', {}))
+
+    @property
+    def errors(self):
+        if self._unrendered:
+            rows = self._errors['rows']
+            for row_number in self._unrendered:
+                if row_number in rows:
+                    _render(rows[row_number])
+            self._unrendered = []
+        return self._errors
+
+
+class SpillingErrorStore(ErrorStore):
+    """
+    Keeps the errors in memory until they take more than `memory_limit`
+    bytes (roughly estimated), then moves them to a SQLite database and
+    stores the following ones there.
+
+    Params:
+      - memory_limit: Optional. Bytes of errors to keep in memory.
+      - path: Optional. Path of the SQLite database. By default it's a
+        temporary file, deleted when the store is closed.
+      - batch_size: Optional. Errors are written to the database in
+        batches of this size.
+    """
+    def __init__(self, memory_limit=64 * 1024 * 1024, path=None,
+                 batch_size=1000):
+        self.memory_limit = memory_limit
+        self.path = path
+        self.batch_size = batch_size
+        self.memory_size = 0
+        self._memory = MemoryErrorStore()
+        self._connection = None
+        self._pending = []
+        self._count = 0
+        self._temporary = False
+
+    @property
+    def spilled(self):
+        return self._connection is not None
+
+    def _estimate_size(self, csv_row, errors):
+        size = sys.getsizeof(csv_row) + sum(
+            sys.getsizeof(value) for value in csv_row)
+        if isinstance(errors, RowError):
+            # Its message isn't formatted, the value is one of the row's
+            size += sys.getsizeof(errors)
+        elif errors:
+            size += sum(sys.getsizeof(key) + sys.getsizeof(value)
+                        for key, value in errors.items())
+        return size
+
+    def _spill(self):
+        if self.path is None:
+            fd, self.path = tempfile.mkstemp(suffix='.db', prefix='smartcsv-')
+            os.close(fd)
+            self._temporary = True
+        self._connection = sqlite3.connect(self.path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS errors '
+                '(row_number INTEGER PRIMARY KEY, row TEXT, errors TEXT)')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS error_columns '
+                '(column_name TEXT, row_number INTEGER)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS error_columns_index '
+                'ON error_columns (column_name, row_number)')
+        for row_number, row_error in self._memory:
+            self._pending.append(
+                (row_number, row_error['row'], row_error['errors']))
+        self._memory = None
+        self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO errors VALUES (?, ?, ?)',
+                ((row_number, json.dumps(csv_row),
+                  json.dumps(dict(errors), default=repr))
+                 for row_number, csv_row, errors in self._pending))
+            self._connection.executemany(
+                'INSERT INTO error_columns VALUES (?, ?)',
+                ((column_name, row_number)
+                 for row_number, _, errors in self._pending
+                 for column_name in errors))
+        self._pending = []
+
+    def add(self, row_number, csv_row, errors):
+        self._count += 1
+        if not self.spilled:
+            self._memory.add(row_number, csv_row, errors)
+            self.memory_size += self._estimate_size(csv_row, errors)
+            if self.memory_size > self.memory_limit:
+                self._spill()
+            return
+
+        if not isinstance(errors, RowError):
+            errors = dict(errors or {})
+        self._pending.append((row_number, csv_row, errors))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def get(self, row_number):
+        if not self.spilled:
+            return self._memory.get(row_number)
+        self._flush()
+        result = self._connection.execute(
+            'SELECT row, errors FROM errors WHERE row_number = ?',
+            (row_number,)).fetchone()
+        if result is None:
+            raise KeyError(row_number)
+        return {'row': json.loads(result[0]), 'errors': json.loads(result[1])}
+
+    def row_numbers(self):
+        if not self.spilled:
+            return self._memory.row_numbers()
+        self._flush()
+        cursor = self._connection.execute(
+            'SELECT row_number FROM errors ORDER BY row_number')
+        return (row_number for (row_number,) in cursor)
+
+    def by_column(self, column_name):
+        if not self.spilled:
+            return self._memory.by_column(column_name)
+        self._flush()
+        cursor = self._connection.execute(
+            'SELECT row_number FROM error_columns WHERE column_name = ? '
+            'ORDER BY row_number', (column_name,))
+        return ((row_number, self.get(row_number))
+                for (row_number,) in cursor.fetchall())
+
+    def __len__(self):
+        return self._count
+
+    def checkpoint(self):
+        """Once spilled, the state is the database, which is kept when the
+        store is closed from then on"""
+        if not self.spilled:
+            return super(SpillingErrorStore, self).checkpoint()
+        self._flush()
+        self._temporary = False
+        last_row_number = self._connection.execute(
+            'SELECT MAX(row_number) FROM errors').fetchone()[0]
+        return {'path': self.path, 'count': self._count,
+                'last_row_number': last_row_number}
+
+    def restore(self, state):
+        if 'path' not in state:
+            return super(SpillingErrorStore, self).restore(state)
+        # The rows that failed after the checkpoint are dropped
+        self.path = state['path']
+        self._spill()
+        last_row_number = state['last_row_number']
+        if last_row_number is None:
+            last_row_number = -1
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM errors WHERE row_number > ?', (last_row_number,))
+            self._connection.execute(
+                'DELETE FROM error_columns WHERE row_number > ?',
+                (last_row_number,))
+        self._count = state['count']
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            if self._temporary:
+                os.remove(self.path)
+
+
+class AggregatingErrorStore(ErrorStore):
+    """
+    Counts the failed rows instead of keeping them: by column and kind of
+    error (the `code` of the RowError, or the name of the custom check of
+    `validity_checks` that failed) and by check. Every (column, kind)
+    bucket keeps a uniform random sample of up to `examples` of its rows
+    (reservoir sampling), so memory doesn't grow with the file.
+
+    `reader.errors` only has the sampled rows; `summary()` has the counts:
+
+        {'failure_count': 12010,
+         'columns': {'price': {'validator': {'count': 12004,
+                                             'examples': [17, 920, ...]}},
+                     ...},
+         'checks': {'_is_valid_row_values': 12004, ...}}
+
+    Params:
+      - examples: Optional. Rows sampled per bucket.
+      - seed: Optional. Seed of the sampling.
+    """
+    def __init__(self, examples=5, seed=None):
+        self.examples = examples
+        self.failure_count = 0
+        # (column, kind) -> [count, row numbers of the sampled rows]
+        self._buckets = {}
+        self._checks = {}
+        # row number -> [buckets that sample it, row error]
+        self._rows = {}
+        self._random = random.Random(seed)
+
+    def _classify(self, errors):
+        """The check and the (column, kind) buckets of the errors"""
+        if isinstance(errors, RowError):
+            return errors.check, [(errors.column, errors.code)]
+        check = getattr(errors, 'check', 'other')
+        return check, [(column_name, check) for column_name in errors]
+
+    def add(self, row_number, csv_row, errors):
+        if not isinstance(errors, RowError):
+            errors = CheckErrors(errors or {}, getattr(
+                errors, 'check', 'other'))
+        self.failure_count += 1
+        check, bucket_keys = self._classify(errors)
+        self._checks[check] = self._checks.get(check, 0) + 1
+        for bucket_key in bucket_keys:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = [0, []]
+            bucket[0] += 1
+            sampled = bucket[1]
+            if len(sampled) < self.examples:
+                sampled.append(row_number)
+            else:
+                slot = self._random.randrange(bucket[0])
+                if slot >= self.examples:
+                    continue
+                self._release(sampled[slot])
+                sampled[slot] = row_number
+            self._keep(row_number, {'row': csv_row, 'errors': errors})
+
+    def _keep(self, row_number, row_error):
+        entry = self._rows.get(row_number)
+        if entry is None:
+            entry = self._rows[row_number] = [0, row_error]
+        entry[0] += 1
+
+    def _release(self, row_number):
+        """Forgets a row once no bucket samples it"""
+        entry = self._rows[row_number]
+        entry[0] -= 1
+        if not entry[0]:
+            del self._rows[row_number]
+
+    def get(self, row_number):
+        return _render(self._rows[row_number][1])
+
+    def row_numbers(self):
+        return iter(sorted(self._rows))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def summary(self):
+        columns = {}
+        for (column_name, kind), (count, sampled) in self._buckets.items():
+            columns.setdefault(column_name, {})[kind] = {
+                'count': count,
+                'examples': sorted(sampled),
+            }
+        return {
+            'failure_count': self.failure_count,
+            'columns': columns,
+            'checks': dict(self._checks),
+        }
+
+    def checkpoint(self):
+        return {
+            'failure_count': self.failure_count,
+            'checks': self._checks,
+            'buckets': [[column_name, kind, count, sampled]
+                        for (column_name, kind), (count, sampled)
+                        in self._buckets.items()],
+            'rows': [[row_number, row_error['row'],
+                      dict(row_error['errors'])]
+                     for row_number, row_error in self],
+        }
+
+    def restore(self, state):
+        self.failure_count = state['failure_count']
+        self._checks = dict(state['checks'])
+        row_errors = dict(
+            (row_number, {'row': csv_row, 'errors': errors})
+            for row_number, csv_row, errors in state['rows'])
+        for column_name, kind, count, sampled in state['buckets']:
+            self._buckets[(column_name, kind)] = [count, list(sampled)]
+            for row_number in sampled:
+                self._keep(row_number, row_errors[row_number])
+
+
+class ErrorsView(Mapping):
+    """Read-only view of an ErrorStore in the format of `reader.errors`"""
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, key):
+        if key != 'rows' or not len(self.store):
+            raise KeyError(key)
+        return ErrorRowsView(self.store)
+
+    def __iter__(self):
+        if len(self.store):
+            yield 'rows'
+
+    def __len__(self):
+        return 1 if len(self.store) else 0
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class ErrorRowsView(Mapping):
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, row_number):
+        return self.store.get(row_number)
+
+    def __iter__(self):
+        return self.store.row_numbers()
+
+    def __len__(self):
+        return len(self.store)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
@@ -1,5 +1,11 @@
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
 __all__ = ['InvalidCSVException', 'InvalidCSVHeaderException',
-           'InvalidCSVColumnDefinition', 'CSVTransformException']
+           'InvalidCSVColumnDefinition', 'ErrorRateException',
+           'CSVTransformException']
 
 
 class BaseCSVException(Exception):
@@ -8,12 +14,31 @@ class BaseCSVException(Exception):
 
 class InvalidCSVException(BaseCSVException):
     def __init__(self, message, errors=None):
-        _message = message
-        if errors:
-            _message += " Errors: {0}".format(errors)
-        super(InvalidCSVException, self).__init__(_message)
+        super(InvalidCSVException, self).__init__(message)
+        self.message = message
         self.errors = errors
 
+    @property
+    def errors(self):
+        # Row errors are kept as they are until they're read
+        errors = self._errors
+        if isinstance(errors, Mapping) and not isinstance(errors, dict):
+            errors = self._errors = dict(errors)
+        return errors
+
+    @errors.setter
+    def errors(self, errors):
+        self._errors = errors
+
+    def __str__(self):
+        # Formatted when it's shown: the errors can be big
+        if self._errors:
+            return "{0} Errors: {1}".format(self.message, self._errors)
+        return self.message
+
+    def __reduce__(self):
+        return (type(self), (self.message, self.errors))
+
 
 class InvalidCSVHeaderException(InvalidCSVException):
     pass
@@ -23,6 +48,18 @@ class InvalidCSVColumnDefinition(InvalidCSVException):
     pass
 
 
+class ErrorRateException(InvalidCSVException):
+    """Raised by an ErrorRatePolicy with the statistics of the `window`
+    (see `ErrorRatePolicy.window_stats`); `errors` are the ones of the
+    last invalid row"""
+    def __init__(self, message, errors=None, window=None):
+        super(ErrorRateException, self).__init__(message, errors)
+        self.window = window
+
+    def __reduce__(self):
+        return (type(self), (self.message, self.errors, self.window))
+
+
 class CSVTransformException(BaseCSVException):
     def __init__(self, message, original_exception=None):
         super(CSVTransformException, self).__init__(message)
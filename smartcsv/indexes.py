@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+
+from .checkpoints import DIALECT_ATTRIBUTES
+
+
+def layout_fingerprint(reader):
+    """
+    Hash of the options that decide where the rows of a file are and how
+    they're numbered (the dialect, the header, the skipped lines...). The
+    columns' checks don't matter: indexes of a file stay valid when they
+    change.
+    """
+    dialect = reader.reader.dialect
+    description = {
+        'dialect': [getattr(dialect, attribute, None)
+                    for attribute in DIALECT_ATTRIBUTES],
+        'header_included': reader.header_included,
+        'skip_lines': reader.skip_lines,
+        'allow_empty_rows': reader.allow_empty_rows,
+        'encoding': reader.encoding,
+    }
+    return hashlib.sha1(json.dumps(
+        description, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def file_signature(path):
+    """Size and modification time of a file, to tell if it changed"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_atomically(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.rename(temporary_path, path)
+
+
+class RowIndex(object):
+    """
+    Byte offsets of every `interval`-th row of a CSV, so a reader can go
+    to any row (see `CSVModelReader.seek_row`) parsing at most `interval`
+    rows. Rows are numbered like in `reader.errors` (blank rows aren't
+    counted) and offsets are the ones of `reader.offset`, so records with
+    multi-line fields are fine.
+
+    The index is filled as a side effect of iterating a reader created
+    with it, and saved to `path` (if any) as JSON once the reader is
+    exhausted or closed. `CSVModelReader.from_path(..., row_index=True)`
+    keeps it in a sidecar file next to the CSV (see `for_file`).
+
+    Params:
+      - path: Optional. Where the index is saved.
+      - interval: Optional. Rows between indexed rows.
+    """
+    VERSION = 1
+    DEFAULT_INTERVAL = 1000
+    SUFFIX = '.rowindex.json'
+
+    def __init__(self, path=None, interval=DEFAULT_INTERVAL):
+        if interval < 1:
+            raise ValueError("The interval must be positive")
+        self.path = path
+        self.interval = interval
+        # offsets[i] is the offset of the row i * interval
+        self.offsets = []
+        # Known once the whole file was indexed
+        self.row_count = None
+        # What the index is valid for (see `bind` and `for_file`)
+        self.layout = None
+        self.signature = None
+
+    @classmethod
+    def sidecar_path(cls, csv_path):
+        return csv_path + cls.SUFFIX
+
+    @classmethod
+    def for_file(cls, csv_path, interval=DEFAULT_INTERVAL):
+        """The sidecar index of the file at `csv_path`, loaded if it was
+        saved with the same interval and the file didn't change"""
+        index = cls(cls.sidecar_path(csv_path), interval)
+        index.signature = file_signature(csv_path)
+        if os.path.exists(index.path):
+            with open(index.path) as f:
+                state = json.load(f)
+            if (state.get('version') == cls.VERSION and
+                    state['interval'] == interval and
+                    state['signature'] == index.signature):
+                index.offsets = state['offsets']
+                index.row_count = state['row_count']
+                index.layout = state['layout']
+        return index
+
+    @property
+    def complete(self):
+        return self.row_count is not None
+
+    @property
+    def next_row(self):
+        """The next row whose offset is missing"""
+        return len(self.offsets) * self.interval
+
+    def bind(self, layout):
+        """Starts over if the index was built for another layout"""
+        if self.layout != layout:
+            self.offsets = []
+            self.row_count = None
+            self.layout = layout
+
+    def add(self, row_number, offset):
+        if row_number == self.next_row:
+            self.offsets.append(offset)
+
+    def finish(self, row_count):
+        """Marks the index as complete if it has all the rows"""
+        if row_count <= self.next_row:
+            self.row_count = row_count
+
+    def locate(self, row_number):
+        """Returns the closest indexed row before `row_number` (included)
+        and its offset"""
+        if row_number < 0 or (
+                self.complete and row_number >= self.row_count):
+            raise IndexError("Row {0} out of range".format(row_number))
+        if not self.offsets:
+            raise IndexError("Row {0} is not indexed".format(row_number))
+        position = min(row_number // self.interval, len(self.offsets) - 1)
+        return position * self.interval, self.offsets[position]
+
+    def save(self):
+        if self.path is None:
+            return
+        write_atomically(self.path, json.dumps({
+            'version': self.VERSION,
+            'interval': self.interval,
+            'offsets': self.offsets,
+            'row_count': self.row_count,
+            'layout': self.layout,
+            'signature': self.signature,
+        }))
+
+
+class KeyIndex(object):
+    """
+    Offsets of the rows of a CSV by the value of their `column` (the key),
+    kept in a SQLite database so point lookups don't need a scan (see
+    `smartcsv.lookup.KeyLookup`). If a key is repeated, its first row is
+    kept.
+
+    The index is filled while a reader created with it is iterated (or
+    validated) from the start, and marked as complete once the reader is
+    exhausted. A database can hold the indexes of several columns.
+
+    Params:
+      - path: The path of the database (':memory:' for a temporary one).
+      - column: The key column.
+      - signature: Optional. What identifies the contents of the CSV (see
+        `file_signature`): the index starts over if it changes.
+      - batch_size: Optional. Keys are written in batches of this size.
+    """
+    SUFFIX = '.keyindex.db'
+
+    def __init__(self, path, column, signature=None, batch_size=10000):
+        self.path = path
+        self.column = column
+        self.signature = signature
+        self.batch_size = batch_size
+        self.complete = False
+        self.layout = None
+        self._pending = []
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS keys (column_name TEXT, '
+                'key TEXT, offset INTEGER, PRIMARY KEY (column_name, key)) '
+                'WITHOUT ROWID')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS indexes (column_name TEXT '
+                'PRIMARY KEY, layout TEXT, signature TEXT, complete INTEGER)')
+        state = self._connection.execute(
+            'SELECT layout, signature, complete FROM indexes '
+            'WHERE column_name = ?', (column,)).fetchone()
+        if state is not None and state[1] == json.dumps(signature):
+            self.layout = state[0]
+            self.complete = bool(state[2])
+        else:
+            self._reset(None)
+
+    @classmethod
+    def sidecar_path(cls, csv_path):
+        return csv_path + cls.SUFFIX
+
+    @classmethod
+    def for_file(cls, csv_path, column, **kwargs):
+        """The index of `column` of the file at `csv_path`, in a sidecar
+        database next to it. It's kept while the file doesn't change."""
+        return cls(cls.sidecar_path(csv_path), column,
+                   signature=file_signature(csv_path), **kwargs)
+
+    def _reset(self, layout):
+        self._pending = []
+        self.layout = layout
+        self.complete = False
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM keys WHERE column_name = ?', (self.column,))
+            self._save_state()
+
+    def _save_state(self):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO indexes VALUES (?, ?, ?, ?)',
+            (self.column, self.layout, json.dumps(self.signature),
+             int(self.complete)))
+
+    def bind(self, layout):
+        """Starts over if the index was built for another layout"""
+        if self.layout != layout:
+            self._reset(layout)
+
+    def add(self, key, offset):
+        self._pending.append((self.column, key, offset))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO keys VALUES (?, ?, ?)', self._pending)
+        self._pending = []
+
+    def finish(self):
+        """Marks the index as complete"""
+        self.flush()
+        self.complete = True
+        with self._connection:
+            self._save_state()
+
+    def get(self, key):
+        """Returns the offset of the row of `key` or raises a KeyError"""
+        self.flush()
+        result = self._connection.execute(
+            'SELECT offset FROM keys WHERE column_name = ? AND key = ?',
+            (self.column, key)).fetchone()
+        if result is None:
+            raise KeyError(key)
+        return result[0]
+
+    def __contains__(self, key):
+        try:
+            self.get(key)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        self.flush()
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM keys WHERE column_name = ?',
+            (self.column,)).fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+
+class KeyRecorder(object):
+    """
+    Wraps the tokenizer of a reader to record the key and the offset of
+    every row it produces in a KeyIndex.
+    """
+    def __init__(self, tokenizer, source, key_index, position,
+                 is_skippable_row, strip_white_spaces):
+        self.tokenizer = tokenizer
+        self.dialect = tokenizer.dialect
+        self.source = source
+        self.key_index = key_index
+        self.position = position
+        self.is_skippable_row = is_skippable_row
+        self.strip_white_spaces = strip_white_spaces
+
+    @property
+    def line_num(self):
+        return self.tokenizer.line_num
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        offset = self.source.offset_of_line(self.tokenizer.line_num)
+        try:
+            csv_row = next(self.tokenizer)
+        except StopIteration:
+            self.key_index.finish()
+            raise
+        if (len(csv_row) > self.position and
+                not self.is_skippable_row(csv_row)):
+            key = csv_row[self.position]
+            if self.strip_white_spaces:
+                key = key.strip()
+            self.key_index.add(key, offset)
+        return csv_row
+
+    next = __next__
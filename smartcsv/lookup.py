@@ -0,0 +1,71 @@
+from .indexes import KeyIndex
+from .reader import CSVModelReader
+
+
+class KeyLookup(object):
+    """
+    Point lookups of the rows of a CSV by the value of a key column:
+    `lookup[key]` seeks to the row and returns it validated and built with
+    the column definitions, like a reader would, without reading anything
+    else.
+
+    The offsets come from a persistent `smartcsv.indexes.KeyIndex` (by
+    default in a sidecar database next to the CSV). If it's not complete
+    (the file is new or changed) it's built first with a pass that only
+    tokenizes the file. Readers created with `key_index=<column>` build it
+    too, as a side effect of a normal read.
+
+    Params:
+      - path: The path of the CSV.
+      - key: The name of the key column.
+      - index_path: Optional. The path of the index database.
+      - All the other arguments are the ones of `CSVModelReader.from_path`
+        (`columns`, `dialect`...).
+
+    Lookups raise a KeyError for unknown keys and InvalidCSVException for
+    invalid rows. Lookups in compressed files decompress the file up to
+    the row.
+    """
+    def __init__(self, path, key, index_path=None, **kwargs):
+        if index_path is None:
+            self.key_index = KeyIndex.for_file(path, key)
+        else:
+            self.key_index = KeyIndex(index_path, key)
+        self.path = path
+        try:
+            self.reader = CSVModelReader.from_path(
+                path, key_index=self.key_index, **kwargs)
+            if not self.key_index.complete:
+                for _ in self.reader.reader:
+                    pass
+        except Exception:
+            self.key_index.close()
+            raise
+
+    def __getitem__(self, key):
+        return self.reader.read_at(self.key_index.get(key))
+
+    def get(self, key, default=None):
+        """The row of `key`, or `default` if there isn't one (invalid rows
+        still raise InvalidCSVException)"""
+        try:
+            offset = self.key_index.get(key)
+        except KeyError:
+            return default
+        return self.reader.read_at(offset)
+
+    def __contains__(self, key):
+        return key in self.key_index
+
+    def __len__(self):
+        return len(self.key_index)
+
+    def close(self):
+        self.reader.close()
+        self.key_index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,225 @@
+import os
+import socket
+import tempfile
+from time import perf_counter
+
+
+class MetricsEmitter(object):
+    """
+    Base class of the metrics emitters given to a reader (`metrics=...`).
+
+    Metrics are aggregated in memory and written out by `flush`, which
+    runs at most once every `flush_interval` seconds (see `tick`) and when
+    the reader is exhausted or raises, so emitting doesn't cost a syscall
+    per row.
+    Subclasses implement `write`.
+
+    Readers emit these metrics:
+
+      - rows_read (counter): rows returned by the reader.
+      - rows_failed (counter, labels `column` and `kind`): invalid rows.
+        `kind` is 'row_length', 'required', 'choices' or 'validator', or
+        the name of the check of `validity_checks` that failed for custom
+        checks ('other' if the errors don't tell it).
+      - transform_errors (counter, label `exception`): rows whose
+        transform raised an exception.
+      - row_seconds (histogram): time spent reading every row.
+      - batch_seconds (histogram): time spent reading every batch (see
+        `CSVModelReader.read_batch`).
+
+    Params:
+      - flush_interval: Optional. Seconds between flushes.
+      - buckets: Optional. Upper bounds of the histogram buckets.
+    """
+    BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05,
+               0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self, flush_interval=10.0, buckets=None):
+        self.flush_interval = flush_interval
+        self.buckets = tuple(sorted(buckets or self.BUCKETS))
+        # Both keyed by (name, labels), labels being a sorted tuple of
+        # (label, value) pairs.
+        self.counters = {}
+        # [count per bucket (+Inf last), sum, count]
+        self.histograms = {}
+        self._last_flush = perf_counter()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [
+                [0] * (len(self.buckets) + 1), 0.0, 0]
+        bucket_counts = histogram[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                bucket_counts[index] += 1
+                break
+        else:
+            bucket_counts[-1] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def tick(self, now=None):
+        """Flushes if `flush_interval` seconds passed since the last flush"""
+        if now is None:
+            now = perf_counter()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = perf_counter()
+        self.write()
+
+    def write(self):
+        raise NotImplementedError()
+
+    def close(self):
+        self.flush()
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class PrometheusFileEmitter(MetricsEmitter):
+    """
+    Writes the metrics to `path` in the Prometheus text exposition format
+    (e.g. for the textfile collector of the node exporter). The file is
+    replaced atomically on every flush and holds the totals since the
+    emitter was created.
+
+    Params:
+      - path: The path of the file.
+      - prefix: Optional. Prefix of the metric names.
+    """
+    def __init__(self, path, prefix='smartcsv_', **kwargs):
+        super(PrometheusFileEmitter, self).__init__(**kwargs)
+        self.path = path
+        self.prefix = prefix
+
+    def _labels(self, labels, extra=()):
+        labels = tuple(labels) + tuple(extra)
+        if not labels:
+            return ''
+        return '{{{0}}}'.format(','.join(
+            '{0}="{1}"'.format(label, str(value).replace('\\', '\\\\')
+                               .replace('"', '\\"').replace('\n', '\\n'))
+            for label, value in labels))
+
+    def render(self):
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            name = '{0}{1}_total'.format(self.prefix, name)
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE {0} counter'.format(name))
+            lines.append('{0}{1} {2}'.format(
+                name, self._labels(labels), _format_value(value)))
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            bucket_counts, total, count = histogram
+            name = self.prefix + name
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE {0} histogram'.format(name))
+            cumulative = 0
+            bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, bucket_counts):
+                cumulative += bucket_count
+                lines.append('{0}_bucket{1} {2}'.format(
+                    name, self._labels(labels, [('le', bound)]), cumulative))
+            lines.append('{0}_sum{1} {2}'.format(
+                name, self._labels(labels), repr(total)))
+            lines.append('{0}_count{1} {2}'.format(
+                name, self._labels(labels), count))
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.render())
+        os.rename(temporary_path, self.path)
+
+
+class StatsdEmitter(MetricsEmitter):
+    """
+    Sends the metrics to a statsd server over UDP. Every flush sends what
+    was aggregated since the previous one, packed in as few datagrams as
+    possible: counters as statsd counters and histograms as the counters
+    `<name>.count`, `<name>.sum` and `<name>.le_<bound>` (one per bucket).
+    Label values are appended to the metric name.
+
+    Params:
+      - host, port: Optional. The address of the statsd server.
+      - prefix: Optional. Prefix of the metric names.
+      - max_datagram_size: Optional. Maximum size of every datagram.
+    """
+    def __init__(self, host='127.0.0.1', port=8125, prefix='smartcsv.',
+                 max_datagram_size=1432, **kwargs):
+        super(StatsdEmitter, self).__init__(**kwargs)
+        self.address = (host, port)
+        self.prefix = prefix
+        self.max_datagram_size = max_datagram_size
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _name(self, name, labels):
+        parts = [self.prefix + name] + [
+            str(value).replace('.', '_').replace(':', '_').replace('|', '_')
+            for _, value in labels]
+        return '.'.join(parts)
+
+    def render(self):
+        """The statsd lines of the metrics aggregated since the last flush"""
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append('{0}:{1}|c'.format(
+                self._name(name, labels), _format_value(value)))
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            bucket_counts, total, count = histogram
+            name = self._name(name, labels)
+            lines.append('{0}.count:{1}|c'.format(name, count))
+            lines.append('{0}.sum:{1}|c'.format(name, repr(total)))
+            bounds = [str(bound).replace('.', '_') for bound in self.buckets]
+            for bound, bucket_count in zip(bounds + ['inf'], bucket_counts):
+                if bucket_count:
+                    lines.append('{0}.le_{1}:{2}|c'.format(
+                        name, bound, bucket_count))
+        return lines
+
+    def _datagrams(self, lines):
+        datagram = []
+        size = 0
+        for line in lines:
+            line_size = len(line) + 1
+            if datagram and size + line_size > self.max_datagram_size:
+                yield '\n'.join(datagram)
+                datagram, size = [], 0
+            datagram.append(line)
+            size += line_size
+        if datagram:
+            yield '\n'.join(datagram)
+
+    def write(self):
+        lines = self.render()
+        self.counters = {}
+        self.histograms = {}
+        for datagram in self._datagrams(lines):
+            try:
+                self._socket.sendto(datagram.encode('utf-8'), self.address)
+            except socket.error:
+                # Metrics are best effort, they never break the reading.
+                pass
+
+    def close(self):
+        super(StatsdEmitter, self).close()
+        self._socket.close()
@@ -0,0 +1,295 @@
+import io
+import multiprocessing
+from collections import deque
+
+from .exceptions import CSVTransformException
+from .reader import CSVModelReader
+from .sampling import next_record_offset
+from .streams import (
+    DEFAULT_SLAB_SIZE, ByteLineStream, MappedLineStream, is_ascii_compatible)
+from .tokenizer import ENGINES
+
+
+# Reader inherited by every worker process (see `_init_worker`).
+_worker_reader = None
+
+
+def _init_worker(reader):
+    global _worker_reader
+    _worker_reader = reader
+
+
+def _evaluate_rows(reader, rows):
+    """
+    Validates and builds the rows. Returns the objects, with None in
+    place of the failed rows, and the `(csv_row, errors, exception)` of
+    every failed row, in order.
+    """
+    objs = []
+    failures = []
+    for csv_row in rows:
+        try:
+            obj, errors = reader._evaluate_row(csv_row)
+        except CSVTransformException as e:
+            failures.append((csv_row, None, e.original_exception))
+            obj = None
+        else:
+            if obj is None:
+                failures.append((csv_row, errors, None))
+        objs.append(obj)
+    return objs, failures
+
+
+def _evaluate_chunk(rows):
+    return _evaluate_rows(_worker_reader, rows)
+
+
+def _range_rows(reader, end):
+    offset_of_line = reader.source.offset_of_line
+    tokenizer = reader.reader
+    is_skippable_row = reader._is_skippable_row
+    while offset_of_line(tokenizer.line_num) < end:
+        try:
+            csv_row = next(tokenizer)
+        except StopIteration:
+            return
+        if not is_skippable_row(csv_row):
+            yield csv_row
+
+
+def _evaluate_range(start, end):
+    """
+    Reads the rows that start between the byte offsets `start` and `end`
+    of the source and evaluates them like `_evaluate_chunk`. The offset
+    where the last row ends is returned too: it's `end` unless `end`
+    isn't where a record starts.
+    """
+    reader = _worker_reader
+    reader._open_range(start)
+    try:
+        objs, failures = _evaluate_rows(reader, _range_rows(reader, end))
+        return objs, failures, reader.offset
+    finally:
+        reader.source.close()
+
+
+def _get_context():
+    # Workers need the column definitions, which usually contain lambdas
+    # that can't be pickled. Forked workers inherit them instead.
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if get_context is None:
+        return multiprocessing
+    try:
+        return get_context('fork')
+    except ValueError:
+        return get_context()
+
+
+class ParallelCSVModelReader(CSVModelReader):
+    def __init__(self, csv_file, workers=None, chunk_size=1000,
+                 range_size=DEFAULT_SLAB_SIZE, **kwargs):
+        """
+        CSVModelReader that validates and builds rows in a pool of
+        worker processes.
+
+        Files (readers created with `from_path`, or given a seekable
+        binary stream) in an ASCII compatible encoding are split in byte
+        ranges of about `range_size` bytes, cut where a record starts
+        (see `smartcsv.sampling.find_record_start`, which tells line
+        breaks inside quoted fields apart). Every worker reads its ranges
+        from the file, tokenizes, validates and builds their rows, and
+        sends back only the objects and the failed rows. A range is only
+        accepted if the previous one ended right where it starts;
+        otherwise it's read again from there.
+
+        Other sources are tokenized by the main process, and their rows
+        are sent to the workers in chunks of `chunk_size` rows.
+
+        Either way the results are yielded in their original order, and
+        failures are accounted for in the main process, so `errors`,
+        `row_counter`, `fail_fast` and `max_failures` behave exactly as in
+        CSVModelReader.
+
+        Params:
+          - workers: Optional. Number of worker processes. Defaults to the
+            number of CPUs. With 1 worker (or less) rows are processed
+            in the main process.
+          - chunk_size: Optional. Number of rows sent to a worker at once
+            when the main process tokenizes them.
+          - range_size: Optional. Approximate size in bytes of the ranges
+            read by the workers.
+
+        Worker processes are forked, so the platform needs to support the
+        `fork` start method, and transformed values need to be picklable.
+        """
+        if kwargs.get('stats'):
+            raise ValueError(
+                "Stats are not supported by ParallelCSVModelReader")
+        if kwargs.get('row_index') is not None:
+            raise ValueError(
+                "Row indexes are not supported by ParallelCSVModelReader")
+        super(ParallelCSVModelReader, self).__init__(csv_file, **kwargs)
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.range_size = range_size
+        self._pool = None
+        self._pending = deque()
+        self._results = deque()
+        self._failures = deque()
+        self._exhausted = False
+        # Byte ranges: where the next row starts, where the next range to
+        # dispatch starts and the end of the file. The workers open
+        # `_range_path` (None to reopen their copy of the source).
+        self._range_offset = self._range_cursor = self._range_end = None
+        self._range_path = None
+
+    def checkpoint(self):
+        # Rows are read ahead, the offset isn't the one of the last row.
+        raise ValueError(
+            "Checkpoints are not supported by ParallelCSVModelReader")
+
+    def _start_pool(self):
+        if self._range_end is None and self._reads_ranges():
+            self._range_offset = self._range_cursor = self.offset
+            self._range_end = self.source.byte_size()
+        self._pool = _get_context().Pool(
+            self.workers, initializer=_init_worker, initargs=(self,))
+
+    def _reads_ranges(self):
+        """Whether the workers can read byte ranges of the source"""
+        source = self.source
+        if (not isinstance(source, ByteLineStream) or
+                not source.random_access or
+                not is_ascii_compatible(source.encoding) or
+                self._key_index is not None):
+            return False
+        if isinstance(source, MappedLineStream):
+            return True
+        try:
+            source.stream.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            # In memory: every worker gets a copy of it
+            return True
+        # A file shares its position with the forked workers, they open
+        # its path instead
+        name = getattr(source.stream, 'name', None)
+        if not isinstance(name, str):
+            return False
+        self._range_path = name
+        return True
+
+    def _open_range(self, start):
+        """Moves the reader of a worker to the byte offset `start`"""
+        if (self._range_path is None or
+                isinstance(self.source, MappedLineStream)):
+            self._reopen(start)
+            return
+        self.source = MappedLineStream(
+            self._range_path, encoding=self.source.encoding, start=start)
+        self.reader = ENGINES[self.engine](
+            self.source, dialect=self.reader.dialect)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._pending.clear()
+        super(ParallelCSVModelReader, self).close()
+
+    def _read_chunk(self):
+        rows = []
+        for csv_row in self.reader:
+            if self._is_skippable_row(csv_row):
+                continue
+            rows.append(csv_row)
+            if len(rows) == self.chunk_size:
+                return rows
+        self._exhausted = True
+        return rows
+
+    def _dispatch(self):
+        # Keep a couple of chunks per worker in flight.
+        while not self._exhausted and len(self._pending) < self.workers * 2:
+            rows = self._read_chunk()
+            if rows:
+                self._pending.append(
+                    self._pool.apply_async(_evaluate_chunk, (rows,)))
+
+    def _next_chunk(self):
+        self._dispatch()
+        if not self._pending:
+            return None
+        results = self._pending.popleft().get()
+        self._dispatch()
+        return results
+
+    def _dispatch_ranges(self):
+        self._range_cursor = max(self._range_cursor, self._range_offset)
+        while (self._range_cursor < self._range_end and
+               len(self._pending) < self.workers * 2):
+            start = self._range_cursor
+            end = start + self.range_size
+            if end < self._range_end:
+                end = next_record_offset(self, end)
+            if end is None or end > self._range_end:
+                end = self._range_end
+            self._pending.append((start, end, self._pool.apply_async(
+                _evaluate_range, (start, end))))
+            self._range_cursor = end
+
+    def _next_range(self):
+        self._dispatch_ranges()
+        while self._pending:
+            start, end, async_result = self._pending.popleft()
+            if end <= self._range_offset:
+                # Already read by the previous range
+                continue
+            if start != self._range_offset:
+                # The previous range ended inside this one (a line break
+                # in a quoted field was taken for the end of a record)
+                async_result = self._pool.apply_async(
+                    _evaluate_range, (self._range_offset, end))
+            objs, failures, self._range_offset = async_result.get()
+            self._dispatch_ranges()
+            return objs, failures
+        return None
+
+    def _fill_results(self):
+        if self._pool is None:
+            self._start_pool()
+        if self._range_end is not None:
+            results = self._next_range()
+        else:
+            results = self._next_chunk()
+        if results is None:
+            self.close()
+            raise StopIteration()
+        objs, failures = results
+        self._results.extend(objs)
+        self._failures.extend(failures)
+
+    def next_value(self):
+        if self.workers <= 1:
+            return super(ParallelCSVModelReader, self).next_value()
+
+        try:
+            if not self._results:
+                self._fill_results()
+
+            obj = self._results.popleft()
+            if obj is None:
+                csv_row, errors, transform_exception = (
+                    self._failures.popleft())
+                if transform_exception is not None:
+                    self._handle_transform_error(
+                        csv_row, transform_exception)
+                else:
+                    self._handle_invalid_row(csv_row, errors)
+                return None
+        except Exception:
+            self.close()
+            raise
+
+        self.row_counter += 1
+        return obj
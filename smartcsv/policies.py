@@ -0,0 +1,78 @@
+import collections
+
+
+class ErrorRatePolicy(object):
+    """
+    Aborts the reading once the rate of invalid rows over the last
+    `window` rows goes above `max_rate`, so broken files (a wrong
+    delimiter, a wrong file) are rejected after a few rows while huge files
+    with sparse errors are read to the end. Pass it to a reader as
+    `abort_policy`; it raises an ErrorRateException with the statistics of
+    the window (see `window_stats`).
+
+    It's only checked when a row fails (reading valid rows costs
+    nothing), and keeps the row numbers of the failures in the window.
+
+    Params:
+      - max_rate: The highest rate of invalid rows allowed, from 0 to 1.
+      - window: Optional. The number of rows the rate is measured over.
+      - min_rows: Optional. The rows that must have been read (in the
+        window) before aborting. By default the whole window.
+    """
+    def __init__(self, max_rate, window=1000, min_rows=None):
+        if not 0 <= max_rate < 1:
+            raise ValueError("The maximum rate must be between 0 and 1")
+        if window < 1:
+            raise ValueError("The window must be positive")
+        if min_rows is None:
+            min_rows = window
+        if not 1 <= min_rows <= window:
+            raise ValueError(
+                "The minimum of rows must be between 1 and the window")
+        self.max_rate = max_rate
+        self.window = window
+        self.min_rows = min_rows
+        self.first_row = 0
+        # Row numbers of the failures in the window
+        self._failures = collections.deque()
+
+    def start(self, row_number):
+        """Starts counting from `row_number` (the next row read)"""
+        self.first_row = row_number
+        self._failures.clear()
+
+    def window_stats(self, row_number):
+        """Statistics of the window that ends at `row_number`"""
+        first_row = max(self.first_row, row_number - self.window + 1)
+        rows = row_number - first_row + 1
+        failures = len(self._failures)
+        return {
+            'first_row': first_row,
+            'last_row': row_number,
+            'rows': rows,
+            'failures': failures,
+            'rate': failures / float(rows),
+            'max_rate': self.max_rate,
+        }
+
+    def failed(self, row_number):
+        """
+        Records that the row `row_number` is invalid. Returns the
+        statistics of the window if the reading must be aborted, or None.
+        """
+        failures = self._failures
+        failures.append(row_number)
+        oldest = row_number - self.window
+        while failures[0] <= oldest:
+            failures.popleft()
+        rows = min(self.window, row_number - self.first_row + 1)
+        if rows < self.min_rows or len(failures) <= self.max_rate * rows:
+            return None
+        return self.window_stats(row_number)
+
+    def checkpoint(self):
+        return {'first_row': self.first_row, 'failures': list(self._failures)}
+
+    def restore(self, state):
+        self.first_row = state['first_row']
+        self._failures = collections.deque(state['failures'])
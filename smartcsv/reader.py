@@ -1,16 +1,41 @@
-import csv
+import operator
+from functools import partial
+from time import perf_counter
 
+from .cache import CachedCallable
+from .checkpoints import CHECKPOINT_VERSION, schema_fingerprint
+from .choices import normalize_choices
+from .compressed import CompressedLineStream, infer_compression
+from .errors import CheckErrors, MemoryErrorStore, RowError
 from .exceptions import *
+from .indexes import KeyIndex, KeyRecorder, RowIndex, layout_fingerprint
+from .records import make_record_class
+from .stats import ReaderStats
+from .streams import (
+    DEFAULT_SLAB_SIZE, ByteLineStream, MappedLineStream, is_binary)
+from .tokenizer import ENGINES
 
 
 class CSVModelReader(object):
 
     DEFAULT_ROW_INVALID_MESSAGE = "Row {0} is invalid."
+    ROW_LENGTH_INVALID_MESSAGE = 'Row length is invalid'
+    REQUIRED_FIELD_MESSAGE = 'Field required and not provided.'
+    INVALID_CHOICE_MESSAGE = 'Invalid choice. Expected {0}. Got {1}'
+    VALIDATION_FAILED_MESSAGE = 'Validation failed'
+    ERROR_RATE_MESSAGE = (
+        '{failures} of the {rows} rows from row {first_row} to {last_row} '
+        'are invalid ({rate:.1%}, the maximum is {max_rate:.1%}).')
+    # Slabs decoded by `read_at`, which usually needs a single row
+    READ_AT_SLAB_SIZE = 8 * 1024
 
     def __init__(self, csv_file, dialect=None, encoding='utf-8',
                  columns=None, fail_fast=True, max_failures=None,
                  strip_white_spaces=True, header_included=True, skip_lines=0,
-                 allow_empty_rows=False):
+                 allow_empty_rows=False, error_store=None, row_type='dict',
+                 projection=False, stats=False, metrics=None,
+                 engine='csv', resume=None, row_index=None, key_index=None,
+                 abort_policy=None):
         """
         Bare minimal CSV parser class that provides:
             * Validation. You can specify different requirements
@@ -23,10 +48,54 @@ class CSVModelReader(object):
             * A clear API to support your code.
 
         Params:
-          - csv_file: a stream (a file or StringIO) to read from.
+          - csv_file: a stream (a file or StringIO) to read from. Binary
+            streams (files opened with 'rb', BytesIO, sockets' files,
+            bytes) are decoded with `encoding` in large slabs (see
+            `smartcsv.streams.ByteLineStream`).
           - dialect: The dialect to interpret the CSV file.
-          - encoding: Optional. Specify if you're not using UTF-8.
+          - encoding: Optional. The encoding of binary streams, if it's
+            not UTF-8. A byte order mark at the start of the stream is
+            skipped and, for Unicode encodings, selects the UTF-8, UTF-16
+            or UTF-32 variant.
           - columns: The description of your models. The format is below.
+          - error_store: Optional. Where the failed rows are kept when
+            `fail_fast` is disabled. By default a MemoryErrorStore; use a
+            `smartcsv.errors.SpillingErrorStore` to move them to disk once
+            they take too much memory.
+          - row_type: Optional. 'dict' (the default) returns every row as a
+            dict. 'record' returns compact, hashable named tuples (see
+            `smartcsv.records.Record`) that can also be accessed by key.
+          - projection: Optional. If True, columns are matched with the
+            header by name: the CSV can have its columns in any order and
+            include columns that are not declared, and only the cells of
+            the declared (not skipped) columns are read.
+          - stats: Optional. If True, the time spent in every phase of the
+            reading and the calls and time of every validator and
+            transform are recorded in `stats`. It makes the reading slower,
+            so it's meant to find out where the time goes.
+          - metrics: Optional. A `smartcsv.metrics.MetricsEmitter` that
+            receives the rows read, the failures and the time spent per
+            row (see the emitter for the list of metrics).
+          - engine: Optional. The tokenizer: 'csv' (the builtin csv reader)
+            or 'fast', which splits lines without quotes with `str.split`
+            and uses the csv reader for the rest (see
+            `smartcsv.tokenizer.FastReader`). Both produce the same rows.
+          - resume: Optional. A token returned by `checkpoint`. The reader
+            starts right after the row where the checkpoint was taken,
+            with its counters and errors. It needs a binary stream (or
+            `from_path`) and the same columns and options.
+          - row_index: Optional. A `smartcsv.indexes.RowIndex` of the
+            offsets of the rows, filled while iterating and used by
+            `seek_row` and `reader[n]`. It needs a binary stream (or
+            `from_path`).
+          - key_index: Optional. A `smartcsv.indexes.KeyIndex` that gets
+            the offset of every row by the value of its key column while
+            the reader is iterated from the start. It needs a binary
+            stream (or `from_path`).
+          - abort_policy: Optional. A `smartcsv.policies.ErrorRatePolicy`
+            that aborts the reading with an ErrorRateException when the
+            rate of invalid rows over a window of rows is too high (when
+            `fail_fast` is disabled).
 
         Columns format:
 
@@ -34,31 +103,185 @@ class CSVModelReader(object):
             {'name': 'column'},  # Required by default
             {'name': 'column', 'required': False},
             {'name': 'column', 'choices': ['value1', 'value2']},
+            {'name': 'column', 'choices': SQLiteChoices('skus.db')},
             {'name': 'column', 'validator': lambda c: c.startswith('http')},
+            {'name': 'column', 'transform': parse_date, 'cache': True},
         ]
+
+        `cache` memoizes the results of the validator and transform of
+        the column. It can be True or the number of values to keep
+        (see `CachedCallable`); hits and misses are in `cache_stats`.
         """
-        self.reader = csv.reader(csv_file, dialect=dialect)
+        if engine not in ENGINES:
+            raise ValueError(
+                "Invalid engine {0}. Expected one of {1}".format(
+                    engine, sorted(ENGINES)))
+        self.engine = engine
+        if resume is not None:
+            csv_file = self._resume_stream(csv_file, resume)
+        elif is_binary(csv_file):
+            csv_file = ByteLineStream(csv_file, encoding=encoding)
+        self.reader = ENGINES[engine](csv_file, dialect=dialect)
+        self.source = csv_file
         self.encoding = encoding
         self.columns = columns
         self.fail_fast = fail_fast
         self.max_failures = max_failures
+        self.abort_policy = abort_policy
         self.failure_count = 0
         self.row_counter = 0
         self.strip_white_spaces = strip_white_spaces
         self.header_included = header_included
         self.skip_lines = skip_lines
         self.allow_empty_rows = allow_empty_rows
-        self.errors = {}
+        self.projection = projection
+        self.error_store = (
+            error_store if error_store is not None else MemoryErrorStore())
 
         self._validate_model_definition(self.columns)
 
         self.model_fields = [c['name'] for c in self.columns]
+        self.output_fields = [
+            c['name'] for c in self.columns if not c.get('skip', False)]
 
-        self._skip_lines()
+        if row_type == 'dict':
+            self._new_row = dict
+            self._finish_row = None
+        elif row_type == 'record':
+            size = len(self.output_fields)
+            self.record_class = make_record_class(self.output_fields)
+            self._new_row = partial(operator.mul, [None], size)
+            self._finish_row = partial(tuple.__new__, self.record_class)
+        else:
+            raise ValueError(
+                "Invalid row_type {0}. Expected 'dict' or 'record'".format(
+                    row_type))
+        self.row_type = row_type
 
-        if header_included:
-            self.csv_header = self._read_header()
-            self._validate_header()
+        self._stats = ReaderStats() if stats else None
+        self._plan = self._compile_columns(self.columns)
+
+        self._row_length = len(self.model_fields)
+        self._cell_indices = list(range(self._row_length))
+        self._select_cells = None
+        self._column_positions = dict(
+            (column[0], position)
+            for position, column in enumerate(self._plan))
+        self._fused = self._uses_default_pipeline() and not stats
+        if stats:
+            # Instead of the method, so there's no cost without stats.
+            self.next_value = self._next_value_with_stats
+
+        self._row_index = row_index
+        if row_index is not None:
+            if not isinstance(self.source, ByteLineStream):
+                raise ValueError(
+                    "Row indexes need a reader created with from_path or "
+                    "given a binary stream")
+            row_index.bind(layout_fingerprint(self))
+            if not row_index.complete:
+                self._next_value_without_row_index = self.next_value
+                self.next_value = self._next_value_with_row_index
+
+        self.metrics = metrics
+        if metrics is not None:
+            self._next_value_without_metrics = self.next_value
+            self.next_value = self._next_value_with_metrics
+
+        if projection and not header_included:
+            raise ValueError("Projection requires a header")
+
+        if resume is None:
+            self._read_preamble()
+        else:
+            self._restore(resume)
+        if abort_policy is not None and (
+                resume is None or resume.get('abort_policy') is None):
+            abort_policy.start(self.row_counter)
+
+        if row_index is not None and self.row_counter >= row_index.next_row:
+            row_index.add(self.row_counter, self.offset)
+
+        self._key_index = key_index
+        self._owns_key_index = False
+        if key_index is not None:
+            if not isinstance(self.source, ByteLineStream):
+                raise ValueError(
+                    "Key indexes need a reader created with from_path or "
+                    "given a binary stream")
+            key_index.bind(layout_fingerprint(self))
+            if not key_index.complete and resume is None:
+                self.reader = KeyRecorder(
+                    self.reader, self.source, key_index,
+                    self._key_position(key_index.column),
+                    self._is_skippable_row, strip_white_spaces)
+
+    @classmethod
+    def from_path(cls, path, mmap=True, slab_size=DEFAULT_SLAB_SIZE,
+                  compression='infer', row_index=None, key_index=None,
+                  **kwargs):
+        """
+        Creates a reader for the file at `path`, read through a
+        `smartcsv.streams.MappedLineStream`: the file is memory-mapped
+        (unless `mmap` is False) and decoded in slabs of about `slab_size`
+        bytes, and the byte offset of the next row is available in
+        `offset`. Files in encodings that aren't ASCII compatible (like
+        UTF-16) are read without mapping them.
+
+        Compressed files ('gzip', 'bz2' or 'xz' `compression`, by default
+        inferred from the extension: .gz, .bz2, .xz) are decompressed on
+        a background thread while the rows are read, without any copy on
+        disk (see `smartcsv.compressed.CompressedLineStream`). Their
+        offsets are positions in the decompressed data.
+
+        `row_index` can be True (or the interval between indexed rows)
+        to keep a `smartcsv.indexes.RowIndex` in a sidecar file next to
+        the CSV: it's built while the reader is iterated and loaded by the
+        next readers of the file, as long as it doesn't change.
+        Likewise, `key_index` can be the name of a key column to keep a
+        `smartcsv.indexes.KeyIndex` of the file in a sidecar database.
+
+        All the other arguments are the ones of the reader. The file is
+        closed once it's read to the end, or by `close` (readers are also
+        context managers). With `resume`, the file is mapped (or seeked)
+        straight to the checkpoint; the data before it of compressed files
+        is decompressed and dropped.
+        """
+        if row_index is not None and not isinstance(row_index, RowIndex):
+            row_index = RowIndex.for_file(
+                path, RowIndex.DEFAULT_INTERVAL if row_index is True
+                else row_index)
+        kwargs['row_index'] = row_index
+        # Indexes opened here are closed with the reader
+        owns_key_index = (key_index is not None and
+                          not isinstance(key_index, KeyIndex))
+        if owns_key_index:
+            key_index = KeyIndex.for_file(path, key_index)
+        kwargs['key_index'] = key_index
+        if compression == 'infer':
+            compression = infer_compression(path)
+        encoding = kwargs.get('encoding', 'utf-8')
+        start = 0
+        resume = kwargs.get('resume')
+        if resume is not None:
+            encoding, start = resume['encoding'], resume['offset']
+        if compression is None:
+            stream = MappedLineStream(
+                path, encoding=encoding, use_mmap=mmap, slab_size=slab_size,
+                start=start)
+        else:
+            stream = CompressedLineStream(
+                path, compression, encoding=encoding, slab_size=slab_size,
+                start=start)
+        try:
+            reader = cls(stream, **kwargs)
+        except Exception:
+            stream.close()
+            if owns_key_index:
+                key_index.close()
+            raise
+        reader._owns_key_index = owns_key_index
+        return reader
 
     def _validate_model_definition(self, columns):
         processed_names = []
@@ -81,6 +304,14 @@ class CSVModelReader(object):
                         "The validator for the column {0} "
                         "is not callable.".format(column_name))
 
+            if 'cache' in column:
+                cache = column['cache']
+                if cache is not True and cache is not False and (
+                        not isinstance(cache, int) or cache < 1):
+                    raise InvalidCSVColumnDefinition(
+                        "The cache for the column {0} must be a boolean "
+                        "or a positive size".format(column_name))
+
             if 'default' in column:
                 default = column['default']
 
@@ -100,6 +331,280 @@ class CSVModelReader(object):
                         "The default value of column {0} "
                         "doesn't validate".format(column_name))
 
+    def _cached_callable(self, function, size):
+        """The validator or transform of a column with `cache`"""
+        return CachedCallable(function, size)
+
+    def _compile_columns(self, columns):
+        """Compiles the column definitions into a per-column plan.
+
+        Every entry is a tuple with the column name and the checks and
+        transformations that column declares (`None` when it doesn't),
+        so rows don't have to look them up in the column dicts cell by cell.
+        Lists and tuples of choices are hashed (see `normalize_choices`).
+        The last item is the key of the value in the row being built: the
+        name for dicts, the position for records.
+        """
+        plan = []
+        output_position = 0
+        self._caches = {}
+        for column in columns:
+            validator = column.get('validator')
+            transform = column.get('transform')
+
+            cache_size = column.get('cache')
+            if cache_size:
+                if cache_size is True:
+                    cache_size = CachedCallable.DEFAULT_SIZE
+                caches = self._caches[column['name']] = {}
+                if validator is not None:
+                    validator = caches['validator'] = self._cached_callable(
+                        validator, cache_size)
+                if transform is not None:
+                    transform = caches['transform'] = self._cached_callable(
+                        transform, cache_size)
+
+            if self._stats is not None:
+                if validator is not None:
+                    validator = self._stats.timed(
+                        column['name'], 'validator', validator)
+                if transform is not None:
+                    transform = self._stats.timed(
+                        column['name'], 'transform', transform)
+
+            skip = column.get('skip', False)
+            if self.row_type == 'record' and not skip:
+                key = output_position
+                output_position += 1
+            else:
+                key = column['name']
+
+            plan.append((
+                column['name'],
+                column.get('required', False),
+                skip,
+                normalize_choices(column.get('choices')),
+                validator,
+                transform,
+                'default' in column,
+                column.get('default'),
+                key,
+            ))
+        return plan
+
+    @property
+    def cache_stats(self):
+        """Hits, misses and evictions of the cached validators and transforms,
+        by column."""
+        return dict(
+            (name, dict((kind, cached.stats)
+                        for kind, cached in caches.items()))
+            for name, caches in self._caches.items())
+
+    @property
+    def stats(self):
+        """
+        None unless the reader was created with `stats=True`. Otherwise a
+        dict with the number of `rows` evaluated, the seconds spent in
+        every phase (`tokenize`, `validate`, `build` and `errors`) and the
+        `calls` and `time` of the validator and transform of every column:
+
+            {'rows': 10, 'phases': {'tokenize': 0.01, ...},
+             'columns': {'price': {'validator': {'calls': 10, 'time': 0.1}}}}
+        """
+        if self._stats is None:
+            return None
+        return self._stats.as_dict()
+
+    @property
+    def offset(self):
+        """
+        Byte offset in the file where the next row (the one after the last
+        row tokenized) starts. Only available for readers created with
+        `from_path` or given a binary stream.
+        """
+        if not isinstance(self.source, ByteLineStream):
+            raise AttributeError(
+                "Offsets are only tracked for paths and binary streams")
+        return self.source.offset_of_line(self.reader.line_num)
+
+    @property
+    def schema_fingerprint(self):
+        return schema_fingerprint(self)
+
+    def checkpoint(self):
+        """
+        Returns a JSON serializable token with the state of the reader
+        after the last row returned: the byte offset of the next row, the
+        counters, the errors (see `ErrorStore.checkpoint`; a spilled
+        `SpillingErrorStore` is referenced by its path) and the schema
+        fingerprint. A reader created with `resume=token` goes on from
+        there without reading what's before.
+
+        Only readers with offsets (created with `from_path` or given a
+        binary stream) can take checkpoints.
+        """
+        if not isinstance(self.source, ByteLineStream):
+            raise ValueError(
+                "Checkpoints need a reader created with from_path or "
+                "given a binary stream")
+        return {
+            'version': CHECKPOINT_VERSION,
+            'offset': self.offset,
+            'encoding': self.source.encoding,
+            'row_counter': self.row_counter,
+            'failure_count': self.failure_count,
+            'csv_header': getattr(self, 'csv_header', None),
+            'errors': self.error_store.checkpoint(),
+            'abort_policy': (self.abort_policy.checkpoint()
+                             if self.abort_policy is not None else None),
+            'schema_fingerprint': self.schema_fingerprint,
+        }
+
+    def _resume_stream(self, csv_file, resume):
+        if resume.get('version') != CHECKPOINT_VERSION:
+            raise ValueError("Unsupported checkpoint version {0}".format(
+                resume.get('version')))
+        if isinstance(csv_file, ByteLineStream):
+            if csv_file.start != resume['offset']:
+                raise ValueError(
+                    "The stream doesn't start at the checkpoint")
+            return csv_file
+        if not is_binary(csv_file):
+            raise ValueError(
+                "Resuming needs a binary stream or a reader created with "
+                "from_path")
+        return ByteLineStream(
+            csv_file, encoding=resume['encoding'], start=resume['offset'])
+
+    def _restore(self, resume):
+        if resume['schema_fingerprint'] != self.schema_fingerprint:
+            raise ValueError(
+                "The checkpoint was taken with different columns or options")
+        if self.header_included:
+            self.csv_header = resume['csv_header']
+            self._validate_header()
+        self.row_counter = resume['row_counter']
+        self.failure_count = resume['failure_count']
+        self.error_store.restore(resume['errors'])
+        if (self.abort_policy is not None and
+                resume.get('abort_policy') is not None):
+            self.abort_policy.restore(resume['abort_policy'])
+
+    def seek_row(self, row_number):
+        """
+        Moves the reader to the row `row_number` (numbered like in
+        `errors`, blank rows aren't counted), which is the next one read.
+        The reader goes to the closest row of its row index and parses the
+        rows from there. `row_counter` is updated; the failures and the
+        errors are left as they are (the window of the `abort_policy`
+        starts over).
+        """
+        row_index = self._row_index
+        if row_index is None:
+            raise ValueError("Seeking rows needs a row index")
+        indexed_row, offset = row_index.locate(row_number)
+        self._reopen(offset)
+        self.row_counter = indexed_row
+        while self.row_counter < row_number:
+            if self.row_counter >= row_index.next_row:
+                row_index.add(self.row_counter, self.offset)
+            try:
+                csv_row = next(self.reader)
+            except StopIteration:
+                row_index.finish(self.row_counter)
+                raise IndexError("Row {0} out of range".format(row_number))
+            if not self._is_skippable_row(csv_row):
+                self.row_counter += 1
+        if self.abort_policy is not None:
+            self.abort_policy.start(self.row_counter)
+
+    def __getitem__(self, row_number):
+        """
+        Returns the row `row_number` (see `seek_row`), validated and
+        built. Raises InvalidCSVException if it's invalid, or the exception
+        of the transform that failed, whatever `fail_fast` is.
+        """
+        self.seek_row(row_number)
+        obj = self._read_single_row(row_number)
+        self.row_counter += 1
+        return obj
+
+    def read_at(self, offset):
+        """
+        Returns the row that starts at `offset` (a value of `offset`, like
+        the ones of a KeyIndex), validated and built like with `reader[n]`.
+        The reader goes on from the next row; counters aren't updated.
+        """
+        self._reopen(offset, self.READ_AT_SLAB_SIZE)
+        return self._read_single_row('at offset {0}'.format(offset))
+
+    def _reopen(self, offset, slab_size=None):
+        """Reads the source from `offset` on"""
+        if not isinstance(self.source, ByteLineStream):
+            raise ValueError(
+                "Only readers created with from_path or given a binary "
+                "stream can be moved")
+        self.source = self.source.reopen(offset, slab_size)
+        self.reader = ENGINES[self.engine](
+            self.source, dialect=self.reader.dialect)
+
+    def _read_single_row(self, row_description):
+        for csv_row in self.reader:
+            if not self._is_skippable_row(csv_row):
+                break
+        else:
+            raise IndexError("Row {0} out of range".format(row_description))
+
+        try:
+            obj, errors = self._evaluate_row(csv_row)
+        except CSVTransformException as e:
+            raise e.original_exception
+        if obj is None:
+            raise InvalidCSVException(
+                self.DEFAULT_ROW_INVALID_MESSAGE.format(row_description),
+                errors)
+        return obj
+
+    def _key_position(self, column_name):
+        if self.header_included:
+            csv_header = self.csv_header
+            if self.strip_white_spaces:
+                csv_header = [value.strip() for value in csv_header]
+            fields = csv_header
+        else:
+            fields = self.model_fields
+        if column_name not in fields:
+            raise ValueError(
+                "The key column {0} is not in the CSV".format(column_name))
+        return fields.index(column_name)
+
+    def close(self):
+        """Closes the file if the reader opened it (see `from_path`) and
+        saves its indexes"""
+        if self._row_index is not None:
+            self._row_index.save()
+        if self._key_index is not None:
+            if self._owns_key_index:
+                self._key_index.close()
+            else:
+                self._key_index.flush()
+        if isinstance(self.source, ByteLineStream):
+            self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_preamble(self):
+        self._skip_lines()
+
+        if self.header_included:
+            self.csv_header = self._read_header()
+            self._validate_header()
+
     def _skip_lines(self):
         for i in range(0, self.skip_lines):
             try:
@@ -119,40 +624,76 @@ class CSVModelReader(object):
         if self.strip_white_spaces:
             csv_header = [val.strip() for val in self.csv_header]
 
-        if csv_header != self.model_fields:
+        if self.projection:
+            self._project_columns(csv_header)
+        elif csv_header != self.model_fields:
             raise InvalidCSVHeaderException(
                 "The header is invalid. Expected {0}. Got {1}".format(
                     self.model_fields, self.csv_header
                 ))
 
+    def _project_columns(self, csv_header):
+        """Maps the declared columns to their position in the header and
+        drops the skipped ones from the plan."""
+        missing = [name for name in self.model_fields
+                   if name not in csv_header]
+        repeated = [name for name in self.model_fields
+                    if csv_header.count(name) > 1]
+        if missing or repeated:
+            raise InvalidCSVHeaderException(
+                "The header is invalid. Expected columns {0}. "
+                "Got {1}".format(self.model_fields, self.csv_header))
+
+        plan = [column for column in self._plan if not column[2]]
+        self._cell_indices = [csv_header.index(column[0]) for column in plan]
+        self._column_positions = dict(
+            (column[0], position)
+            for position, column in zip(self._cell_indices, plan))
+        self._plan = plan
+        self._row_length = len(csv_header)
+        if not self._cell_indices:
+            self._select_cells = lambda csv_row: ()
+        elif len(self._cell_indices) == 1:
+            index = self._cell_indices[0]
+            self._select_cells = lambda csv_row: (csv_row[index],)
+        else:
+            self._select_cells = operator.itemgetter(*self._cell_indices)
+
+    def _cells(self, csv_row):
+        """Values of the row for each column of the plan"""
+        if self._select_cells is None:
+            return csv_row
+        return self._select_cells(csv_row)
+
     def __iter__(self):
         return self
 
     def _is_valid_row_length(self, row):
-        if len(row) != len(self.model_fields):
-            return False, {'row_length': 'Row length is invalid'}
+        if len(row) != self._row_length:
+            return False, self._row_error(
+                'row_length', 'row_length', self.ROW_LENGTH_INVALID_MESSAGE)
         return True, {}
 
     def _is_valid_row_values(self, row):
-        for value, column in zip(row, self.columns):
-            if column.get('required', False) and not value:
-                return False, {
-                    column['name']: 'Field required and not provided.'
-                }
-
-            if value and not column.get('skip', False):
-                if 'choices' in column and value not in column['choices']:
-                    return False, {
-                        column['name']: (
-                            'Invalid choice. '
-                            'Expected {0}. Got {1}'.format(
-                                column['choices'], value))
-                    }
-
-                if 'validator' in column:
-                    validator = column.get('validator')
-                    if not validator(value):
-                        return False, {column['name']: 'Validation failed'}
+        for value, column in zip(self._cells(row), self._plan):
+            name, required, skip, choices, validator = column[:5]
+            if not value:
+                if required:
+                    return False, self._row_error(
+                        'required', name, self.REQUIRED_FIELD_MESSAGE)
+                continue
+
+            if skip:
+                continue
+
+            if choices is not None and value not in choices:
+                return False, self._row_error(
+                    'choices', name, self.INVALID_CHOICE_MESSAGE, value,
+                    choices)
+
+            if validator is not None and not validator(value):
+                return False, self._row_error(
+                    'validator', name, self.VALIDATION_FAILED_MESSAGE, value)
         return True, {}
 
     validity_checks = [_is_valid_row_length, _is_valid_row_values]
@@ -161,6 +702,9 @@ class CSVModelReader(object):
         for validity_check in self.validity_checks:
             valid, row_errors = validity_check(self, row)
             if not valid:
+                if not isinstance(row_errors, RowError):
+                    row_errors = CheckErrors(
+                        row_errors or {}, validity_check.__name__)
                 return False, row_errors
         return True, {}
 
@@ -173,83 +717,372 @@ class CSVModelReader(object):
     def is_empty_row(self, csv_row):
         return not any(csv_row)
 
+    @property
+    def errors(self):
+        return self.error_store.errors
+
+    def _row_error(self, code, column_name, template, value=None,
+                   detail=None):
+        """A RowError of the column (its message is formatted lazily)"""
+        return RowError(code, column_name, template,
+                        self._column_positions.get(column_name), value, detail)
+
     def _add_error(self, csv_row,
                    row_counter, error_description=None):
-        self.errors.setdefault('rows', {})
-        row_error = {
-            'row': csv_row,
-            'errors': {
-            }
-        }
-        if error_description:
-            row_error['errors'].update(error_description)
-        self.errors['rows'][row_counter] = row_error
+        self.error_store.add(row_counter, csv_row, error_description)
+
+    def _transform(self, transform, value):
+        try:
+            return transform(value)
+        except Exception as e:
+            raise CSVTransformException(
+                "Value transformed raised an exception",
+                original_exception=e)
 
     def _build_object(self, csv_row):
-        obj = {}
+        obj = self._new_row()
+        strip = self.strip_white_spaces
 
-        for value, column in zip(csv_row, self.columns):
-            if column.get('skip', False):
+        for value, column in zip(self._cells(csv_row), self._plan):
+            (name, required, skip, choices, validator,
+             transform, has_default, default, key) = column
+            if skip:
                 continue
 
-            column_name = column.get('name')
-
             if value:
-                value = (value.strip() if self.strip_white_spaces else value)
-
-                if 'transform' in column:
-                    try:
-                        value = column['transform'](value)
-                    except Exception as e:
-                        raise CSVTransformException(
-                            "Value transformed raised an exception",
-                            original_exception=e)
-            elif 'default' in column:
-                value = column.get('default')
+                if strip:
+                    value = value.strip()
+                if transform is not None:
+                    value = self._transform(transform, value)
+            elif has_default:
+                value = default
 
-            obj[column_name] = value
+            obj[key] = value
 
+        if self._finish_row is not None:
+            return self._finish_row(obj)
         return obj
 
+    def _uses_default_pipeline(self):
+        cls = type(self)
+        return (
+            cls.validity_checks is CSVModelReader.validity_checks and
+            cls.validate_row is CSVModelReader.validate_row and
+            cls._is_valid_row_length is CSVModelReader._is_valid_row_length and
+            cls._is_valid_row_values is CSVModelReader._is_valid_row_values and
+            cls._build_object is CSVModelReader._build_object and
+            cls.row_has_values is CSVModelReader.row_has_values and
+            cls.is_empty_row is CSVModelReader.is_empty_row
+        )
+
+    def _process_row(self, csv_row):
+        """Validates the row and builds its object in a single pass.
+
+        It's equivalent to `validate_row` followed by `_build_object`:
+        returns a tuple `(obj, errors)` where `obj` is None if the row is
+        invalid. Transformations are only applied once the whole row is
+        known to be valid, so validation errors take precedence over
+        transformation errors just like in the two-step version.
+
+        `AsyncCSVModelReader._evaluate_row_async` (smartcsv/aio.py) has a
+        copy of this loop that awaits the calls; tests check both return
+        the same results.
+        """
+        if len(csv_row) != self._row_length:
+            return None, self._row_error(
+                'row_length', 'row_length', self.ROW_LENGTH_INVALID_MESSAGE)
+
+        obj = self._new_row()
+        pending_transforms = None
+        strip = self.strip_white_spaces
+
+        for value, column in zip(self._cells(csv_row), self._plan):
+            (name, required, skip, choices, validator,
+             transform, has_default, default, key) = column
+            if not value:
+                if required:
+                    return None, self._row_error(
+                        'required', name, self.REQUIRED_FIELD_MESSAGE)
+                if not skip:
+                    obj[key] = default if has_default else value
+                continue
+
+            if skip:
+                continue
+
+            if choices is not None and value not in choices:
+                return None, self._row_error(
+                    'choices', name, self.INVALID_CHOICE_MESSAGE, value,
+                    choices)
+
+            if validator is not None and not validator(value):
+                return None, self._row_error(
+                    'validator', name, self.VALIDATION_FAILED_MESSAGE, value)
+
+            if strip:
+                value = value.strip()
+            if transform is not None:
+                if pending_transforms is None:
+                    pending_transforms = []
+                pending_transforms.append((key, transform))
+            obj[key] = value
+
+        if pending_transforms is not None:
+            for key, transform in pending_transforms:
+                obj[key] = self._transform(transform, obj[key])
+
+        if self._finish_row is not None:
+            return self._finish_row(obj), {}
+        return obj, {}
+
+    def _evaluate_row(self, csv_row):
+        if self._fused:
+            return self._process_row(csv_row)
+
+        valid, errors = self.validate_row(csv_row)
+        if not valid:
+            return None, errors
+        return self._build_object(csv_row), {}
+
+    def _is_skippable_row(self, csv_row):
+        if self.row_has_values(csv_row):
+            return True
+        return self.allow_empty_rows and self.is_empty_row(csv_row)
+
+    def _handle_invalid_row(self, csv_row, errors):
+        self.failure_count += 1
+        if self.metrics is not None:
+            if isinstance(errors, RowError):
+                self.metrics.increment(
+                    'rows_failed', column=errors.column, kind=errors.code)
+            else:
+                # The errors of a custom check: their kind is the check
+                kind = getattr(errors, 'check', 'other')
+                for column_name in errors or {}:
+                    self.metrics.increment(
+                        'rows_failed', column=column_name, kind=kind)
+        if self.fail_fast or self.failure_count == self.max_failures:
+            raise InvalidCSVException(
+                self.DEFAULT_ROW_INVALID_MESSAGE.format(self.row_counter),
+                errors)
+        if self.abort_policy is not None:
+            self._check_error_rate(errors)
+        self._add_error(
+            csv_row, row_counter=self.row_counter,
+            error_description=errors)
+        self.row_counter += 1
+
+    def _check_error_rate(self, errors):
+        """Records the failure of the current row in the abort policy"""
+        window = self.abort_policy.failed(self.row_counter)
+        if window is not None:
+            raise ErrorRateException(
+                self.ERROR_RATE_MESSAGE.format(**window), errors, window)
+
+    def _handle_transform_error(self, csv_row, original_exception):
+        if self.metrics is not None:
+            self.metrics.increment(
+                'transform_errors',
+                exception=type(original_exception).__name__)
+        if self.fail_fast:
+            raise original_exception
+        # The exception isn't kept: its traceback holds the frames
+        errors = RowError('transform', 'transform', repr(original_exception))
+        if self.abort_policy is not None:
+            self._check_error_rate(errors)
+        self._add_error(csv_row, self.row_counter, error_description=errors)
+        self.row_counter += 1
+
     def next_value(self):
         csv_row = next(self.reader)
 
-        if self.row_has_values(csv_row):
+        if self._is_skippable_row(csv_row):
             return None
 
-        if self.allow_empty_rows and self.is_empty_row(csv_row):
+        try:
+            obj, errors = self._evaluate_row(csv_row)
+        except CSVTransformException as e:
+            self._handle_transform_error(csv_row, e.original_exception)
             return None
 
-        valid, errors = self.validate_row(csv_row)
+        if obj is None:
+            self._handle_invalid_row(csv_row, errors)
+            return None
+
+        self.row_counter += 1
+        return obj
+
+    def _next_value_with_stats(self):
+        """`next_value` timing every phase (validation and building are
+        done in two steps so they can be told apart)."""
+        stats = self._stats
+        with stats.timing('tokenize'):
+            csv_row = next(self.reader)
+
+        if self._is_skippable_row(csv_row):
+            return None
+
+        stats.rows += 1
+        with stats.timing('validate'):
+            valid, errors = self.validate_row(csv_row)
 
         if not valid:
-            self.failure_count += 1
-            if self.fail_fast or self.failure_count == self.max_failures:
-                raise InvalidCSVException(
-                    self.DEFAULT_ROW_INVALID_MESSAGE.format(self.row_counter),
-                    errors)
-            else:
-                self._add_error(
-                    csv_row, row_counter=self.row_counter,
-                    error_description=errors)
-                self.row_counter += 1
-                return None
+            with stats.timing('errors'):
+                self._handle_invalid_row(csv_row, errors)
+            return None
 
         try:
-            obj = self._build_object(csv_row)
+            with stats.timing('build'):
+                obj = self._build_object(csv_row)
         except CSVTransformException as e:
-            original_exception = e.original_exception
-            if self.fail_fast:
-                raise original_exception
-            self._add_error(
-                csv_row, self.row_counter,
-                error_description={'transform': repr(original_exception)})
-            self.row_counter += 1
+            with stats.timing('errors'):
+                self._handle_transform_error(csv_row, e.original_exception)
             return None
 
         self.row_counter += 1
         return obj
 
+    def _next_value_with_metrics(self):
+        metrics = self.metrics
+        start = perf_counter()
+        try:
+            obj = self._next_value_without_metrics()
+        except Exception:
+            # Exhausted or aborted (e.g. an InvalidCSVException)
+            metrics.flush()
+            raise
+        end = perf_counter()
+        metrics.observe('row_seconds', end - start)
+        if obj is not None:
+            metrics.increment('rows_read')
+        metrics.tick(end)
+        return obj
+
+    def _next_value_with_row_index(self):
+        row_index = self._row_index
+        if self.row_counter >= row_index.next_row:
+            row_index.add(self.row_counter, self.offset)
+        try:
+            return self._next_value_without_row_index()
+        except StopIteration:
+            row_index.finish(self.row_counter)
+            row_index.save()
+            raise
+
+    def _check_transforms(self, csv_row):
+        """Applies the transformations of the row without keeping their
+        results. Raises CSVTransformException like `_build_object`."""
+        strip = self.strip_white_spaces
+        for value, column in zip(self._cells(csv_row), self._plan):
+            transform = column[5]
+            if transform is not None and value and not column[2]:
+                self._transform(transform, value.strip() if strip else value)
+
+    def validate(self, check_transforms=False):
+        """
+        Reads the rest of the file running only the validity checks,
+        without building any object, and returns a summary dict with the
+        number of rows read (`row_count`), the number of invalid rows
+        (`failure_count`) and the `errors`. If `check_transforms` is True
+        the transformations are applied too (and their failures reported)
+        but their results are discarded.
+
+        `fail_fast` and `max_failures` work as usual.
+        """
+        for csv_row in self.reader:
+            if self._is_skippable_row(csv_row):
+                continue
+
+            valid, errors = self.validate_row(csv_row)
+            if not valid:
+                self._handle_invalid_row(csv_row, errors)
+                continue
+
+            if check_transforms:
+                try:
+                    self._check_transforms(csv_row)
+                except CSVTransformException as e:
+                    self._handle_transform_error(csv_row, e.original_exception)
+                    continue
+
+            self.row_counter += 1
+
+        return {
+            'row_count': self.row_counter,
+            'failure_count': self.failure_count,
+            'errors': self.errors,
+        }
+
+    def sample(self, size=1000, method='auto', stratify_by=None, seed=None,
+               confidence=0.95, examples=10, check_transforms=False):
+        """
+        Validates a random sample of the rest of the rows (like `validate`,
+        without building objects) and returns estimates of the failure
+        rates, to check the quality of a big file quickly:
+
+            {'method': 'offsets', 'population': None, 'sample_size': 1000,
+             'failure_count': 12,
+             'failure_rate': {'estimate': 0.012, 'low': 0.007,
+                              'high': 0.021},
+             'columns': {'price': {'estimate': 0.012, ...}},
+             'errors': {'rows': {<row number or offset>: {...}}}}
+
+        `low` and `high` bound the rate with the given `confidence` (Wilson
+        score intervals). Sampling consumes the reader: iterating it
+        afterwards isn't supported. `fail_fast` and `max_failures` don't
+        apply, and `errors` only keeps the first `examples` invalid rows.
+
+        Params:
+          - size: Optional. Rows in the sample (per stratum if stratified).
+          - method: Optional. 'offsets' seeks to random byte offsets of the
+            file and validates the row after each of them, without reading
+            the rest (readers created with `from_path` or given a seekable
+            binary stream, in an ASCII compatible encoding). Rows after
+            long ones are a bit more likely to be picked. 'reservoir' reads
+            through and keeps a uniform sample, and counts the
+            `population`. 'auto' (the default) uses 'offsets' if possible.
+          - stratify_by: Optional. Column whose values are sampled
+            separately (`size` rows each, read through): the summary gets
+            the results of every value in `strata`, and the overall rates
+            are weighted by their number of rows.
+          - seed: Optional. Seed of the random generator.
+          - confidence: Optional. Confidence level of the intervals.
+          - examples: Optional. Invalid rows kept in `errors`.
+          - check_transforms: Optional. Apply the transformations too, like
+            `validate`.
+        """
+        from .sampling import sample
+        return sample(self, size, method=method, stratify_by=stratify_by,
+                      seed=seed, confidence=confidence, examples=examples,
+                      check_transforms=check_transforms)
+
+    def read_batch(self, size):
+        """
+        Reads up to `size` CSV rows (blank rows included) at once and
+        returns them as a columnar `smartcsv.batch.CSVBatch` (requires
+        NumPy), or None if there are no rows left. Checks are evaluated
+        column by column over the whole batch; failures are reported in
+        `errors` as usual.
+        """
+        from .batch import read_batch
+        if self.metrics is None:
+            return read_batch(self, size)
+
+        start = perf_counter()
+        batch = read_batch(self, size)
+        end = perf_counter()
+        if batch is None:
+            self.metrics.flush()
+        else:
+            self.metrics.observe('batch_seconds', end - start)
+            self.metrics.increment('rows_read', len(batch))
+            self.metrics.tick(end)
+        return batch
+
+    def iter_batches(self, size):
+        from .batch import iter_batches
+        return iter_batches(self, size)
+
     def __next__(self):
         val = None
         while val is None:
@@ -257,3 +1090,15 @@ class CSVModelReader(object):
         return val
 
     next = __next__
+
+
+def validate_file(csv_file, columns, check_transforms=False, fail_fast=False,
+                  **kwargs):
+    """
+    Validates the whole CSV without building any object and returns the
+    summary of `CSVModelReader.validate`. Unlike the reader, it doesn't
+    fail fast by default.
+    """
+    reader = CSVModelReader(
+        csv_file, columns=columns, fail_fast=fail_fast, **kwargs)
+    return reader.validate(check_transforms=check_transforms)
@@ -0,0 +1,94 @@
+from collections import namedtuple
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
+
+class Record(object):
+    """
+    Mixin for the record classes built by `make_record_class`.
+
+    Records are named tuples, so they're as compact as a tuple and their
+    values can be accessed as attributes (`record.title`). They also
+    support mapping-style access by column name (`record['title']`,
+    `keys()`, `items()`, `get()`), even for names that aren't valid
+    identifiers, and compare equal to dicts with the same items.
+    """
+    __slots__ = ()
+
+    _field_index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return tuple.__getitem__(self, key)
+        try:
+            index = self._field_index[key]
+        except KeyError:
+            raise KeyError(key)
+        return tuple.__getitem__(self, index)
+
+    def __contains__(self, key):
+        # Like dicts, records contain their column names (not their values)
+        return key in self._field_index
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self._field_index)
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return list(zip(self._field_index, self))
+
+    def _asdict(self):
+        return dict(zip(self._field_index, self))
+
+    def __eq__(self, other):
+        if isinstance(other, Mapping):
+            return self._asdict() == dict(other.items())
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__, ', '.join(
+            '{0}={1!r}'.format(name, value) for name, value in self.items()))
+
+    def __reduce__(self):
+        return _make_record, (tuple(self._field_index), tuple(self))
+
+
+_record_classes = {}
+
+
+def make_record_class(field_names):
+    """
+    Returns the record class for the given column names. Classes are
+    built once and shared by every schema with the same columns.
+    """
+    field_names = tuple(field_names)
+    if field_names not in _record_classes:
+        # Names that aren't valid attributes are renamed to _<index> in
+        # the tuple, but they're still available by key.
+        base = namedtuple('Record', field_names, rename=True)
+        _record_classes[field_names] = type('Record', (Record, base), {
+            '__slots__': (),
+            '_field_index': dict(
+                (field, index) for index, field in enumerate(field_names)),
+        })
+    return _record_classes[field_names]
+
+
+def _make_record(field_names, values):
+    return tuple.__new__(make_record_class(field_names), values)
@@ -0,0 +1,386 @@
+"""
+Sampling mode of the readers (see `CSVModelReader.sample`): validates a
+random sample of the rows and estimates the failure rates.
+"""
+import csv
+import itertools
+import math
+import random
+from statistics import NormalDist
+
+from .errors import RowError
+from .exceptions import CSVTransformException
+from .streams import _split_lines, is_ascii_compatible
+
+# Bytes read after every random offset to find the next record (the
+# window grows while it has fewer than WINDOW_LINES lines)
+WINDOW_SIZE = 4 * 1024
+WINDOW_LINES = 32
+# Rows parsed after a candidate record boundary to tell if it's right
+PROBE_ROWS = 4
+
+
+def z_score(confidence):
+    return NormalDist().inv_cdf((1 + confidence) / 2.0)
+
+
+def wilson_interval(failures, total, confidence=0.95):
+    """Wilson score interval of a proportion, as `(low, high)`"""
+    if not total:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = failures / float(total)
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(
+        p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def estimate(failures, total, confidence=0.95):
+    low, high = wilson_interval(failures, total, confidence)
+    return {
+        'estimate': failures / float(total) if total else 0.0,
+        'low': low,
+        'high': high,
+    }
+
+
+def stratified_estimate(strata, confidence=0.95):
+    """
+    Estimate of the failure rate of the whole population from
+    `(population, sampled, failures)` tuples per stratum, with a normal
+    approximation interval.
+    """
+    population = sum(stratum[0] for stratum in strata)
+    if not population:
+        return estimate(0, 0, confidence)
+    rate = variance = 0.0
+    for stratum_population, sampled, failures in strata:
+        if not sampled:
+            continue
+        weight = stratum_population / float(population)
+        stratum_rate = failures / float(sampled)
+        rate += weight * stratum_rate
+        variance += weight * weight * stratum_rate * (
+            1 - stratum_rate) / sampled
+    margin = z_score(confidence) * math.sqrt(variance)
+    return {
+        'estimate': rate,
+        'low': max(0.0, rate - margin),
+        'high': min(1.0, rate + margin),
+    }
+
+
+def reservoir_sample(items, size, rng):
+    """
+    Uniform sample of `size` items of the iterable (Algorithm L: the
+    items between the sampled ones are skipped by islice, without any
+    Python code per item).
+    """
+    items = iter(items)
+    reservoir = list(itertools.islice(items, size))
+    if len(reservoir) < size or not size:
+        return reservoir
+    w = math.exp(math.log(rng.random()) / size)
+    while True:
+        skip = int(math.log(rng.random()) / math.log(1 - w))
+        for item in itertools.islice(items, skip, skip + 1):
+            break
+        else:
+            return reservoir
+        reservoir[rng.randrange(size)] = item
+        w *= math.exp(math.log(rng.random()) / size)
+
+
+def _has_stray_quote(text, dialect):
+    """
+    Whether the quote characters of the text aren't where a CSV writer
+    puts them (at the start and the end of fields). The csv module takes
+    those as part of the values, which makes text that starts in the
+    middle of a quoted field look like valid rows.
+    """
+    quotechar, delimiter = dialect.quotechar, dialect.delimiter
+    escapechar = dialect.escapechar
+    field_start, quoted = True, False
+    index, length = 0, len(text)
+    while index < length:
+        char = text[index]
+        if escapechar and char == escapechar:
+            field_start = False
+            index += 2
+            continue
+        if quoted:
+            if char == quotechar:
+                following = text[index + 1:index + 2]
+                if following == quotechar and dialect.doublequote:
+                    index += 2
+                    continue
+                if following not in (delimiter, '\r', '\n', ''):
+                    return True
+                quoted = False
+        elif char == quotechar:
+            if not field_start:
+                return True
+            quoted, field_start = True, False
+        elif char == delimiter or char in '\r\n':
+            field_start = True
+        elif not (field_start and char == ' ' and dialect.skipinitialspace):
+            field_start = False
+        index += 1
+    return False
+
+
+def _score(lines, dialect, row_length):
+    """Number of well formed rows of the expected length parsed from the
+    lines before anything doesn't look right"""
+    parser = csv.reader(lines, dialect, strict=True)
+    score = line_num = 0
+    try:
+        for csv_row in itertools.islice(parser, PROBE_ROWS):
+            text = ''.join(lines[line_num:parser.line_num])
+            line_num = parser.line_num
+            if (len(csv_row) != row_length or
+                    _has_stray_quote(text, dialect)):
+                break
+            score += 1
+    except csv.Error:
+        pass
+    return score
+
+
+def find_record_start(text, dialect, row_length):
+    """
+    Index of the line of `text` (a slice of a CSV that starts right
+    after a line break) where the first whole record starts.
+
+    The line break may be inside a quoted field. Both cases are tried:
+    records start at the first line, or the first line is the end of a
+    quoted field (and records start after the record it ends). The one
+    whose next rows look right is chosen.
+    """
+    lines = _split_lines(text)
+    quotechar = dialect.quotechar
+    if (not quotechar or dialect.quoting == csv.QUOTE_NONE or
+            quotechar not in text):
+        return 0
+
+    outside = _score(lines, dialect, row_length)
+    if outside == PROBE_ROWS:
+        return 0
+    parser = csv.reader(
+        itertools.chain([quotechar + lines[0]], lines[1:]), dialect)
+    try:
+        next(parser)
+    except (csv.Error, StopIteration):
+        return 0
+    start = parser.line_num
+    if _has_stray_quote(quotechar + ''.join(lines[:start]), dialect):
+        return 0
+    inside = _score(lines[start:], dialect, row_length)
+    return start if inside > outside else 0
+
+
+def _evaluate(reader, csv_row, check_transforms):
+    valid, errors = reader.validate_row(csv_row)
+    if valid and check_transforms:
+        try:
+            reader._check_transforms(csv_row)
+        except CSVTransformException as e:
+            return RowError(
+                'transform', 'transform', repr(e.original_exception))
+    return None if valid else errors
+
+
+class _Summary(object):
+    def __init__(self, confidence, examples):
+        self.confidence = confidence
+        self.examples = examples
+        self.sampled = 0
+        self.failures = 0
+        self.column_failures = {}
+        self.errors = {}
+
+    def add(self, key, csv_row, errors):
+        self.sampled += 1
+        if errors is None:
+            return
+        self.failures += 1
+        for column_name in errors:
+            self.column_failures[column_name] = (
+                self.column_failures.get(column_name, 0) + 1)
+        rows = self.errors.setdefault('rows', {})
+        if len(rows) < self.examples:
+            rows[key] = {'row': csv_row, 'errors': dict(errors)}
+
+    def as_dict(self, method, population):
+        return {
+            'method': method,
+            'population': population,
+            'sample_size': self.sampled,
+            'failure_count': self.failures,
+            'failure_rate': estimate(
+                self.failures, self.sampled, self.confidence),
+            'columns': dict(
+                (column_name, estimate(failures, self.sampled,
+                                       self.confidence))
+                for column_name, failures in self.column_failures.items()),
+            'errors': self.errors,
+        }
+
+
+def can_sample_offsets(reader):
+    source = reader.source
+    return bool(getattr(source, 'random_access', False) and
+                is_ascii_compatible(source.encoding))
+
+
+def _first_row(reader, offset):
+    reader._reopen(offset, reader.READ_AT_SLAB_SIZE)
+    for csv_row in reader.reader:
+        if not reader._is_skippable_row(csv_row):
+            return csv_row
+    return None
+
+
+def next_record_offset(reader, offset):
+    """
+    Byte offset of the first record that starts after the line break
+    that follows `offset` (see `find_record_start`), or None if there's
+    no line break after it. The reader needs random access to its source.
+    """
+    window_size = WINDOW_SIZE
+    window = reader.source.read_bytes(offset, window_size)
+    while (window.count(b'\n') < WINDOW_LINES and
+           len(window) == window_size):
+        window_size *= 2
+        window = reader.source.read_bytes(offset, window_size)
+    first = window.find(b'\n') + 1
+    if not first:
+        return None
+    last = window.rfind(b'\n') + 1
+    encoding = reader.source.encoding
+    lines = _split_lines(window[first:last].decode(encoding))
+    record = find_record_start(
+        ''.join(lines), reader.reader.dialect, reader._row_length)
+    return offset + first + len(''.join(lines[:record]).encode(encoding))
+
+
+def sample_offsets(reader, size, rng, summary, check_transforms):
+    """
+    Validates the rows that start after `size` random offsets of the rest
+    of the file (offsets in the last row wrap around to the first one).
+    Long rows make the next row more likely to be picked: the sample is
+    only uniform if the rows have similar lengths. Examples are keyed by
+    offset.
+    """
+    start, end = reader.offset, reader.source.byte_size()
+    if end <= start:
+        return None
+    for offset in sorted(rng.randrange(start, end) for _ in range(size)):
+        record_offset = next_record_offset(reader, offset)
+        csv_row = None
+        if record_offset is not None:
+            csv_row = _first_row(reader, record_offset)
+        if csv_row is None:
+            record_offset = start
+            csv_row = _first_row(reader, start)
+            if csv_row is None:
+                break
+        summary.add(
+            record_offset, csv_row,
+            _evaluate(reader, csv_row, check_transforms))
+    return None
+
+
+def _numbered_rows(reader, counter):
+    rows = itertools.filterfalse(reader._is_skippable_row, reader.reader)
+    return zip(counter, rows)
+
+
+def sample_reservoir(reader, size, rng, summary, check_transforms):
+    """Validates a uniform sample of the rest of the rows, read through.
+    Returns the number of rows read."""
+    counter = itertools.count(reader.row_counter)
+    rows = reservoir_sample(_numbered_rows(reader, counter), size, rng)
+    population = next(counter) - 1 - reader.row_counter
+    for row_number, csv_row in sorted(rows, key=lambda item: item[0]):
+        summary.add(
+            row_number, csv_row, _evaluate(reader, csv_row, check_transforms))
+    return population
+
+
+def sample_strata(reader, size, rng, column_name, confidence, examples,
+                  check_transforms):
+    """Validates up to `size` random rows of every value of the column"""
+    position = reader._key_position(column_name)
+    strata = {}
+    for row_number, csv_row in _numbered_rows(
+            reader, itertools.count(reader.row_counter)):
+        value = csv_row[position] if position < len(csv_row) else None
+        stratum = strata.get(value)
+        if stratum is None:
+            stratum = strata[value] = [0, []]
+        stratum[0] += 1
+        if len(stratum[1]) < size:
+            stratum[1].append((row_number, csv_row))
+        else:
+            index = rng.randrange(stratum[0])
+            if index < size:
+                stratum[1][index] = (row_number, csv_row)
+
+    overall = _Summary(confidence, examples)
+    summaries = {}
+    for value, (population, rows) in strata.items():
+        summary = summaries[value] = _Summary(confidence, examples)
+        for row_number, csv_row in sorted(rows, key=lambda item: item[0]):
+            errors = _evaluate(reader, csv_row, check_transforms)
+            summary.add(row_number, csv_row, errors)
+            overall.add(row_number, csv_row, errors)
+
+    result = overall.as_dict('stratified', sum(
+        population for population, _ in strata.values()))
+    result['failure_rate'] = stratified_estimate([
+        (strata[value][0], summary.sampled, summary.failures)
+        for value, summary in summaries.items()], confidence)
+    result['columns'] = dict(
+        (name, stratified_estimate([
+            (strata[value][0], summary.sampled,
+             summary.column_failures.get(name, 0))
+            for value, summary in summaries.items()], confidence))
+        for name in overall.column_failures)
+    result['strata'] = dict(
+        (value, summary.as_dict('reservoir', strata[value][0]))
+        for value, summary in summaries.items())
+    return result
+
+
+def sample(reader, size=1000, method='auto', stratify_by=None, seed=None,
+           confidence=0.95, examples=10, check_transforms=False):
+    """See `CSVModelReader.sample`"""
+    if method not in ('auto', 'offsets', 'reservoir'):
+        raise ValueError("Invalid sampling method {0}".format(method))
+    if size < 1:
+        raise ValueError("The sample size must be positive")
+    rng = random.Random(seed)
+    if stratify_by is not None:
+        if method == 'offsets':
+            raise ValueError("Stratified samples are read through")
+        return sample_strata(reader, size, rng, stratify_by, confidence,
+                             examples, check_transforms)
+
+    if method == 'auto':
+        method = 'offsets' if can_sample_offsets(reader) else 'reservoir'
+    elif method == 'offsets' and not can_sample_offsets(reader):
+        raise ValueError(
+            "Offset sampling needs a file or a seekable binary stream in an "
+            "ASCII compatible encoding")
+
+    summary = _Summary(confidence, examples)
+    if method == 'offsets':
+        population = sample_offsets(
+            reader, size, rng, summary, check_transforms)
+    else:
+        population = sample_reservoir(
+            reader, size, rng, summary, check_transforms)
+    return summary.as_dict(method, population)
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+PHASES = ('tokenize', 'validate', 'build', 'errors')
+
+
+class TimedCallable(object):
+    """
+    Counts the calls to a column validator or transform and the time
+    spent in them (failed calls included).
+    """
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+        self.time = 0.0
+
+    def __call__(self, value):
+        start = perf_counter()
+        try:
+            return self.function(value)
+        finally:
+            self.time += perf_counter() - start
+            self.calls += 1
+
+    @property
+    def stats(self):
+        return {'calls': self.calls, 'time': self.time}
+
+
+class ReaderStats(object):
+    """
+    Timing statistics of a reader created with `stats=True`: the time
+    spent in every phase of the reading (see PHASES) and the calls and time
+    of every validator and transform, by column.
+    """
+    def __init__(self):
+        self.rows = 0
+        self.phases = dict((phase, 0.0) for phase in PHASES)
+        self.callables = {}
+
+    def timed(self, column_name, kind, function):
+        """Returns `function` wrapped in a TimedCallable"""
+        timed = self.callables.setdefault(column_name, {})[kind] = (
+            TimedCallable(function))
+        return timed
+
+    @contextmanager
+    def timing(self, phase):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] += perf_counter() - start
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'phases': dict(self.phases),
+            'columns': dict(
+                (name, dict((kind, timed.stats)
+                            for kind, timed in callables.items()))
+                for name, callables in self.callables.items()),
+        }
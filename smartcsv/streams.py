@@ -0,0 +1,378 @@
+import codecs
+import collections
+import io
+import itertools
+import mmap
+import os
+import re
+import sys
+from functools import partial
+
+DEFAULT_SLAB_SIZE = 1024 * 1024
+
+# Characters that `str.splitlines` treats as line boundaries but a file
+# opened with `newline=''` (what the csv module expects) doesn't. The
+# first ones are the ASCII ones.
+_EXTRA_LINE_BOUNDARIES = u'\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+_ASCII_EXTRA_LINE_BOUNDARIES = _EXTRA_LINE_BOUNDARIES[:5]
+_LINES = re.compile(u'[^\r\n]*(?:\r\n?|\n)|[^\r\n]+$')
+
+# The UTF-32 LE BOM starts with the UTF-16 LE one, so it goes first.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+_NATIVE = 'le' if sys.byteorder == 'little' else 'be'
+# Encodings that a BOM can override, and what they are without a BOM.
+_UNICODE_ENCODINGS = {
+    'utf-8': 'utf-8',
+    'utf-8-sig': 'utf-8',
+    'utf-16': 'utf-16-' + _NATIVE,
+    'utf-16-le': 'utf-16-le',
+    'utf-16-be': 'utf-16-be',
+    'utf-32': 'utf-32-' + _NATIVE,
+    'utf-32-le': 'utf-32-le',
+    'utf-32-be': 'utf-32-be',
+}
+
+
+def _split_lines(text):
+    """Splits the text like a file opened with `newline=''`: at '\\n',
+    '\\r\\n' and '\\r', keeping them"""
+    boundaries = (_ASCII_EXTRA_LINE_BOUNDARIES if text.isascii()
+                  else _EXTRA_LINE_BOUNDARIES)
+    for boundary in boundaries:
+        if boundary in text:
+            return _LINES.findall(text)
+    return text.splitlines(True)
+
+
+def sniff_encoding(head, encoding):
+    """
+    Returns the encoding of data declared as `encoding` that starts with
+    the bytes `head`, and the size of its byte order mark. If the declared
+    encoding is a Unicode one, a BOM selects the UTF-8, UTF-16 or UTF-32
+    variant. The encoding returned never expects a BOM (e.g. 'utf-16-le'
+    instead of 'utf-16').
+    """
+    encoding = codecs.lookup(encoding).name
+    if encoding not in _UNICODE_ENCODINGS:
+        return encoding, 0
+    for bom, bom_encoding in _BOMS:
+        if head.startswith(bom):
+            return bom_encoding, len(bom)
+    return _UNICODE_ENCODINGS[encoding], 0
+
+
+def is_ascii_compatible(encoding):
+    """Whether the encoding can be cut at '\\n' bytes"""
+    return u'\n,"'.encode(encoding) == b'\n,"'
+
+
+def is_binary(source):
+    """Whether a reader has to decode the source (see ByteLineStream)"""
+    if isinstance(source, (io.RawIOBase, io.BufferedIOBase, mmap.mmap,
+                           bytes, bytearray, memoryview)):
+        return True
+    mode = getattr(source, 'mode', None)
+    return isinstance(mode, str) and 'b' in mode
+
+
+class ByteLineStream(object):
+    """
+    Lines of a binary stream, decoded in large slabs. Readers use it for
+    the binary streams they're given.
+
+    The stream is read in chunks of `slab_size` bytes. With encodings that
+    are ASCII compatible (like UTF-8 or Latin-1) every chunk is cut at its
+    last '\\n' byte and decoded at once; other encodings (like UTF-16) go
+    through an incremental decoder. A byte order mark at the start of the
+    stream is skipped and, if the declared encoding is a Unicode one,
+    selects the UTF-8, UTF-16 or UTF-32 variant. Lines are then iterated
+    without any Python code per line.
+
+    The byte offset of any line of the current slab is available through
+    `offset_of_line` (line numbers are the ones of `csv.reader.line_num`);
+    it's computed only when asked, cheaply if the slab is ASCII. The
+    offsets of the last LOOKBEHIND lines of the previous slabs are kept
+    too, for tokenizers that read lines ahead.
+
+    Params:
+      - stream: A binary file object (anything with a `read` method that
+        returns bytes), a bytes-like object or an iterable of bytes.
+      - encoding: Optional. The encoding of the stream.
+      - slab_size: Optional. Approximate size of the decoded slabs.
+      - start: Optional. Byte offset where the reading starts (see
+        `CSVModelReader.checkpoint`). The stream is seeked there if it's
+        seekable, otherwise the bytes before it are read and dropped.
+        There's no BOM sniffing, so the encoding has to be the one the
+        stream was sniffed as.
+    """
+    LOOKBEHIND = 1024
+
+    def __init__(self, stream, encoding='utf-8',
+                 slab_size=DEFAULT_SLAB_SIZE, start=0):
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            stream = io.BytesIO(stream)
+        self.stream = stream
+        self.declared_encoding = encoding
+        # Known once the start of the stream is read
+        self.encoding = codecs.lookup(encoding).name
+        self.slab_size = slab_size
+        self.start = start
+
+        # The slab being iterated: its lines, the line number and byte
+        # offset of its first line, its end offset and (lazily) the offsets
+        # of its lines.
+        self._lines = []
+        self._first_line = 0
+        self._start = start
+        self._end = start
+        self._offsets = None
+        # Offsets of the lines right before the current slab
+        self._previous_offsets = collections.deque(maxlen=self.LOOKBEHIND)
+        self._iterator = itertools.chain.from_iterable(self._slabs())
+
+    def __iter__(self):
+        return self._iterator
+
+    def _chunks(self):
+        read = getattr(self.stream, 'read', None)
+        if read is None:
+            return (bytes(chunk) for chunk in self.stream if chunk)
+        return iter(partial(read, self.slab_size), b'')
+
+    def _chunks_from(self, start):
+        seekable = getattr(self.stream, 'seekable', None)
+        if seekable is not None and seekable():
+            self.stream.seek(start)
+            return self._chunks()
+
+        chunks = self._chunks()
+        skipped = 0
+        for chunk in chunks:
+            skipped += len(chunk)
+            if skipped > start:
+                return itertools.chain([chunk[start - skipped:]], chunks)
+        return iter(())
+
+    def _decoded_slabs(self):
+        """Yields `(start, end, text)` for every slab of the stream"""
+        if self.start:
+            self.encoding = sniff_encoding(b'', self.declared_encoding)[0]
+            return self._slabs_from(self._chunks_from(self.start), self.start)
+
+        chunks = self._chunks()
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= 4:
+                break
+        self.encoding, start = sniff_encoding(head, self.declared_encoding)
+        return self._slabs_from(
+            itertools.chain([head[start:]], chunks), start)
+
+    def _slabs_from(self, chunks, start):
+        if is_ascii_compatible(self.encoding):
+            return self._cut_slabs(chunks, start)
+        return self._incremental_slabs(chunks, start)
+
+    def _cut_slabs(self, chunks, start):
+        pending = b''
+        for chunk in chunks:
+            data = pending + chunk
+            newline = data.rfind(b'\n')
+            if newline == -1:
+                pending = data
+                continue
+            pending = data[newline + 1:]
+            end = start + newline + 1
+            yield start, end, data[:newline + 1].decode(self.encoding)
+            start = end
+        if pending:
+            yield start, start + len(pending), pending.decode(self.encoding)
+
+    def _incremental_slabs(self, chunks, start):
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        pending = u''
+        fed = start
+        for chunk in chunks:
+            fed += len(chunk)
+            text = pending + decoder.decode(chunk)
+            newline = text.rfind(u'\n')
+            if newline == -1:
+                pending = text
+                continue
+            pending = text[newline + 1:]
+            # The slab ends before the bytes the decoder keeps and the ones
+            # of the text left for the next slab.
+            end = fed - len(decoder.getstate()[0]) - len(
+                pending.encode(self.encoding))
+            yield start, end, text[:newline + 1]
+            start = end
+        text = pending + decoder.decode(b'', True)
+        if text:
+            yield start, fed, text
+
+    def _slabs(self):
+        slabs = self._decoded_slabs()
+        try:
+            for start, end, text in slabs:
+                self._keep_previous_offsets()
+                self._first_line += len(self._lines)
+                self._lines = _split_lines(text)
+                self._start, self._end = start, end
+                self._offsets = None
+                yield self._lines
+        finally:
+            slabs.close()
+            self.close()
+
+    def _line_sizes(self, lines):
+        if self._end - self._start == sum(map(len, self._lines)):
+            # ASCII: one byte per character
+            return map(len, lines)
+        return (len(line.encode(self.encoding)) for line in lines)
+
+    def _keep_previous_offsets(self):
+        """Keeps the offsets of the last lines of the current slab before
+        moving to the next one"""
+        lines = self._lines[-self.LOOKBEHIND:]
+        if not lines:
+            return
+        sizes = list(self._line_sizes(lines))
+        self._previous_offsets.extend(
+            itertools.accumulate(sizes[:-1], initial=self._end - sum(sizes)))
+
+    def offset_of_line(self, line_number):
+        """Byte offset where the given line (counted from 0) starts. Only
+        the lines of the current slab (and the one right after it) and the
+        last LOOKBEHIND lines before it can be asked for."""
+        index = line_number - self._first_line
+        if index == len(self._lines):
+            return self._end
+        if index < 0 and -index <= len(self._previous_offsets):
+            return self._previous_offsets[index]
+        if not 0 <= index < len(self._lines):
+            raise ValueError(
+                "Line {0} is not in the current slab".format(line_number))
+        if self._offsets is None:
+            self._offsets = list(itertools.accumulate(
+                self._line_sizes(self._lines), initial=self._start))
+        return self._offsets[index]
+
+    @property
+    def random_access(self):
+        """Whether the stream is seekable (see `read_bytes`)"""
+        seekable = getattr(self.stream, 'seekable', None)
+        return seekable is not None and seekable()
+
+    def byte_size(self):
+        """Size in bytes of the whole stream"""
+        return self.stream.seek(0, io.SEEK_END)
+
+    def read_bytes(self, start, size):
+        """Reads `size` bytes at `start` (it moves the stream)"""
+        self.stream.seek(start)
+        return self.stream.read(size)
+
+    def reopen(self, start, slab_size=None):
+        """A new line stream of the same data, starting at `start` (with
+        slabs of `slab_size`, by default the same)"""
+        if not self.random_access:
+            raise ValueError("The stream is not seekable")
+        return ByteLineStream(
+            self.stream, encoding=self.encoding,
+            slab_size=slab_size or self.slab_size, start=start)
+
+    def close(self):
+        """The stream belongs to the caller, it's left open"""
+
+
+class MappedLineStream(ByteLineStream):
+    """
+    Lines of a file read in large slabs, for `CSVModelReader.from_path`.
+
+    With ASCII compatible encodings the file is memory-mapped (unless
+    `use_mmap` is False) and every slab (about `slab_size` bytes, always
+    ending at a line boundary) is decoded straight from the mapped pages.
+    Otherwise it's read like any binary stream (see ByteLineStream). The
+    file is closed once it's read to the end.
+
+    Params:
+      - path: The path of the file.
+      - encoding: Optional. The encoding of the file.
+      - use_mmap: Optional. Whether to memory-map the file.
+      - slab_size: Optional. Approximate size of the decoded slabs.
+      - start: Optional. Byte offset where the reading starts.
+    """
+    def __init__(self, path, encoding='utf-8', use_mmap=True,
+                 slab_size=DEFAULT_SLAB_SIZE, start=0):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = None
+        self.size = 0
+        try:
+            head = self._file.read(4)
+            self.use_mmap = use_mmap and is_ascii_compatible(
+                sniff_encoding(head, encoding)[0])
+            self._file.seek(0, 2)
+            self.size = self._file.tell()
+            self._file.seek(0)
+            if self.use_mmap and self.size:
+                self._map = mmap.mmap(
+                    self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        super(MappedLineStream, self).__init__(
+            self._file, encoding=encoding, slab_size=slab_size, start=start)
+
+    def _decoded_slabs(self):
+        if not self.use_mmap:
+            return super(MappedLineStream, self)._decoded_slabs()
+        return self._mapped_slabs()
+
+    def _mapped_slabs(self):
+        data, size, start = self._map, self.size, self.start
+        if not start:
+            self.encoding, start = sniff_encoding(
+                data[:4] if size else b'', self.declared_encoding)
+        else:
+            self.encoding = sniff_encoding(b'', self.declared_encoding)[0]
+        while start < size:
+            end = min(start + self.slab_size, size)
+            if end < size:
+                newline = data.rfind(b'\n', start, end)
+                if newline == -1:
+                    newline = data.find(b'\n', end)
+                end = size if newline == -1 else newline + 1
+            with memoryview(data) as view:
+                text = str(view[start:end], self.encoding)
+            yield start, end, text
+            start = end
+
+    random_access = True
+
+    def byte_size(self):
+        return os.path.getsize(self.path)
+
+    def read_bytes(self, start, size):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(size)
+
+    def reopen(self, start, slab_size=None):
+        self.close()
+        return MappedLineStream(
+            self.path, encoding=self.encoding, use_mmap=self.use_mmap,
+            slab_size=slab_size or self.slab_size, start=start)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
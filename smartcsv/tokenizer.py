@@ -0,0 +1,145 @@
+import csv
+import itertools
+import operator
+
+
+class _Splitter(object):
+    """Produces the rows of a FastReader, chunk by chunk"""
+    # Besides the special characters of the dialect, these are the line
+    # boundaries of `str.splitlines` that aren't line boundaries for csv.
+    EXTRA_LINE_BOUNDARIES = (
+        '\x0b', '\x0c', '\x1c', '\x1d', '\x1e', '\x85', '\u2028', '\u2029')
+
+    def __init__(self, lines, dialect, chunk_size):
+        self.lines = lines
+        self.dialect = dialect
+        self.chunk_size = chunk_size
+        # Lines read up to the end of the current chunk, and the iterator
+        # of the rows of the current chunk (None if it's parsed by csv).
+        self.line_count = 0
+        self.rows = None
+        self.unread = []
+
+        specials = ['\0']
+        if dialect.quotechar is not None:
+            specials.append(dialect.quotechar)
+        if dialect.escapechar is not None:
+            specials.append(dialect.escapechar)
+        if dialect.skipinitialspace:
+            specials.append(' ')
+        self.specials = tuple(specials) + self.EXTRA_LINE_BOUNDARIES
+
+    @property
+    def line_num(self):
+        if self.rows is not None:
+            return self.line_count - operator.length_hint(self.rows)
+        return self.line_count
+
+    def is_simple(self, text, chunk):
+        for special in self.specials:
+            if special in text:
+                return False
+        if '\r' in text and text.count('\r') != text.count('\r\n'):
+            return False
+        limit = csv.field_size_limit()
+        return len(text) <= limit or max(map(len, chunk)) <= limit
+
+    def chunks(self):
+        delimiter = self.dialect.delimiter
+        while True:
+            chunk = self.unread + list(
+                itertools.islice(self.lines, self.chunk_size))
+            self.unread = []
+            if not chunk:
+                return
+
+            text = ''.join(chunk)
+            if self.is_simple(text, chunk):
+                bodies = text.splitlines()
+                if '' in bodies:
+                    rows = [body.split(delimiter) if body else []
+                            for body in bodies]
+                else:
+                    rows = [body.split(delimiter) for body in bodies]
+                self.rows = iter(rows)
+                self.line_count += len(chunk)
+                yield self.rows
+            else:
+                self.rows = None
+                yield self.parse(chunk)
+
+    def parse(self, chunk):
+        """Parses the chunk with a csv reader, which keeps reading from
+        the source if the last record of the chunk spans more lines."""
+        chunk_lines = iter(chunk)
+        parser = csv.reader(
+            itertools.chain(chunk_lines, self.lines), self.dialect)
+        start = self.line_count
+        try:
+            for row in parser:
+                self.line_count = start + parser.line_num
+                yield row
+                if parser.line_num >= len(chunk):
+                    return
+        except csv.Error:
+            # Like with csv.reader, reading can go on after an error.
+            self.line_count = start + parser.line_num
+            self.unread = list(chunk_lines)
+            raise
+
+
+class FastReader(itertools.chain):
+    """
+    Drop-in replacement of `csv.reader` (used with `engine='fast'`) that
+    splits simple lines with `str.split` and only hands the others to a
+    `csv.reader`.
+
+    Lines are taken in chunks of CHUNK_SIZE. If no line of the chunk
+    contains the quote character, the escape character, NULs, carriage
+    returns (other than the ones of '\\r\\n' terminators) or spaces (when
+    the dialect skips initial spaces), the whole chunk is split at once.
+    Otherwise the chunk is parsed by a csv reader, which keeps reading
+    lines from the source if its last record has multi-line fields.
+
+    Rows are exactly the ones `csv.reader` would produce, and they're
+    iterated at the speed of a builtin iterator (the reader is an
+    itertools.chain of the chunks). Dialects that convert unquoted values
+    (like QUOTE_NONNUMERIC) are always read by the csv reader.
+
+    The source is read ahead a chunk at a time, so it can't be an
+    iterator that's temporarily exhausted.
+    """
+    CHUNK_SIZE = 64
+    SPLITTABLE_QUOTING = (csv.QUOTE_MINIMAL, csv.QUOTE_ALL, csv.QUOTE_NONE)
+
+    def __new__(cls, lines, dialect='excel', **fmtparams):
+        lines = iter(lines)
+        parser = csv.reader(lines, dialect, **fmtparams)
+        splitter = None
+        if parser.dialect.quoting in cls.SPLITTABLE_QUOTING:
+            splitter = _Splitter(lines, parser.dialect, cls.CHUNK_SIZE)
+            chunks = splitter.chunks()
+        else:
+            chunks = [parser]
+
+        self = super(FastReader, cls).from_iterable(chunks)
+        self.dialect = parser.dialect
+        self._parser = parser
+        self._splitter = splitter
+        return self
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @property
+    def line_num(self):
+        """Lines read from the source, like `csv.reader.line_num`"""
+        if self._splitter is None:
+            return self._parser.line_num
+        return self._splitter.line_num
+
+
+ENGINES = {
+    'csv': csv.reader,
+    'fast': FastReader,
+}
@@ -1,3 +1,7 @@
+import io
+import os
+import shutil
+import tempfile
 import unittest
 
 
@@ -9,4 +13,25 @@ class BaseSmartCSVTestCase(unittest.TestCase):
     def assertRowError(self, errors, data_row, index, error_type):
         error_row = errors['rows'][index]
         self.assertEqual(error_row['row'], data_row.split(','))
-        self.assertTrue(error_type in error_row['errors'], error_row['errors'])
\ No newline at end of file
+        self.assertTrue(error_type in error_row['errors'], error_row['errors'])
+
+
+class TemporaryDirectoryTestCase(BaseSmartCSVTestCase):
+    """Test cases that write their files to a temporary directory"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Cleanups run last in, first out: the readers a test closes with
+        # `addCleanup` are closed before the directory is removed
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, data):
+        """Writes the text (as UTF-8) or bytes to the file `name` of the
+        directory and returns its path"""
+        path = os.path.join(self.directory, name)
+        if isinstance(data, bytes):
+            with open(path, 'wb') as f:
+                f.write(data)
+        else:
+            with io.open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(data)
+        return path
@@ -91,3 +91,44 @@ COLUMNS_WITH_VALUE_TRANSFORMATIONS = [
         'transform': lambda x: x.lower() == 'yes'
     },
 ]
+
+# Rows of numbered products for make_products_csv (columns of COLUMNS_1)
+PRODUCTS_HEADER = 'title,category,subcategory,currency,price,url,image_url\n'
+VALID_PRODUCT_ROW = (
+    'iPhone {0},Phones,Smartphones,USD,399,http://apple.com/iphone,\n')
+MULTILINE_PRODUCT_ROW = ('"iPhone\n{0}",Phones,Smartphones,USD,399,'
+                         'http://apple.com/iphone,\n')
+INVALID_PRODUCT_ROW = (
+    'Camera {0},Cameras,,USD,no price,http://example.com/camera,\n')
+
+
+def product_kinds(rows, invalid_every=7, blank_lines=True):
+    """
+    The kinds of `rows` rows for make_products_csv: rows 3,
+    3 + invalid_every... are invalid and, with `blank_lines`, there's a
+    blank line after rows 5, 15, 25...
+    """
+    kinds = []
+    for index in range(rows):
+        kinds.append('x' if index % invalid_every == 3 else '.')
+        if blank_lines and index % 10 == 5:
+            kinds.append('_')
+    return ''.join(kinds)
+
+
+def make_products_csv(kinds, valid_row=VALID_PRODUCT_ROW,
+                      invalid_row=INVALID_PRODUCT_ROW):
+    """
+    A CSV with a line per character of `kinds`: '.' is a valid row, 'x'
+    an invalid one and '_' a blank line. Rows are formatted with their
+    number (blank lines aren't counted).
+    """
+    lines = [PRODUCTS_HEADER]
+    index = 0
+    for kind in kinds:
+        if kind == '_':
+            lines.append('\n')
+            continue
+        lines.append((valid_row if kind == '.' else invalid_row).format(index))
+        index += 1
+    return ''.join(lines)
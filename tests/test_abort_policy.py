@@ -0,0 +1,121 @@
+import io
+from decimal import Decimal
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1, make_products_csv
+
+import smartcsv
+from smartcsv.exceptions import ErrorRateException, InvalidCSVException
+from smartcsv.policies import ErrorRatePolicy
+
+
+class ErrorRatePolicyTestCase(BaseSmartCSVTestCase):
+    def reader(self, kinds, policy, **kwargs):
+        """A reader of a CSV with the kinds of rows of make_products_csv"""
+        return smartcsv.reader(
+            io.StringIO(make_products_csv(kinds)), columns=COLUMNS_1,
+            fail_fast=False, abort_policy=policy, **kwargs)
+
+    def test_broken_files_are_aborted_early(self):
+        """Should abort once enough rows were read and most are invalid"""
+        policy = ErrorRatePolicy(0.5, window=100, min_rows=20)
+        reader = self.reader('x' * 1000, policy)
+
+        try:
+            list(reader)
+        except ErrorRateException as e:
+            exception = e
+        else:
+            self.fail('The file is broken')
+        self.assertTrue(isinstance(exception, InvalidCSVException))
+        self.assertEqual(exception.window, {
+            'first_row': 0, 'last_row': 19, 'rows': 20, 'failures': 20,
+            'rate': 1.0, 'max_rate': 0.5})
+        self.assertEqual(
+            exception.message, '20 of the 20 rows from row 0 to 19 are '
+                               'invalid (100.0%, the maximum is 50.0%).')
+        self.assertTrue('price' in exception.errors)
+        self.assertEqual(reader.failure_count, 20)
+        self.assertEqual(len(reader.errors['rows']), 19)
+
+    def test_sparse_errors_are_tolerated(self):
+        """Should read files whose errors are below the rate to the end"""
+        policy = ErrorRatePolicy(0.2, window=100)
+        reader = self.reader('.........x' * 500, policy)
+        self.assertEqual(len(list(reader)), 4500)
+        self.assertEqual(reader.failure_count, 500)
+
+    def test_rate_is_measured_over_the_window(self):
+        """Should only count the failures of the last rows"""
+        policy = ErrorRatePolicy(0.5, window=100)
+        reader = self.reader('x' * 40 + '.' * 960 + 'x' * 100, policy)
+        self.assertRaises(ErrorRateException, list, reader)
+        self.assertEqual(policy.window_stats(1050), {
+            'first_row': 951, 'last_row': 1050, 'rows': 100, 'failures': 51,
+            'rate': 0.51, 'max_rate': 0.5})
+        self.assertEqual(reader.failure_count, 40 + 51)
+
+    def test_whole_window_by_default(self):
+        """Should wait for a whole window of rows by default"""
+        reader = self.reader('x' * 1000, ErrorRatePolicy(0.5, window=100))
+        self.assertRaises(ErrorRateException, list, reader)
+        self.assertEqual(reader.failure_count, 100)
+
+    def test_transform_errors_are_failures(self):
+        """Should abort files whose rows can't be transformed"""
+        data = 'title,price\n' + 'iPhone,no price\n' * 10000
+        columns = [{'name': 'title'}, {'name': 'price', 'transform': Decimal}]
+        reader = smartcsv.reader(
+            io.StringIO(data), columns=columns, fail_fast=False,
+            abort_policy=ErrorRatePolicy(0.5, window=100))
+        try:
+            list(reader)
+        except ErrorRateException as e:
+            self.assertEqual(e.window['failures'], 100)
+            self.assertEqual(list(e.errors), ['transform'])
+        else:
+            self.fail('No row can be transformed')
+        self.assertEqual(len(reader.errors['rows']), 99)
+
+    def test_fail_fast_comes_first(self):
+        """Should raise on the first invalid row if failing fast"""
+        reader = smartcsv.reader(
+            io.StringIO(make_products_csv('x' * 100)), columns=COLUMNS_1,
+            abort_policy=ErrorRatePolicy(0.5, window=10, min_rows=1))
+        try:
+            next(reader)
+        except InvalidCSVException as e:
+            self.assertFalse(isinstance(e, ErrorRateException))
+        else:
+            self.fail('The row is invalid')
+
+    def test_invalid_policies(self):
+        """Should only take rates from 0 to 1 and sensible windows"""
+        self.assertRaises(ValueError, ErrorRatePolicy, 1)
+        self.assertRaises(ValueError, ErrorRatePolicy, -0.1)
+        self.assertRaises(ValueError, ErrorRatePolicy, 0.5, window=0)
+        self.assertRaises(ValueError, ErrorRatePolicy, 0.5, window=10,
+                          min_rows=11)
+
+    def test_checkpoints_keep_the_window(self):
+        """Should resume with the failures of the window"""
+        data = make_products_csv('.' * 100 + 'x' * 100).encode('utf-8')
+        reader = smartcsv.reader(
+            io.BytesIO(data), columns=COLUMNS_1, fail_fast=False,
+            abort_policy=ErrorRatePolicy(0.5, window=100))
+        for _ in range(100):
+            next(reader)
+        # The next row has 40 failures before it
+        for _ in range(40):
+            try:
+                reader.next_value()
+            except StopIteration:
+                self.fail('The file is not over')
+        token = reader.checkpoint()
+        self.assertEqual(len(token['abort_policy']['failures']), 40)
+
+        resumed = smartcsv.reader(
+            io.BytesIO(data), columns=COLUMNS_1, fail_fast=False,
+            abort_policy=ErrorRatePolicy(0.5, window=100), resume=token)
+        self.assertRaises(ErrorRateException, list, resumed)
+        self.assertEqual(resumed.failure_count, 51)
@@ -0,0 +1,212 @@
+import asyncio
+import io
+import random
+import subprocess
+import sys
+
+from .base import BaseSmartCSVTestCase
+from .config import (
+    COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS, is_number)
+from .test_csv_failures import ROW0, ROW1, ROW2, ROW3, ROW4
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+
+CSV_DATA = (
+    u'GENERATED FILE\n'
+    u'\n'
+    u'title,description,price\n'
+    u'iPhone 5c blue,"Blue, plastic\nand colorful",699\n'
+    u'iPad mini,The \xedpad,599\n'
+    u'iPod,,abc\n'
+    u'Apple TV,"TV ""box""",99\n'
+)
+
+# Columns and rows with every kind of failure, read by both readers
+PARITY_FIXTURES = [
+    (COLUMNS_1, '\n'.join([
+        'title,category,subcategory,currency,price,url,image_url',
+        ROW0, ROW1, ROW2, ROW3, ROW4,
+        '  iPad air  ,Tablets,,ARS,799,http://apple.com/ipad,'])),
+    (COLUMNS_WITH_VALUE_TRANSFORMATIONS, '\n'.join([
+        'title,currency,price,in_stock',
+        'iPhone,USD,699,yes', 'iPad,USD,,no', 'iPod,ARS,12,maybe',
+        'iMac,JPY,1e999999999,', 'Mac,USD,abc,no', 'TV,XXX,1,yes'])),
+    ([{'name': 'title', 'required': True},
+      {'name': 'category', 'default': 'Other', 'skip': True},
+      {'name': 'price', 'default': '0', 'transform': int},
+      {'name': 'url', 'validator': lambda url: url.startswith('http')}],
+     '\n'.join(['title,category,price,url',
+                 'iPhone,,699,http://apple.com',
+                 'iPad,Tablets,,',
+                 'iPod,,1.5,http://apple.com',
+                 'iMac,,1.5,apple.com',
+                 ',,1,http://apple.com'])),
+]
+
+
+async def chunks(data, size):
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start:start + size]
+
+
+def collect(reader):
+    async def consume():
+        return [obj async for obj in reader]
+    return asyncio.run(consume())
+
+
+class AsyncCSVModelReaderTestCase(BaseSmartCSVTestCase):
+    def columns(self, validator=is_number, transform=None):
+        price = {'name': 'price', 'required': True, 'validator': validator}
+        if transform is not None:
+            price['transform'] = transform
+        return [
+            {'name': 'title', 'required': True},
+            {'name': 'description', 'required': False},
+            price,
+        ]
+
+    def test_reads_byte_chunks(self):
+        """Should parse byte chunks split anywhere, multi-byte characters and quoted lines included"""
+        data = CSV_DATA.encode('utf-8')
+        for size in (1, 3, 7, 1024):
+            reader = smartcsv.AsyncCSVModelReader(
+                chunks(data, size), columns=self.columns(), skip_lines=2,
+                fail_fast=False)
+            objs = collect(reader)
+
+            self.assertEqual([obj['title'] for obj in objs],
+                             ['iPhone 5c blue', 'iPad mini', 'Apple TV'])
+            self.assertEqual(objs[0]['description'],
+                             'Blue, plastic\nand colorful')
+            self.assertEqual(objs[1]['description'], u'The \xedpad')
+            self.assertEqual(objs[2]['description'], 'TV "box"')
+            self.assertEqual(list(reader.errors['rows'].keys()), [2])
+
+    def test_byte_order_marks(self):
+        """Should skip the BOM of byte streams and use its encoding"""
+        for bom, encoding in ((b'\xef\xbb\xbf', 'utf-8'),
+                              (b'\xff\xfe', 'utf-16-le')):
+            data = bom + CSV_DATA.encode(encoding)
+            for size in (1, 1024):
+                reader = smartcsv.AsyncCSVModelReader(
+                    chunks(data, size), columns=self.columns(),
+                    skip_lines=2, fail_fast=False)
+                self.assertEqual([obj['title'] for obj in collect(reader)],
+                                 ['iPhone 5c blue', 'iPad mini', 'Apple TV'])
+
+        data = b'\xef\xbb\xbftitle\nab'
+        reader = smartcsv.AsyncCSVModelReader(
+            chunks(data, 1024), columns=[{'name': 'title'}])
+        self.assertEqual(collect(reader), [{'title': 'ab'}])
+
+    def test_reads_from_stream_reader(self):
+        """Should read from objects with a read coroutine"""
+        async def consume():
+            stream = asyncio.StreamReader()
+            stream.feed_data(CSV_DATA.encode('utf-8'))
+            stream.feed_eof()
+            reader = smartcsv.AsyncCSVModelReader(
+                stream, columns=self.columns(), skip_lines=2,
+                fail_fast=False, chunk_size=5)
+            return [obj['price'] async for obj in reader]
+
+        self.assertEqual(asyncio.run(consume()), ['699', '599', '99'])
+
+    def test_async_validators_and_transforms_keep_the_order(self):
+        """Should await validators and transforms and return objects in order"""
+        running = {'current': 0, 'max': 0}
+
+        async def validator(value):
+            running['current'] += 1
+            running['max'] = max(running['max'], running['current'])
+            await asyncio.sleep(random.random() / 100)
+            running['current'] -= 1
+            return is_number(value)
+
+        async def transform(value):
+            await asyncio.sleep(random.random() / 100)
+            return int(value)
+
+        rows = ['title,description,price']
+        rows.extend('item {0},,{0}'.format(i) for i in range(50))
+        reader = smartcsv.AsyncCSVModelReader(
+            chunks('\n'.join(rows), 100),
+            columns=self.columns(validator, transform), concurrency=4)
+
+        self.assertEqual([obj['price'] for obj in collect(reader)],
+                         list(range(50)))
+        self.assertEqual(running['max'], 4)
+
+    def test_cached_coroutine_functions(self):
+        """Should cache the awaited results of coroutine functions"""
+        calls = []
+
+        async def transform(value):
+            calls.append(value)
+            await asyncio.sleep(0)
+            return int(value)
+
+        async def validator(value):
+            calls.append(value)
+            return value != 'y'
+
+        data = 'a,b\n1,x\n1,x\nabc,x\nabc,x\n1,y\n1,y\n'
+        reader = smartcsv.AsyncCSVModelReader(
+            chunks(data, 1024), fail_fast=False, concurrency=1, columns=[
+                {'name': 'a', 'transform': transform, 'cache': True},
+                {'name': 'b', 'validator': validator, 'cache': True},
+            ])
+        self.assertEqual(collect(reader), [{'a': 1, 'b': 'x'}] * 2)
+        self.assertEqual(sorted(calls), ['1', 'abc', 'x', 'y'])
+        self.assertEqual(sorted(reader.errors['rows']), [2, 3, 4, 5])
+        self.assertEqual(reader.cache_stats['a']['transform']['hits'], 2)
+
+    def test_fail_fast(self):
+        """Should raise on the first invalid row"""
+        reader = smartcsv.AsyncCSVModelReader(
+            chunks(CSV_DATA, 10), columns=self.columns(), skip_lines=2)
+
+        async def consume():
+            titles = []
+            try:
+                async for obj in reader:
+                    titles.append(obj['title'])
+            except InvalidCSVException as e:
+                return titles, e.errors
+
+        titles, errors = asyncio.run(consume())
+        self.assertEqual(titles, ['iPhone 5c blue', 'iPad mini'])
+        self.assertTrue('price' in errors)
+
+    def test_invalid_header(self):
+        """Should validate the header before the first row"""
+        reader = smartcsv.AsyncCSVModelReader(
+            chunks(CSV_DATA, 10), columns=COLUMNS_1, skip_lines=2)
+        self.assertRaises(smartcsv.exceptions.InvalidCSVHeaderException,
+                          lambda: collect(reader))
+
+    def test_imported_when_used(self):
+        """Should not import asyncio until the async reader is used"""
+        script = ("import sys, smartcsv; print('asyncio' in sys.modules); "
+                  "smartcsv.AsyncCSVModelReader; "
+                  "print('asyncio' in sys.modules)")
+        output = subprocess.check_output([sys.executable, '-c', script])
+        self.assertEqual(output.split(), [b'False', b'True'])
+
+    def test_same_results_as_the_sync_reader(self):
+        """Should validate and build rows like CSVModelReader._process_row"""
+        for columns, data in PARITY_FIXTURES:
+            for options in ({}, {'strip_white_spaces': False},
+                            {'row_type': 'record'}):
+                expected = smartcsv.reader(
+                    io.StringIO(data), columns=columns, fail_fast=False,
+                    **options)
+                reader = smartcsv.AsyncCSVModelReader(
+                    chunks(data, 7), columns=columns, fail_fast=False,
+                    **options)
+                self.assertTrue(expected._fused and reader._fused)
+                self.assertEqual(collect(reader), list(expected))
+                self.assertEqual(reader.errors, expected.errors)
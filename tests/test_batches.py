@@ -0,0 +1,172 @@
+import time
+import unittest
+
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+from smartcsv.batch import _choices_mask
+from smartcsv.choices import HashedChoices
+from smartcsv.reader import CSVModelReader
+
+
+CSV_DATA = """
+title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Smartphones,USD,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPhone 5c green,,Smartphones,USD,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPhone 5c red,Phones,Smartphones,INVALID,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPhone 5c white,Phones,Smartphones,USD,699,apple.com/iphone,http://apple.com/iphone.jpg
+  iPad mini  ,Tablets,,USD,699,http://apple.com/iphone,
+
+iPad air,Tablets,Apple,ARS,799,http://apple.com/ipad,http://apple.com/ipad.jpg
+"""
+
+TRANSFORM_CSV_DATA = """
+title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,,no
+iPod,ARS,12,maybe
+Mac,JPY,1999,
+"""
+
+
+class TwoStepReader(CSVModelReader):
+    validity_checks = list(CSVModelReader.validity_checks)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class ReadBatchTestCase(BaseSmartCSVTestCase):
+    def test_batch_returns_valid_rows_by_column(self):
+        """Should return the valid rows as columns"""
+        reader = smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        batch = reader.read_batch(100)
+
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(list(batch['title']), ['iPad mini', 'iPad air'])
+        self.assertEqual(list(batch['subcategory']), ['', 'Apple'])
+        self.assertEqual(list(batch.row_numbers), [4, 5])
+        self.assertEqual(list(batch.failed),
+                         [True, True, True, True, False, False])
+        self.assertEqual(list(batch.failed_rows), [0, 1, 2, 3])
+        self.assertTrue(reader.read_batch(100) is None)
+
+    def test_batch_errors_are_the_same_as_the_row_path(self):
+        """Should report exactly the same errors as iterating row by row"""
+        rows_reader = smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        objs = list(rows_reader)
+
+        reader = smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        batches = list(reader.iter_batches(2))
+
+        self.assertEqual(len(batches), 4)
+        self.assertEqual(reader.errors, rows_reader.errors)
+        self.assertEqual(reader.row_counter, rows_reader.row_counter)
+        self.assertEqual(
+            [title for batch in batches for title in batch['title']],
+            [obj['title'] for obj in objs])
+
+    def test_batch_applies_transforms_and_defaults(self):
+        """Should transform values and report transformation errors"""
+        columns = [dict(c) for c in COLUMNS_WITH_VALUE_TRANSFORMATIONS]
+        columns[3] = dict(columns[3], default='no')
+        del columns[3]['choices']
+
+        def in_stock(value):
+            if value not in ('yes', 'no'):
+                raise ValueError(value)
+            return value == 'yes'
+        columns[3]['transform'] = in_stock
+
+        rows_reader = smartcsv.reader(
+            StringIO(TRANSFORM_CSV_DATA), columns=columns, fail_fast=False)
+        objs = list(rows_reader)
+
+        reader = smartcsv.reader(
+            StringIO(TRANSFORM_CSV_DATA), columns=columns, fail_fast=False)
+        batch = reader.read_batch(10)
+
+        self.assertEqual(list(batch['title']), ['iPhone', 'Mac'])
+        self.assertEqual(list(batch['in_stock']), [True, 'no'])
+        self.assertEqual([obj['price'] for obj in objs],
+                         list(batch['price']))
+        self.assertEqual(reader.errors, rows_reader.errors)
+        self.assertTrue('transform' in reader.errors['rows'][2]['errors'])
+
+    def test_batch_fails_fast(self):
+        """Should raise on the first invalid row with fail_fast enabled"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1)
+        self.assertRaises(InvalidCSVException, lambda: reader.read_batch(10))
+        self.assertEqual(reader.row_counter, 0)
+
+    def test_batch_honors_max_failures(self):
+        """Should raise when max_failures is reached"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False, max_failures=3)
+        self.assertRaises(InvalidCSVException, lambda: reader.read_batch(10))
+        self.assertEqual(sorted(reader.errors['rows'].keys()), [0, 1])
+
+    def test_batch_with_custom_validity_checks(self):
+        """Should fall back to the row path with custom validity checks"""
+        reader = TwoStepReader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        batch = reader.read_batch(100)
+        self.assertEqual(list(batch['title']), ['iPad mini', 'iPad air'])
+        self.assertEqual(len(reader.errors['rows']), 4)
+
+    def test_batch_of_records_row_by_row(self):
+        """Should build the columns of records on the row path"""
+        reader = smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False,
+            row_type='record', stats=True)
+        batch = reader.read_batch(100)
+        self.assertEqual(list(batch['title']), ['iPad mini', 'iPad air'])
+        self.assertEqual(list(batch['subcategory']), ['', 'Apple'])
+        self.assertEqual(len(reader.errors['rows']), 4)
+
+    def test_batch_without_valid_rows_row_by_row(self):
+        """Should return every column even if no row is valid"""
+        reader = TwoStepReader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        batch = reader.read_batch(4)
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(len(batch['title']), 0)
+
+    def test_batch_with_many_choices(self):
+        """Should check big sets of choices by hashing the values"""
+        skus = ['SKU-{0}'.format(index) for index in range(200000)]
+        data = 'sku\n' + ''.join(
+            'SKU-{0}\n'.format(index * 37) for index in range(5000)) + (
+            'SKU-X\n')
+        reader = smartcsv.reader(
+            StringIO(data), columns=[{'name': 'sku', 'choices': skus}],
+            fail_fast=False)
+
+        start = time.time()
+        batch = reader.read_batch(10000)
+        self.assertTrue(time.time() - start < 2)
+        self.assertEqual(len(batch), 5000)
+        self.assertEqual(list(reader.errors['rows']), [5000])
+
+    def test_choices_mask(self):
+        """Should check hashed choices, sets and lists alike"""
+        values = np.array(['USD', 'EUR', 'ARS', ''], dtype=object)
+        expected = [True, False, True, False]
+        for choices in (['USD', 'ARS'], ('USD', 'ARS'),
+                        HashedChoices(['USD', 'ARS']), {'USD', 'ARS'}):
+            self.assertEqual(
+                list(_choices_mask(values, choices)), expected, choices)
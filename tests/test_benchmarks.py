@@ -0,0 +1,79 @@
+from .base import BaseSmartCSVTestCase, TemporaryDirectoryTestCase
+
+import smartcsv
+from benchmarks import datasets, memory, throughput
+
+
+class BenchmarkDatasetsTestCase(TemporaryDirectoryTestCase):
+    def read(self, schema, error_rate):
+        path = datasets.generate(
+            schema, 200, error_rate, directory=self.directory)
+        with open(path, newline='') as f:
+            reader = smartcsv.reader(
+                f, columns=datasets.SCHEMAS[schema][0], fail_fast=False)
+            objs = list(reader)
+        return objs, reader.errors
+
+    def test_datasets_are_valid(self):
+        """Should generate valid datasets for every schema"""
+        for schema in datasets.SCHEMAS:
+            objs, errors = self.read(schema, 0.0)
+            self.assertEqual(len(objs), 200, schema)
+            self.assertEqual(errors, {}, schema)
+
+    def test_datasets_with_errors(self):
+        """Should break roughly the requested fraction of rows"""
+        for schema in datasets.SCHEMAS:
+            objs, errors = self.read(schema, 0.25)
+            self.assertEqual(len(objs) + len(errors['rows']), 200, schema)
+            self.assertTrue(20 < len(errors['rows']) < 80, schema)
+
+    def test_datasets_are_reused(self):
+        """Should generate every dataset once"""
+        path = datasets.generate('narrow', 10, directory=self.directory)
+        with open(path, 'a') as f:
+            f.write('marker')
+        path = datasets.generate('narrow', 10, directory=self.directory)
+        with open(path) as f:
+            self.assertTrue(f.read().endswith('marker'))
+
+
+class BenchmarkRegressionsTestCase(BaseSmartCSVTestCase):
+    def result(self, overhead):
+        return {'smartcsv': {'overhead': overhead}}
+
+    def test_find_regressions(self):
+        """Should flag the benchmarks slower than the baseline"""
+        baseline = {'a': self.result(2.0), 'b': self.result(2.0)}
+        results = {
+            'a': self.result(2.1),
+            'b': self.result(2.5),
+            'c': self.result(9.0),
+        }
+        self.assertEqual(throughput.find_regressions(results, baseline),
+                         [('b', 2.0, 2.5)])
+
+
+class MemoryBenchmarksTestCase(TemporaryDirectoryTestCase):
+    def test_measure(self):
+        """Should measure every phase of the reading"""
+        path = datasets.generate(
+            'narrow', 500, 0.2, directory=self.directory)
+        results = memory.measure('narrow', path)
+        self.assertEqual(sorted(results), [
+            'build_retained_per_row', 'collect_peak_per_row',
+            'collect_retained_per_row', 'errors_retained_per_failure',
+            'parse_retained_per_row', 'validate_peak'])
+        self.assertTrue(results['build_retained_per_row'] > 0)
+        self.assertTrue(results['errors_retained_per_failure'] > 0)
+
+        records = memory.measure('narrow', path, {'row_type': 'record'})
+        self.assertTrue(records['build_retained_per_row'] <
+                        results['build_retained_per_row'])
+
+    def test_find_regressions(self):
+        """Should flag the measures that grew over the baseline"""
+        baseline = {'a': {'parse': 100, 'build': 100}}
+        results = {'a': {'parse': 105, 'build': 150, 'new': 1}}
+        self.assertEqual(memory.find_regressions(results, baseline),
+                         [('a', 'build', 100, 150)])
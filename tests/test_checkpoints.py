@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import json
+import os
+
+from .base import TemporaryDirectoryTestCase
+from .config import (
+    COLUMNS_1, INVALID_PRODUCT_ROW, make_products_csv, product_kinds)
+
+import smartcsv
+from smartcsv.errors import SpillingErrorStore
+from smartcsv.parallel import ParallelCSVModelReader
+
+# Non-ASCII rows: offsets are counted in bytes
+CSV_DATA = make_products_csv(
+    product_kinds(100),
+    invalid_row=INVALID_PRODUCT_ROW.replace(u'Camera', u'Cámara'))
+
+
+class CheckpointsTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(CheckpointsTestCase, self).setUp()
+        self.csv_data = CSV_DATA
+        self.path = self.write('data.csv', self.csv_data.encode('utf-8'))
+
+    def read_all(self, **kwargs):
+        reader = smartcsv.reader(
+            io.StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False,
+            **kwargs)
+        return list(reader), reader.errors
+
+    def interrupted(self, reader, rows=40):
+        """Reads some rows and returns them with a checkpoint that went
+        through JSON"""
+        objs = [next(reader) for _ in range(rows)]
+        return objs, json.loads(json.dumps(reader.checkpoint()))
+
+    def test_resume_from_path(self):
+        """Should resume right after the last row, with the same state"""
+        expected = self.read_all()
+        for engine in ('csv', 'fast'):
+            for mmap in (True, False):
+                for slab_size in (1, 100, 1024 * 1024):
+                    options = dict(
+                        columns=COLUMNS_1, fail_fast=False, engine=engine,
+                        mmap=mmap, slab_size=slab_size)
+                    reader = smartcsv.reader.from_path(self.path, **options)
+                    objs, token = self.interrupted(reader)
+                    reader.close()
+
+                    reader = smartcsv.reader.from_path(
+                        self.path, resume=token, **options)
+                    objs += list(reader)
+                    self.assertEqual(
+                        (objs, reader.errors), expected,
+                        (engine, mmap, slab_size))
+
+    def test_checkpoint_token(self):
+        """Should have the offset, the counters and the errors"""
+        reader = smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, fail_fast=False)
+        self.addCleanup(reader.close)
+        next(reader)
+        next(reader)
+        token = reader.checkpoint()
+        data = self.csv_data.encode('utf-8')
+        self.assertEqual(token['offset'], data.index(b'iPhone 2'))
+        self.assertEqual(token['row_counter'], 2)
+        self.assertEqual(token['failure_count'], 0)
+        self.assertEqual(token['errors'], {'rows': []})
+
+        next(reader)
+        next(reader)
+        token = reader.checkpoint()
+        self.assertEqual(token['row_counter'], 5)
+        self.assertEqual(token['failure_count'], 1)
+        self.assertEqual(token['errors']['rows'][0][0], 3)
+        self.assertEqual(token['schema_fingerprint'],
+                         reader.schema_fingerprint)
+
+    def test_resume_binary_streams(self):
+        """Should seek binary streams or skip to the offset otherwise"""
+        expected = self.read_all()
+        data = self.csv_data.encode('utf-16')
+        reader = smartcsv.reader(
+            io.BytesIO(data), encoding='utf-16', columns=COLUMNS_1,
+            fail_fast=False)
+        objs, token = self.interrupted(reader)
+
+        reader = smartcsv.reader(
+            io.BytesIO(data), resume=token, columns=COLUMNS_1,
+            fail_fast=False)
+        self.assertEqual((objs + list(reader), reader.errors), expected)
+
+        chunks = [data[index:index + 10] for index in range(0, len(data), 10)]
+        reader = smartcsv.reader(
+            smartcsv.streams.ByteLineStream(
+                chunks, encoding=token['encoding'], start=token['offset']),
+            resume=token, columns=COLUMNS_1, fail_fast=False)
+        self.assertEqual((objs + list(reader), reader.errors), expected)
+
+    def test_resume_compressed_files(self):
+        """Should skip the decompressed data before the checkpoint"""
+        expected = self.read_all()
+        path = self.write(
+            'data.csv.gz', gzip.compress(self.csv_data.encode('utf-8')))
+        reader = smartcsv.reader.from_path(
+            path, slab_size=100, columns=COLUMNS_1, fail_fast=False)
+        objs, token = self.interrupted(reader)
+        reader.close()
+
+        reader = smartcsv.reader.from_path(
+            path, slab_size=100, resume=token, columns=COLUMNS_1,
+            fail_fast=False)
+        self.assertEqual((objs + list(reader), reader.errors), expected)
+
+    def test_resume_spilled_errors(self):
+        """Should reference spilled stores and drop the later failures"""
+        expected = self.read_all()
+        store = SpillingErrorStore(memory_limit=1)
+        reader = smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, fail_fast=False, error_store=store)
+        objs, token = self.interrupted(reader)
+        self.assertEqual(token['errors']['path'], store.path)
+        # The reading goes on (and fails) after the checkpoint
+        list(reader)
+        store.close()
+        self.assertTrue(os.path.exists(token['errors']['path']))
+
+        store = SpillingErrorStore()
+        reader = smartcsv.reader.from_path(
+            self.path, resume=token, columns=COLUMNS_1, fail_fast=False,
+            error_store=store)
+        objs += list(reader)
+        self.assertEqual(
+            (objs, dict(reader.errors['rows'])),
+            (expected[0], expected[1]['rows']))
+        self.assertEqual(len(store), len(expected[1]['rows']))
+        store.close()
+        os.remove(token['errors']['path'])
+
+    def test_different_schema(self):
+        """Should not resume with different columns or options"""
+        with smartcsv.reader.from_path(
+                self.path, columns=COLUMNS_1, fail_fast=False) as reader:
+            _, token = self.interrupted(reader)
+
+        columns = [dict(column) for column in COLUMNS_1]
+        columns[2]['required'] = True
+        self.assertRaises(
+            ValueError, smartcsv.reader.from_path, self.path, resume=token,
+            columns=columns, fail_fast=False)
+        self.assertRaises(
+            ValueError, smartcsv.reader.from_path, self.path, resume=token,
+            columns=COLUMNS_1, allow_empty_rows=True, fail_fast=False)
+
+    def test_needs_offsets(self):
+        """Should only take checkpoints and resume with offsets"""
+        reader = smartcsv.reader(
+            io.StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False)
+        self.assertRaises(ValueError, reader.checkpoint)
+
+        with smartcsv.reader.from_path(
+                self.path, columns=COLUMNS_1, fail_fast=False) as reader:
+            _, token = self.interrupted(reader)
+        self.assertRaises(
+            ValueError, smartcsv.reader, io.StringIO(self.csv_data),
+            resume=token, columns=COLUMNS_1)
+
+        with open(self.path, 'rb') as f:
+            reader = ParallelCSVModelReader(f, workers=1, columns=COLUMNS_1)
+            self.assertRaises(ValueError, reader.checkpoint)
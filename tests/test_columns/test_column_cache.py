@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+import six
+import mock
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+import smartcsv
+from smartcsv.cache import CachedCallable
+from smartcsv.exceptions import InvalidCSVColumnDefinition
+
+from ..base import BaseSmartCSVTestCase
+from ..config import is_number
+
+CSV_DATA = """
+title,price
+iPhone,799
+iPad,699
+iPod,799
+Mac,abc
+iWatch,799
+Apple TV,abc
+"""
+
+
+class ColumnCacheTestCase(BaseSmartCSVTestCase):
+    def test_validator_results_are_cached(self):
+        """Should invoke the validator once per distinct value"""
+        validator = mock.MagicMock(side_effect=is_number)
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'title', 'required': True},
+            {'name': 'price', 'validator': validator, 'cache': True},
+        ], fail_fast=False)
+
+        self.assertEqual([obj['title'] for obj in reader],
+                         ['iPhone', 'iPad', 'iPod', 'iWatch'])
+        self.assertEqual(validator.call_count, 3)
+        self.assertEqual(sorted(reader.errors['rows'].keys()), [3, 5])
+        self.assertEqual(reader.cache_stats, {
+            'price': {
+                'validator': {
+                    'hits': 3, 'misses': 3, 'evictions': 0, 'size': 3}
+            }
+        })
+
+    def test_transform_failures_are_cached(self):
+        """Should cache both transformed values and transform failures"""
+        transform = mock.MagicMock(side_effect=Decimal)
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'title', 'required': True},
+            {'name': 'price', 'transform': transform, 'cache': True},
+        ], fail_fast=False)
+
+        prices = [obj['price'] for obj in reader]
+
+        self.assertEqual(prices, [Decimal('799'), Decimal('699'),
+                                  Decimal('799'), Decimal('799')])
+        self.assertEqual(transform.call_count, 3)
+        self.assertTrue('transform' in reader.errors['rows'][3]['errors'])
+        self.assertTrue('transform' in reader.errors['rows'][5]['errors'])
+
+    def test_cache_size_evicts_least_recently_used_values(self):
+        """Should keep only `cache` values"""
+        transform = mock.MagicMock(side_effect=lambda v: v.upper())
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'title', 'required': True},
+            {'name': 'price', 'transform': transform, 'cache': 1},
+        ], fail_fast=False)
+        list(reader)
+
+        self.assertEqual(transform.call_count, 6)
+        self.assertEqual(reader.cache_stats['price']['transform'], {
+            'hits': 0, 'misses': 6, 'evictions': 5, 'size': 1})
+
+    def test_columns_without_cache_have_no_stats(self):
+        """Should not cache columns unless asked to"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'title', 'required': True},
+            {'name': 'price', 'validator': is_number},
+        ], fail_fast=False)
+        list(reader)
+        self.assertEqual(reader.cache_stats, {})
+
+    def test_invalid_cache_size(self):
+        """Should fail if the cache is not a boolean or a positive size"""
+        for cache in (0, -1, 'big'):
+            self.assertRaises(
+                InvalidCSVColumnDefinition,
+                lambda: smartcsv.reader(StringIO(CSV_DATA), columns=[
+                    {'name': 'title', 'required': True},
+                    {'name': 'price', 'cache': cache},
+                ]))
+
+    def test_cached_failures_keep_short_tracebacks(self):
+        """Should not grow the traceback of a failure raised many times"""
+        transform = CachedCallable(Decimal)
+        for _ in range(5000):
+            try:
+                transform('abc')
+            except Exception as e:
+                exception = e
+        length = 0
+        traceback = exception.__traceback__
+        while traceback is not None:
+            length += 1
+            traceback = traceback.tb_next
+        self.assertTrue(length <= 2, length)
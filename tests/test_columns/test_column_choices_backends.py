@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from ..config import CURRENCY_CHOICES
+from ..base import BaseSmartCSVTestCase
+
+import smartcsv
+from smartcsv.choices import (
+    BloomFilterChoices, HashedChoices, SortedChoices, SQLiteChoices)
+from smartcsv.exceptions import InvalidCSVColumnDefinition
+
+CSV_DATA = """
+title,currency
+iPhone 5C,USD
+iPad mini,ARS
+iPod,EUR
+"""
+
+
+class ChoicesBackendsTestCase(BaseSmartCSVTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def read_currencies(self, choices):
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'title', 'required': True},
+            {'name': 'currency', 'required': True, 'choices': choices},
+        ], fail_fast=False)
+        return reader, [obj['currency'] for obj in reader]
+
+    def test_list_choices_are_hashed(self):
+        """Should hash list choices but keep them in the error message"""
+        reader, currencies = self.read_currencies(CURRENCY_CHOICES)
+        self.assertEqual(currencies, ['USD', 'ARS'])
+        self.assertTrue(isinstance(reader._plan[1][3], HashedChoices))
+        self.assertEqual(
+            reader.errors['rows'][2]['errors']['currency'],
+            "Invalid choice. Expected ['USD', 'ARS', 'JPY']. Got EUR")
+
+    def test_unhashable_choices_are_used_as_they_are(self):
+        """Should still check lists of unhashable choices"""
+        choices = [['USD'], 'USD', 'ARS']
+        reader, currencies = self.read_currencies(choices)
+        self.assertEqual(currencies, ['USD', 'ARS'])
+        self.assertTrue(reader._plan[1][3] is choices)
+
+    def test_sorted_choices(self):
+        """Should check the choices with bisect"""
+        choices = SortedChoices(CURRENCY_CHOICES)
+        self.assertTrue('ARS' in choices)
+        self.assertFalse('AAA' in choices)
+        self.assertFalse('ZZZ' in choices)
+
+        reader, currencies = self.read_currencies(choices)
+        self.assertEqual(currencies, ['USD', 'ARS'])
+        self.assertTrue('EUR' in reader.errors['rows'][2]['errors']['currency'])
+
+    def test_bloom_filter_choices(self):
+        """Should only check the backend if the filter might contain the value"""
+        skus = ['SKU-{0}'.format(i) for i in range(10000)]
+        choices = BloomFilterChoices(skus)
+        for sku in skus:
+            self.assertTrue(sku in choices)
+
+        false_positives = sum(
+            1 for i in range(10000, 20000)
+            if choices.might_contain('SKU-{0}'.format(i)))
+        self.assertTrue(false_positives < 300, false_positives)
+        self.assertFalse('SKU-10000' in choices)
+
+        reader, currencies = self.read_currencies(
+            BloomFilterChoices(CURRENCY_CHOICES))
+        self.assertEqual(currencies, ['USD', 'ARS'])
+
+    def test_sqlite_choices(self):
+        """Should check the choices stored in a SQLite database"""
+        path = os.path.join(self.tmp_dir, 'currencies.db')
+        SQLiteChoices(path, choices=CURRENCY_CHOICES)
+
+        choices = SQLiteChoices(path)
+        self.assertTrue('JPY' in choices)
+        self.assertFalse('EUR' in choices)
+
+        reader, currencies = self.read_currencies(choices)
+        self.assertEqual(currencies, ['USD', 'ARS'])
+        self.assertEqual(
+            reader.errors['rows'][2]['errors']['currency'],
+            "Invalid choice. Expected <SQLiteChoices: {0}>. Got EUR".format(
+                path))
+
+    def test_default_is_validated_against_the_backend(self):
+        """Should validate defaults against the choices backend"""
+        self.assertRaises(
+            InvalidCSVColumnDefinition,
+            lambda: smartcsv.reader(StringIO(CSV_DATA), columns=[
+                {'name': 'title', 'required': True},
+                {'name': 'currency', 'default': 'EUR',
+                 'choices': SortedChoices(CURRENCY_CHOICES)},
+            ]))
@@ -0,0 +1,69 @@
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS
+
+import smartcsv
+from smartcsv.reader import CSVModelReader
+
+
+class TwoStepReader(CSVModelReader):
+    """Forces the generic validate_row + _build_object pipeline"""
+    validity_checks = list(CSVModelReader.validity_checks)
+
+
+CSV_DATA = """
+title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Smartphones,USD,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPhone 5c green,,Smartphones,USD,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPhone 5c red,Phones,Smartphones,INVALID,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPhone 5c white,Phones,Smartphones,USD,699,apple.com/iphone,http://apple.com/iphone.jpg
+  iPad mini  ,Tablets,,USD,699,http://apple.com/iphone,
+"""
+
+TRANSFORM_CSV_DATA = """
+title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,,no
+iPod,ARS,not a number,
+Mac,JPY,1999,NO
+"""
+
+
+class CompiledPipelineTestCase(BaseSmartCSVTestCase):
+    def assertSamePipelineResults(self, csv_data, columns):
+        fused = smartcsv.reader(
+            StringIO(csv_data), columns=columns, fail_fast=False)
+        two_step = TwoStepReader(
+            StringIO(csv_data), columns=columns, fail_fast=False)
+
+        self.assertTrue(fused._fused)
+        self.assertFalse(two_step._fused)
+
+        self.assertEqual(list(fused), list(two_step))
+        self.assertEqual(fused.errors, two_step.errors)
+        self.assertEqual(fused.row_counter, two_step.row_counter)
+        return fused
+
+    def test_fused_pipeline_matches_two_step_pipeline(self):
+        """Should return the same objects and errors as validate + build"""
+        reader = self.assertSamePipelineResults(CSV_DATA, COLUMNS_1)
+        self.assertEqual(len(reader.errors['rows']), 4)
+
+    def test_fused_pipeline_matches_two_step_pipeline_with_transforms(self):
+        """Should report validation errors before transformation errors"""
+        reader = self.assertSamePipelineResults(
+            TRANSFORM_CSV_DATA, COLUMNS_WITH_VALUE_TRANSFORMATIONS)
+        self.assertEqual(list(reader.errors['rows'].keys()), [1, 2])
+        self.assertTrue('price' in reader.errors['rows'][1]['errors'])
+        self.assertTrue('price' in reader.errors['rows'][2]['errors'])
+
+    def test_columns_are_compiled_once(self):
+        """Should compile one plan entry per column at construction"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1)
+        self.assertEqual([entry[0] for entry in reader._plan],
+                         reader.model_fields)
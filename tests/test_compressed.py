@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import bz2
+import gzip
+import io
+import lzma
+
+from .base import TemporaryDirectoryTestCase
+from .config import COLUMNS_1
+
+import smartcsv
+from smartcsv.compressed import (
+    BackgroundReader, CompressedLineStream, decompressed_chunks,
+    infer_compression)
+
+CSV_DATA = u"""title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Phones,Smartphones,USD,399,http://apple.com/iphone,http://apple.com/iphone.jpg\r
+"iPad\r\nmini",Tablets,Apple,USD,699,http://apple.com/ipad,
+
+Cámara,Cameras,,USD,not a price,http://example.com/camera,
+Macbook,Computers,,USD,999,http://apple.com/mac,"""
+
+COMPRESSORS = {
+    'gz': gzip.compress,
+    'bz2': bz2.compress,
+    'xz': lzma.compress,
+}
+
+
+class CompressedTestCase(TemporaryDirectoryTestCase):
+    def expected(self):
+        reader = smartcsv.reader(
+            io.StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        return list(reader), reader.errors
+
+    def test_reads_compressed_files(self):
+        """Should decompress gzip, bz2 and xz files"""
+        data = CSV_DATA.encode('utf-8')
+        for extension, compress in COMPRESSORS.items():
+            path = self.write('data.csv.' + extension, compress(data))
+            for slab_size in (1, 7, 1024):
+                reader = smartcsv.reader.from_path(
+                    path, slab_size=slab_size, columns=COLUMNS_1,
+                    fail_fast=False)
+                self.assertTrue(
+                    isinstance(reader.source, CompressedLineStream))
+                self.assertEqual(
+                    (list(reader), reader.errors), self.expected())
+
+    def test_multi_member_gzip(self):
+        """Should read all the members of a gzip file"""
+        data = CSV_DATA.encode('utf-8')
+        middle = data.index(b'Macbook')
+        path = self.write('data.csv.gz', gzip.compress(data[:middle]) +
+                          gzip.compress(data[middle:]))
+        reader = smartcsv.reader.from_path(
+            path, columns=COLUMNS_1, fail_fast=False)
+        self.assertEqual((list(reader), reader.errors), self.expected())
+
+    def test_streams_ending_at_a_read(self):
+        """Should read the next stream when one ends at the end of a read"""
+        first, second = b'a,b\n' * 100, b'c,d\n' * 100
+        for compression, compress in (('gzip', gzip.compress),
+                                      ('bz2', bz2.compress),
+                                      ('xz', lzma.compress)):
+            path = self.write('data.' + compression,
+                              compress(first) + compress(second))
+            chunks = decompressed_chunks(
+                path, compression, len(compress(first)))
+            self.assertEqual(b''.join(chunks), first + second)
+
+    def test_explicit_compression(self):
+        """Should use the given compression whatever the extension"""
+        path = self.write('data.csv', gzip.compress(CSV_DATA.encode('utf-16')))
+        reader = smartcsv.reader.from_path(
+            path, compression='gzip', encoding='utf-16', columns=COLUMNS_1,
+            fail_fast=False)
+        self.assertEqual((list(reader), reader.errors), self.expected())
+
+        path = self.write('data.gz', CSV_DATA.encode('utf-8'))
+        reader = smartcsv.reader.from_path(
+            path, compression=None, columns=COLUMNS_1, fail_fast=False)
+        self.assertEqual((list(reader), reader.errors), self.expected())
+
+        self.assertRaises(
+            ValueError, smartcsv.reader.from_path, path, compression='zip',
+            columns=COLUMNS_1)
+
+    def test_empty_files(self):
+        """Should read empty compressed files"""
+        for extension, compress in COMPRESSORS.items():
+            for data in (b'', compress(b'')):
+                path = self.write('data.csv.' + extension, data)
+                reader = smartcsv.reader.from_path(
+                    path, columns=COLUMNS_1, header_included=False)
+                self.assertEqual(list(reader), [])
+
+    def test_infer_compression(self):
+        """Should infer the compression from the extension"""
+        self.assertEqual(infer_compression('data.csv.gz'), 'gzip')
+        self.assertEqual(infer_compression('DATA.CSV.BZ2'), 'bz2')
+        self.assertEqual(infer_compression('data.csv.xz'), 'xz')
+        self.assertEqual(infer_compression('data.csv'), None)
+
+    def test_offsets(self):
+        """Should track offsets in the decompressed data"""
+        data = CSV_DATA.encode('utf-8')
+        path = self.write('data.csv.gz', gzip.compress(data))
+        reader = smartcsv.reader.from_path(
+            path, columns=COLUMNS_1, fail_fast=False)
+        self.assertEqual(reader.offset, data.index(b'iPhone'))
+        list(reader)
+        self.assertEqual(reader.offset, len(data))
+
+    def test_corrupted_files(self):
+        """Should raise the errors of the decompression when reading"""
+        compressed = gzip.compress(CSV_DATA.encode('utf-8') * 100)
+        path = self.write('data.csv.gz', compressed[:len(compressed) // 2])
+        reader = smartcsv.reader.from_path(
+            path, slab_size=16, columns=COLUMNS_1, fail_fast=False)
+        self.assertRaises(EOFError, list, reader)
+
+    def test_closes_the_file(self):
+        """Should stop the background thread and close the file"""
+        path = self.write(
+            'data.csv.gz', gzip.compress(CSV_DATA.encode('utf-8') * 1000))
+        reader = smartcsv.reader.from_path(
+            path, slab_size=16, columns=COLUMNS_1, fail_fast=False)
+        next(reader)
+        reader.close()
+        background = reader.source._background
+        self.assertFalse(background._thread.is_alive())
+        self.assertEqual(background.chunks.gi_frame, None)
+
+        reader = smartcsv.reader.from_path(
+            path, columns=COLUMNS_1, fail_fast=False)
+        list(reader)
+        self.assertFalse(reader.source._background._thread.is_alive())
+
+    def test_background_reader(self):
+        """Should iterate the chunks on a thread and raise their errors"""
+        chunks = [b'0123456789'] * 10
+        self.assertEqual(list(BackgroundReader(chunks, prefetch=2)), chunks)
+
+        def failing():
+            yield b'0123'
+            raise ValueError()
+        reader = iter(BackgroundReader(failing()))
+        self.assertEqual(next(reader), b'0123')
+        self.assertRaises(ValueError, next, reader)
+
+    def test_trailing_garbage(self):
+        """Should fail with data that isn't compressed after a member"""
+        data = gzip.compress(CSV_DATA.encode('utf-8')) + b'garbage'
+        path = self.write('data.csv.gz', data)
+        self.assertRaises(
+            Exception, lambda: list(smartcsv.reader.from_path(
+                path, columns=COLUMNS_1, fail_fast=False)))
+
+    def test_compressible_data_is_decompressed_in_bounded_chunks(self):
+        """Should not decompress a whole chunk of compressible data at once"""
+        row = (u'Macbook,Computers,,USD,999,http://apple.com/mac,\n' * 2000)
+        data = CSV_DATA.split(u'\n')[0] + u'\n' + row * 10
+        for extension, compress in COMPRESSORS.items():
+            path = self.write('big.csv.' + extension,
+                              compress(data.encode('utf-8')))
+            chunks = list(decompressed_chunks(
+                path, infer_compression(path), chunk_size=16 * 1024))
+            self.assertTrue(
+                max(map(len, chunks)) <= 16 * 1024, extension)
+            self.assertEqual(b''.join(chunks), data.encode('utf-8'))
+
+            reader = smartcsv.reader.from_path(
+                path, slab_size=16 * 1024, columns=COLUMNS_1)
+            self.assertEqual(len(list(reader)), 20000)
+            reader.close()
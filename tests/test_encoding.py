@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import codecs
+import io
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1
+
+import smartcsv
+from smartcsv.streams import ByteLineStream, sniff_encoding
+
+CSV_DATA = u"""title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Phones,Smartphones,USD,399,http://apple.com/iphone,http://apple.com/iphone.jpg\r
+"iPad\r\nmini",Tablets,Apple,USD,699,http://apple.com/ipad,
+
+Cámara € ☃,Cameras,,USD,not a price,http://example.com/camera,
+Macbook,Computers,,USD,999,http://apple.com/mac,"""
+
+
+class EncodingTestCase(BaseSmartCSVTestCase):
+    def read(self, csv_file, **kwargs):
+        reader = smartcsv.reader(
+            csv_file, columns=COLUMNS_1, fail_fast=False, **kwargs)
+        return list(reader), reader.errors
+
+    def expected(self):
+        return self.read(io.StringIO(CSV_DATA))
+
+    def test_binary_streams(self):
+        """Should decode binary streams like text ones"""
+        data = CSV_DATA.encode('utf-8')
+        self.assertEqual(self.read(io.BytesIO(data)), self.expected())
+        self.assertEqual(self.read(data), self.expected())
+
+    def test_encoding(self):
+        """Should decode binary streams with the given encoding"""
+        text = CSV_DATA.replace(u' € ☃', u'')
+        for encoding in ('latin-1', 'cp1252', 'utf-16-le', 'utf-32-be'):
+            reader = smartcsv.reader(
+                io.BytesIO(text.encode(encoding)), columns=COLUMNS_1,
+                fail_fast=False, encoding=encoding)
+            list(reader)
+            self.assertEqual(
+                reader.errors['rows'][2]['row'][0], u'Cámara')
+
+    def test_byte_order_marks(self):
+        """Should skip BOMs and use the encoding they select"""
+        cases = [
+            ('utf-8', codecs.BOM_UTF8 + CSV_DATA.encode('utf-8')),
+            ('utf-8-sig', codecs.BOM_UTF8 + CSV_DATA.encode('utf-8')),
+            ('utf-8-sig', CSV_DATA.encode('utf-8')),
+            ('utf-16', CSV_DATA.encode('utf-16')),
+            ('utf-16', codecs.BOM_UTF16_BE + CSV_DATA.encode('utf-16-be')),
+            ('utf-16', codecs.BOM_UTF16_LE + CSV_DATA.encode('utf-16-le')),
+            ('utf-8', codecs.BOM_UTF16_BE + CSV_DATA.encode('utf-16-be')),
+            ('utf-32', CSV_DATA.encode('utf-32')),
+        ]
+        for encoding, data in cases:
+            self.assertEqual(
+                self.read(io.BytesIO(data), encoding=encoding),
+                self.expected(), encoding)
+
+    def test_boms_only_for_unicode_encodings(self):
+        """Should only look for BOMs if the encoding is a Unicode one"""
+        self.assertEqual(sniff_encoding(codecs.BOM_UTF8, 'latin-1'),
+                         ('iso8859-1', 0))
+        self.assertEqual(sniff_encoding(codecs.BOM_UTF8, 'utf-16'),
+                         ('utf-8', 3))
+        self.assertTrue(sniff_encoding(b'', 'utf-16') in (
+            ('utf-16-le', 0), ('utf-16-be', 0)))
+
+    def test_chunk_boundaries(self):
+        """Should decode characters split between chunks"""
+        for encoding in ('utf-8', 'utf-16', 'utf-32'):
+            data = CSV_DATA.encode(encoding)
+            for slab_size in (1, 2, 3, 5, 7, 1024):
+                stream = ByteLineStream(
+                    io.BytesIO(data), encoding=encoding, slab_size=slab_size)
+                self.assertEqual(
+                    u''.join(stream), CSV_DATA, (encoding, slab_size))
+
+    def test_iterables_of_bytes(self):
+        """Should read iterables of bytes chunks"""
+        data = CSV_DATA.encode('utf-16')
+        chunks = [data[i:i + 5] for i in range(0, len(data), 5)]
+        self.assertEqual(
+            self.read(ByteLineStream(chunks, encoding='utf-16')),
+            self.expected())
+
+    def test_offsets(self):
+        """Should know the byte offset where the next row starts"""
+        for encoding in ('utf-8', 'utf-16', 'utf-32-le'):
+            data = CSV_DATA.encode(encoding)
+            bom = len(data) - len(CSV_DATA.encode(
+                sniff_encoding(data[:4], encoding)[0]))
+            for slab_size in (1, 7, 1024):
+                reader = smartcsv.reader(
+                    ByteLineStream(data, encoding=encoding,
+                                   slab_size=slab_size),
+                    columns=COLUMNS_1, fail_fast=False)
+                self.assertEqual(reader.offset, bom + len(
+                    CSV_DATA[:CSV_DATA.index(u'iPhone')].encode(
+                        reader.source.encoding)))
+                next(reader)
+                next(reader)
+                self.assertEqual(reader.offset, bom + len(
+                    CSV_DATA[:CSV_DATA.index(u'\n\n') + 1].encode(
+                        reader.source.encoding)))
+                next(reader)
+                self.assertEqual(reader.offset, len(data))
+
+    def test_text_streams(self):
+        """Should not decode text streams nor track their offsets"""
+        reader = smartcsv.reader(io.StringIO(CSV_DATA), columns=COLUMNS_1)
+        self.assertEqual(reader.source.__class__, io.StringIO)
+        self.assertRaises(AttributeError, lambda: reader.offset)
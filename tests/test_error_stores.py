@@ -0,0 +1,163 @@
+import json
+import os
+
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1
+from .test_csv_failures import ROW0, ROW1, ROW2, ROW3, ROW4
+
+import smartcsv
+from smartcsv.errors import (
+    AggregatingErrorStore, MemoryErrorStore, SpillingErrorStore)
+from smartcsv.reader import CSVModelReader
+
+CSV_DATA = """
+title,category,subcategory,currency,price,url,image_url
+{r0}
+{r1}
+{r2}
+{r3}
+{r4}
+{r2}
+""".format(r0=ROW0, r1=ROW1, r2=ROW2, r3=ROW3, r4=ROW4)
+
+
+class PricedReader(CSVModelReader):
+    validity_checks = CSVModelReader.validity_checks + [
+        lambda reader, row: (row[4] != '1', {'price': 'Too cheap'})]
+
+
+class ErrorStoresTestCase(BaseSmartCSVTestCase):
+    def read(self, error_store=None):
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False, error_store=error_store)
+        self.assertEqual([obj['title'] for obj in reader], ['iPad mini'])
+        return reader
+
+    def test_memory_store_is_the_default(self):
+        """Should keep the errors in a plain dict by default"""
+        reader = self.read()
+        self.assertTrue(isinstance(reader.error_store, MemoryErrorStore))
+        self.assertTrue(isinstance(reader.errors, dict))
+        self.assertEqual(sorted(reader.errors['rows'].keys()),
+                         [0, 1, 2, 3, 5])
+
+    def test_store_can_be_queried(self):
+        """Should get errors by row number and by column"""
+        store = self.read().error_store
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.get(2)['row'], ROW2.split(','))
+        self.assertRaises(KeyError, lambda: store.get(4))
+        self.assertEqual(
+            [row_number for row_number, _ in store.by_column('currency')],
+            [2, 5])
+
+    def test_spilling_store_keeps_errors_in_memory_under_the_limit(self):
+        """Should not spill errors while they fit in memory"""
+        store = SpillingErrorStore()
+        reader = self.read(store)
+        self.assertFalse(store.spilled)
+        self.assertEqual(reader.errors, self.read().errors)
+
+    def test_spilling_store_moves_errors_to_disk(self):
+        """Should spill errors to SQLite and keep the errors interface"""
+        store = SpillingErrorStore(memory_limit=1000, batch_size=2)
+        reader = self.read(store)
+        self.assertTrue(store.spilled)
+
+        self.assertEqual(reader.errors, self.read().errors)
+        self.assertTrue('rows' in reader.errors)
+        self.assertEqual(len(reader.errors['rows']), 5)
+        self.assertRowError(reader.errors, ROW0, 0, 'row_length')
+        self.assertRowError(reader.errors, ROW1, 1, 'category')
+        self.assertRowError(reader.errors, ROW3, 3, 'url')
+        self.assertEqual(
+            [row_number for row_number, _ in store.by_column('currency')],
+            [2, 5])
+        self.assertRaises(KeyError, lambda: store.get(4))
+
+        path = store.path
+        self.assertTrue(os.path.exists(path))
+        store.close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_empty_store_view(self):
+        """Should look like an empty dict when there are no errors"""
+        store = SpillingErrorStore(memory_limit=0)
+        reader = smartcsv.reader(
+            StringIO("title,category,subcategory,currency,price,url,"
+                     "image_url\n" + ROW4),
+            columns=COLUMNS_1, fail_fast=False, error_store=store)
+        list(reader)
+        self.assertEqual(reader.errors, {})
+
+    def test_aggregating_store_counts_errors(self):
+        """Should count the errors by column, kind and check"""
+        store = AggregatingErrorStore()
+        reader = self.read(store)
+
+        self.assertEqual(store.summary(), {
+            'failure_count': 5,
+            'columns': {
+                'row_length': {'row_length': {'count': 1, 'examples': [0]}},
+                'category': {'required': {'count': 1, 'examples': [1]}},
+                'currency': {'choices': {'count': 2, 'examples': [2, 5]}},
+                'url': {'validator': {'count': 1, 'examples': [3]}},
+            },
+            'checks': {'_is_valid_row_length': 1, '_is_valid_row_values': 4},
+        })
+        self.assertEqual(reader.errors, self.read().errors)
+
+    def test_aggregating_store_is_bounded(self):
+        """Should only keep a sample of the rows of every bucket"""
+        store = AggregatingErrorStore(examples=3, seed=1)
+        rows = ''.join(
+            'Item {0},Phones,,USD,free,http://example.com,\n'.format(index)
+            for index in range(1000))
+        reader = smartcsv.reader(
+            StringIO(CSV_DATA.split(ROW0)[0] + rows), columns=COLUMNS_1,
+            fail_fast=False, error_store=store)
+        list(reader)
+
+        price = store.summary()['columns']['price']['validator']
+        self.assertEqual(price['count'], 1000)
+        self.assertEqual(len(price['examples']), 3)
+        self.assertEqual(sorted(reader.errors['rows']), price['examples'])
+        # Not just the first ones
+        self.assertTrue(max(price['examples']) > 2)
+        for row_number in price['examples']:
+            self.assertEqual(store.get(row_number)['row'][0],
+                             'Item {0}'.format(row_number))
+
+    def test_aggregating_store_custom_checks(self):
+        """Should name the kind of errors of custom checks after them"""
+        store = AggregatingErrorStore()
+        data = CSV_DATA.replace(',699,', ',1,')
+        reader = PricedReader(StringIO(data), columns=COLUMNS_1,
+                              fail_fast=False, error_store=store)
+        list(reader)
+
+        summary = store.summary()
+        self.assertEqual(summary['columns']['price'],
+                         {'<lambda>': {'count': 1, 'examples': [4]}})
+        self.assertEqual(summary['checks']['<lambda>'], 1)
+        self.assertEqual(reader.errors['rows'][4]['errors'],
+                         {'price': 'Too cheap'})
+
+    def test_aggregating_store_checkpoints(self):
+        """Should restore its counts and samples from a checkpoint"""
+        store = AggregatingErrorStore(examples=1, seed=1)
+        self.read(store)
+        state = json.loads(json.dumps(store.checkpoint()))
+
+        restored = AggregatingErrorStore(examples=1)
+        restored.restore(state)
+        self.assertEqual(restored.summary(), store.summary())
+        self.assertEqual(dict(restored.errors), dict(store.errors))
+        self.assertEqual(restored.get(3)['errors'],
+                         {'url': 'Validation failed'})
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import io
+
+from .base import TemporaryDirectoryTestCase
+from .config import COLUMNS_1
+
+import smartcsv
+
+
+CSV_DATA = u"""title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Phones,Smartphones,USD,399,http://apple.com/iphone,http://apple.com/iphone.jpg\r
+"iPad\r\nmini",Tablets,Apple,USD,699,http://apple.com/ipad,
+
+Cámara,Cameras,,USD,not a price,http://example.com/camera,
+Macbook,Computers,,USD,999,http://apple.com/mac,"""
+
+
+class FromPathTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(FromPathTestCase, self).setUp()
+        self.path = self.write('data.csv', CSV_DATA)
+
+    def read_from_stream(self):
+        with io.open(self.path, encoding='utf-8', newline='') as f:
+            reader = smartcsv.reader(f, columns=COLUMNS_1, fail_fast=False)
+            return list(reader), reader.errors
+
+    def test_reads_like_a_file(self):
+        """Should read the same rows and errors than from a file object"""
+        expected = self.read_from_stream()
+        for mmap in (True, False):
+            for slab_size in (1, 7, 1024):
+                reader = smartcsv.reader.from_path(
+                    self.path, mmap=mmap, slab_size=slab_size,
+                    columns=COLUMNS_1, fail_fast=False)
+                self.assertEqual((list(reader), reader.errors), expected)
+
+    def test_tracks_offsets(self):
+        """Should know the byte offset where the next row starts"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        for slab_size in (1, 7, 1024):
+            reader = smartcsv.reader.from_path(
+                self.path, slab_size=slab_size, columns=COLUMNS_1,
+                fail_fast=False)
+            self.addCleanup(reader.close)
+            self.assertEqual(reader.offset, data.index(b'iPhone'))
+            next(reader)
+            self.assertEqual(reader.offset, data.index(b'"iPad'))
+            next(reader)
+            # The next row is the blank one
+            self.assertEqual(reader.offset, data.index(b'\n\n') + 1)
+            # It's skipped and the camera row fails
+            next(reader)
+            self.assertEqual(reader.offset, len(data))
+
+    def test_offsets_are_only_for_paths(self):
+        """Should not have offsets when reading from a stream"""
+        reader = smartcsv.reader(io.StringIO(CSV_DATA), columns=COLUMNS_1)
+        self.assertRaises(AttributeError, lambda: reader.offset)
+
+    def test_closes_the_file(self):
+        """Should close the file when it's exhausted, closed or left"""
+        reader = smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, fail_fast=False)
+        list(reader)
+        self.assertTrue(reader.source._file.closed)
+
+        reader = smartcsv.reader.from_path(self.path, columns=COLUMNS_1)
+        reader.close()
+        self.assertTrue(reader.source._file.closed)
+
+        with smartcsv.reader.from_path(
+                self.path, columns=COLUMNS_1) as reader:
+            next(reader)
+        self.assertTrue(reader.source._file.closed)
+
+    def test_encoding(self):
+        """Should decode with the given encoding"""
+        with io.open(self.path, 'w', encoding='latin-1', newline='') as f:
+            f.write(CSV_DATA)
+        reader = smartcsv.reader.from_path(
+            self.path, encoding='latin-1', columns=COLUMNS_1,
+            fail_fast=False)
+        list(reader)
+        self.assertEqual(reader.errors['rows'][2]['row'][0], u'Cámara')
+
+    def test_encodings_not_ascii_compatible(self):
+        """Should read files in encodings that can't be cut at newlines"""
+        expected = self.read_from_stream()
+        with io.open(self.path, 'w', encoding='utf-16', newline='') as f:
+            f.write(CSV_DATA)
+
+        for slab_size in (1, 7, 1024):
+            reader = smartcsv.reader.from_path(
+                self.path, encoding='utf-16', slab_size=slab_size,
+                columns=COLUMNS_1, fail_fast=False)
+            self.assertFalse(reader.source.use_mmap)
+            self.assertEqual((list(reader), reader.errors), expected)
+
+    def test_empty_file(self):
+        """Should read empty files"""
+        open(self.path, 'w').close()
+        reader = smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, header_included=False)
+        self.assertEqual(list(reader), [])
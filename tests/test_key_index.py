@@ -0,0 +1,100 @@
+import io
+import os
+
+from .base import TemporaryDirectoryTestCase
+from .config import COLUMNS_1, make_products_csv, product_kinds
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+from smartcsv.indexes import KeyIndex, KeyRecorder
+
+# The SKUs of the products are their subcategories
+VALID_ROW = ('"iPhone\n{0}",Phones,SKU-{0},USD,399,'
+             'http://apple.com/iphone,\n')
+INVALID_ROW = 'Camera {0},Cameras,SKU-{0},USD,no price,http://example.com,\n'
+
+CSV_DATA = make_products_csv(product_kinds(250), VALID_ROW, INVALID_ROW) + (
+    VALID_ROW.format(0).replace('iPhone', 'Repeated'))
+
+
+class KeyIndexTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(KeyIndexTestCase, self).setUp()
+        self.path = self.write('data.csv', CSV_DATA)
+        self.data = CSV_DATA.encode('utf-8')
+
+    def test_built_while_reading(self):
+        """Should index every row by its key during a normal read"""
+        reader = smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, fail_fast=False,
+            key_index='subcategory', slab_size=64)
+        self.addCleanup(reader.close)
+        list(reader)
+        index = KeyIndex.for_file(self.path, 'subcategory')
+        self.assertTrue(index.complete)
+        self.assertEqual(len(index), 250)
+        self.assertEqual(index.get('SKU-42'), self.data.index(b'"iPhone\n42"'))
+        self.assertEqual(index.get('SKU-3'), self.data.index(b'Camera 3,'))
+        # The first row of a repeated key is kept
+        self.assertEqual(index.get('SKU-0'), self.data.index(b'"iPhone\n0"'))
+        self.assertRaises(KeyError, index.get, 'SKU-250')
+        index.close()
+
+    def test_lookup(self):
+        """Should validate and build only the requested rows"""
+        with smartcsv.KeyLookup(
+                self.path, 'subcategory', columns=COLUMNS_1) as lookup:
+            self.assertEqual(len(lookup), 250)
+            self.assertEqual(lookup['SKU-120']['title'], 'iPhone\n120')
+            self.assertEqual(lookup['SKU-5']['title'], 'iPhone\n5')
+            self.assertTrue('SKU-6' in lookup)
+            self.assertFalse('SKU-999' in lookup)
+            self.assertEqual(lookup.get('SKU-999'), None)
+            self.assertRaises(KeyError, lambda: lookup['SKU-999'])
+            self.assertRaises(InvalidCSVException, lambda: lookup['SKU-10'])
+
+    def test_lookup_reuses_the_index(self):
+        """Should only build the index when the file changes"""
+        smartcsv.KeyLookup(self.path, 'subcategory', columns=COLUMNS_1).close()
+        lookup = smartcsv.KeyLookup(
+            self.path, 'subcategory', columns=COLUMNS_1)
+        self.assertTrue(lookup.key_index.complete)
+        self.assertFalse(isinstance(lookup.reader.reader, KeyRecorder))
+        lookup.close()
+
+        with open(self.path, 'a', newline='') as f:
+            f.write(VALID_ROW.format('new'))
+        with smartcsv.KeyLookup(
+                self.path, 'subcategory', columns=COLUMNS_1) as lookup:
+            self.assertEqual(lookup['SKU-new']['title'], 'iPhone\nnew')
+
+    def test_several_columns(self):
+        """Should keep the indexes of several columns in a database"""
+        path = os.path.join(self.directory, 'keys.db')
+        with smartcsv.KeyLookup(self.path, 'subcategory', index_path=path,
+                                columns=COLUMNS_1) as by_sku:
+            with smartcsv.KeyLookup(self.path, 'title', index_path=path,
+                                    columns=COLUMNS_1) as by_title:
+                self.assertEqual(by_sku['SKU-11']['title'], 'iPhone\n11')
+                self.assertEqual(by_title['iPhone\n11']['subcategory'],
+                                 'SKU-11')
+
+    def test_projection(self):
+        """Should index columns that are only in the header"""
+        columns = [{'name': 'title'}, {'name': 'price'}]
+        with smartcsv.KeyLookup(self.path, 'subcategory', columns=columns,
+                                projection=True) as lookup:
+            self.assertEqual(lookup['SKU-7'], {
+                'title': 'iPhone\n7', 'price': '399'})
+
+    def test_unknown_column(self):
+        """Should fail if the key column isn't in the CSV"""
+        self.assertRaises(
+            ValueError, smartcsv.KeyLookup, self.path, 'sku',
+            columns=COLUMNS_1)
+
+    def test_needs_offsets(self):
+        """Should only index readers with offsets"""
+        self.assertRaises(
+            ValueError, smartcsv.reader, io.StringIO(CSV_DATA),
+            columns=COLUMNS_1, key_index=KeyIndex(':memory:', 'title'))
@@ -0,0 +1,214 @@
+import os
+import socket
+
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase, TemporaryDirectoryTestCase
+from .config import COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS
+from .test_csv_failures import ROW0, ROW1, ROW2, ROW3, ROW4
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+from smartcsv.metrics import (
+    MetricsEmitter, PrometheusFileEmitter, StatsdEmitter)
+
+CSV_DATA = """
+title,category,subcategory,currency,price,url,image_url
+{r0}
+{r1}
+{r2}
+{r3}
+{r4}
+""".format(r0=ROW0, r1=ROW1, r2=ROW2, r3=ROW3, r4=ROW4)
+
+TRANSFORM_CSV_DATA = """title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,599,no
+"""
+
+
+class RecordingEmitter(MetricsEmitter):
+    def __init__(self, **kwargs):
+        super(RecordingEmitter, self).__init__(**kwargs)
+        self.writes = 0
+
+    def write(self):
+        self.writes += 1
+
+
+class MetricsTestCase(BaseSmartCSVTestCase):
+    def read(self, metrics, data=CSV_DATA, columns=COLUMNS_1):
+        reader = smartcsv.reader(StringIO(data), columns=columns,
+                                 fail_fast=False, metrics=metrics)
+        return reader, list(reader)
+
+    def test_counters(self):
+        """Should count the rows read and the failures by column and kind"""
+        metrics = RecordingEmitter()
+        self.read(metrics)
+        self.assertEqual(metrics.counters, {
+            ('rows_read', ()): 1,
+            ('rows_failed', (('column', 'row_length'),
+                             ('kind', 'row_length'))): 1,
+            ('rows_failed', (('column', 'category'),
+                             ('kind', 'required'))): 1,
+            ('rows_failed', (('column', 'currency'),
+                             ('kind', 'choices'))): 1,
+            ('rows_failed', (('column', 'url'), ('kind', 'validator'))): 1,
+        })
+
+    def test_custom_check_errors(self):
+        """Should count the errors of custom checks by the check name"""
+        def _is_not_red(reader, csv_row):
+            if 'red' not in csv_row[0]:
+                return True, {}
+            return False, {'title': 'Invalid choice. Expected no red'}
+
+        class CheckedReader(smartcsv.CSVModelReader):
+            validity_checks = [_is_not_red]
+
+        metrics = RecordingEmitter()
+        reader = CheckedReader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                               fail_fast=False, metrics=metrics)
+        list(reader)
+        self.assertEqual(
+            metrics.counters[('rows_failed', (('column', 'title'),
+                                              ('kind', '_is_not_red')))], 1)
+
+    def test_transform_errors(self):
+        """Should count the transform exceptions by type"""
+        columns = [dict(c) for c in COLUMNS_WITH_VALUE_TRANSFORMATIONS]
+        columns[2]['transform'] = int
+        metrics = RecordingEmitter()
+        self.read(metrics, TRANSFORM_CSV_DATA.replace('599', '5.99'),
+                  columns)
+        self.assertEqual(metrics.counters[
+            ('transform_errors', (('exception', 'ValueError'),))], 1)
+
+    def test_row_latency_histogram(self):
+        """Should observe the time spent in every row"""
+        metrics = RecordingEmitter()
+        self.read(metrics)
+        bucket_counts, total, count = metrics.histograms[
+            ('row_seconds', ())]
+        self.assertEqual(count, 5)
+        self.assertEqual(sum(bucket_counts), 5)
+        self.assertTrue(total > 0)
+
+    def test_flushes_periodically(self):
+        """Should flush once per interval and at the end of the file"""
+        metrics = RecordingEmitter(flush_interval=3600)
+        self.read(metrics)
+        self.assertEqual(metrics.writes, 1)
+
+        metrics = RecordingEmitter(flush_interval=0)
+        self.read(metrics)
+        self.assertEqual(metrics.writes, 6)
+
+    def test_histogram_buckets(self):
+        """Should put every value in its bucket"""
+        metrics = RecordingEmitter(buckets=[1, 10])
+        for value in [0.5, 1, 5, 50]:
+            metrics.observe('latency', value)
+        self.assertEqual(metrics.histograms[('latency', ())],
+                         [[2, 1, 1], 56.5, 4])
+
+
+class PrometheusFileEmitterTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(PrometheusFileEmitterTestCase, self).setUp()
+        self.path = os.path.join(self.directory, 'smartcsv.prom')
+
+    def test_writes_text_exposition(self):
+        """Should write the metrics in the Prometheus text format"""
+        metrics = PrometheusFileEmitter(self.path, buckets=[1])
+        metrics.increment('rows_read', 3)
+        metrics.increment('rows_failed', column='price', kind='required')
+        metrics.observe('row_seconds', 0.5)
+        metrics.observe('row_seconds', 2.0)
+        metrics.flush()
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '\n'.join([
+                '# TYPE smartcsv_rows_failed_total counter',
+                'smartcsv_rows_failed_total'
+                '{column="price",kind="required"} 1',
+                '# TYPE smartcsv_rows_read_total counter',
+                'smartcsv_rows_read_total 3',
+                '# TYPE smartcsv_row_seconds histogram',
+                'smartcsv_row_seconds_bucket{le="1.0"} 1',
+                'smartcsv_row_seconds_bucket{le="+Inf"} 2',
+                'smartcsv_row_seconds_sum 2.5',
+                'smartcsv_row_seconds_count 2',
+            ]) + '\n')
+        self.assertEqual(os.listdir(self.directory), ['smartcsv.prom'])
+
+    def test_reader_writes_on_exhaustion(self):
+        """Should write the file when the reader is exhausted"""
+        metrics = PrometheusFileEmitter(self.path)
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False, metrics=metrics)
+        list(reader)
+        with open(self.path) as f:
+            self.assertTrue('smartcsv_rows_read_total 1\n' in f.read())
+
+    def test_reader_writes_when_aborted(self):
+        """Should write the file when the reader raises"""
+        metrics = PrometheusFileEmitter(self.path)
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 metrics=metrics)
+        self.assertRaises(InvalidCSVException, list, reader)
+        with open(self.path) as f:
+            self.assertTrue('kind="row_length"} 1\n' in f.read())
+
+
+class StatsdEmitterTestCase(BaseSmartCSVTestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(5)
+        self.port = self.server.getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+
+    def receive(self):
+        return self.server.recv(65536).decode('utf-8').split('\n')
+
+    def test_sends_aggregated_counters(self):
+        """Should send the aggregated metrics in statsd datagrams"""
+        metrics = StatsdEmitter(port=self.port, buckets=[1])
+        metrics.increment('rows_read')
+        metrics.increment('rows_read')
+        metrics.increment('rows_failed', column='price', kind='required')
+        metrics.observe('row_seconds', 0.5)
+        metrics.close()
+
+        self.assertEqual(self.receive(), [
+            'smartcsv.rows_failed.price.required:1|c',
+            'smartcsv.rows_read:2|c',
+            'smartcsv.row_seconds.count:1|c',
+            'smartcsv.row_seconds.sum:0.5|c',
+            'smartcsv.row_seconds.le_1:1|c',
+        ])
+        self.assertEqual(metrics.counters, {})
+
+    def test_splits_datagrams(self):
+        """Should not send datagrams bigger than the maximum size"""
+        metrics = StatsdEmitter(port=self.port, max_datagram_size=64)
+        self.addCleanup(metrics.close)
+        for i in range(10):
+            metrics.increment('rows_failed', column='column{0}'.format(i),
+                              kind='required')
+        metrics.flush()
+
+        lines = []
+        while len(lines) < 10:
+            datagram = self.receive()
+            self.assertTrue(len('\n'.join(datagram)) <= 64)
+            lines.extend(datagram)
+        self.assertEqual(len(lines), 10)
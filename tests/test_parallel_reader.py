@@ -0,0 +1,207 @@
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+import io
+
+import mock
+
+from .base import BaseSmartCSVTestCase, TemporaryDirectoryTestCase
+from .config import (
+    COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS, MULTILINE_PRODUCT_ROW,
+    make_products_csv, product_kinds)
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+
+VALID_ROW = ("iPad mini {0},Tablets,Apple,USD,699,"
+             "http://apple.com/ipad,http://apple.com/ipad.jpg")
+INVALID_ROW = ("iPad mini {0},Tablets,Apple,INVALID,699,"
+               "http://apple.com/ipad,http://apple.com/ipad.jpg")
+
+
+def build_csv_data(total_rows, invalid_every=7, first_invalid=0):
+    rows = ["title,category,subcategory,currency,price,url,image_url"]
+    for i in range(total_rows):
+        invalid = (i >= first_invalid and
+                   (i - first_invalid) % invalid_every == 0)
+        template = INVALID_ROW if invalid else VALID_ROW
+        rows.append(template.format(i))
+        if i % 10 == 0:
+            rows.append("")
+    return "\n".join(rows)
+
+
+class ParallelCSVModelReaderTestCase(BaseSmartCSVTestCase):
+    def setUp(self):
+        self.csv_data = build_csv_data(200)
+
+    def test_results_are_yielded_in_order(self):
+        """Should return the same objects, in the same order, as the sequential reader"""
+        sequential = smartcsv.reader(
+            StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False)
+        parallel = smartcsv.ParallelCSVModelReader(
+            StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False,
+            workers=3, chunk_size=16)
+
+        self.assertEqual(list(parallel), list(sequential))
+        self.assertEqual(parallel.errors, sequential.errors)
+        self.assertEqual(parallel.row_counter, sequential.row_counter)
+        self.assertEqual(parallel.failure_count, sequential.failure_count)
+
+    def test_errors_have_global_row_indexes(self):
+        """Should report the errors with the global row index"""
+        parallel = smartcsv.ParallelCSVModelReader(
+            StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False,
+            workers=2, chunk_size=10)
+        list(parallel)
+
+        self.assertEqual(
+            sorted(parallel.errors['rows'].keys()), list(range(0, 200, 7)))
+        self.assertRowError(parallel.errors, INVALID_ROW.format(21), 21,
+                            'currency')
+
+    def test_fail_fast_raises_on_the_first_invalid_row(self):
+        """Should yield the valid rows before failing on the first invalid one"""
+        csv_data = build_csv_data(50, invalid_every=50, first_invalid=30)
+        parallel = smartcsv.ParallelCSVModelReader(
+            StringIO(csv_data), columns=COLUMNS_1, workers=2, chunk_size=4)
+
+        objs = []
+        try:
+            for obj in parallel:
+                objs.append(obj)
+        except InvalidCSVException as e:
+            self.assertTrue('currency' in e.errors)
+        else:
+            self.fail("InvalidCSVException not raised")
+
+        self.assertEqual(len(objs), 30)
+        self.assertEqual(objs[-1]['title'], 'iPad mini 29')
+        self.assertTrue(parallel._pool is None)
+
+    def test_max_failures_is_honored(self):
+        """Should fail when max_failures is reached, like the sequential reader"""
+        parallel = smartcsv.ParallelCSVModelReader(
+            StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False,
+            max_failures=3, workers=2, chunk_size=8)
+
+        objs = []
+        try:
+            for obj in parallel:
+                objs.append(obj)
+        except InvalidCSVException as e:
+            self.assertTrue('currency' in e.errors)
+        else:
+            self.fail("InvalidCSVException not raised")
+
+        self.assertEqual(len(objs), 12)
+        self.assertEqual(sorted(parallel.errors['rows'].keys()), [0, 7])
+        self.assertEqual(parallel.row_counter, 14)
+
+    def test_transform_errors_are_reported(self):
+        """Should report transformation errors raised in the workers"""
+        csv_data = """title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,599,no
+"""
+
+        def broken_transform(value):
+            raise ValueError(value)
+
+        columns = [dict(c) for c in COLUMNS_WITH_VALUE_TRANSFORMATIONS]
+        columns[3]['transform'] = broken_transform
+
+        parallel = smartcsv.ParallelCSVModelReader(
+            StringIO(csv_data), columns=columns, fail_fast=False,
+            workers=2, chunk_size=1)
+
+        self.assertEqual(list(parallel), [])
+        self.assertEqual(sorted(parallel.errors['rows'].keys()), [0, 1])
+        self.assertTrue(
+            'transform' in parallel.errors['rows'][0]['errors'])
+
+    def test_single_worker_runs_in_process(self):
+        """Should not start a pool with a single worker"""
+        parallel = smartcsv.ParallelCSVModelReader(
+            StringIO(self.csv_data), columns=COLUMNS_1, fail_fast=False,
+            workers=1)
+        self.assertEqual(len(list(parallel)), 200 - 29)
+        self.assertTrue(parallel._pool is None)
+
+
+class ParallelByteRangesTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(ParallelByteRangesTestCase, self).setUp()
+        self.csv_data = make_products_csv(
+            product_kinds(300), valid_row=MULTILINE_PRODUCT_ROW)
+        self.path = self.write('data.csv', self.csv_data)
+
+    def read(self, reader):
+        objs = []
+        try:
+            for obj in reader:
+                objs.append(obj)
+        except InvalidCSVException as e:
+            objs.append(e.errors)
+        finally:
+            reader.close()
+        return (objs, reader.errors, reader.row_counter,
+                reader.failure_count)
+
+    def sequential(self, **kwargs):
+        return self.read(smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, **kwargs))
+
+    def parallel(self, csv_file=None, **kwargs):
+        if csv_file is None:
+            reader = smartcsv.ParallelCSVModelReader.from_path(
+                self.path, columns=COLUMNS_1, workers=3, range_size=512,
+                **kwargs)
+        else:
+            reader = smartcsv.ParallelCSVModelReader(
+                csv_file, columns=COLUMNS_1, workers=3, range_size=512,
+                **kwargs)
+        self.assertTrue(reader._reads_ranges())
+        return self.read(reader)
+
+    def test_same_results_as_the_sequential_reader(self):
+        """Should read the ranges of a file like the sequential reader"""
+        for options in ({'fail_fast': False},
+                        {'fail_fast': False, 'max_failures': 10},
+                        {'fail_fast': True}):
+            self.assertEqual(
+                self.parallel(**options), self.sequential(**options))
+
+    def test_seekable_binary_streams(self):
+        """Should read the ranges of seekable binary streams"""
+        expected = self.sequential(fail_fast=False)
+        self.assertEqual(self.parallel(
+            io.BytesIO(self.csv_data.encode('utf-8')), fail_fast=False),
+            expected)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(self.parallel(f, fail_fast=False), expected)
+
+    def test_ranges_cut_inside_a_record(self):
+        """Should read again the ranges that don't start where the
+        previous one ended"""
+        def next_line(reader, offset):
+            # The line breaks of the titles aren't record boundaries
+            window = reader.source.read_bytes(offset, 4096)
+            return offset + window.index(b'\n') + 1
+
+        with mock.patch('smartcsv.parallel.next_record_offset', next_line):
+            self.assertEqual(
+                self.parallel(fail_fast=False),
+                self.sequential(fail_fast=False))
+
+    def test_text_streams_are_tokenized_in_process(self):
+        """Should send rows to the workers when there are no ranges"""
+        with io.open(self.path, encoding='utf-8', newline='') as f:
+            reader = smartcsv.ParallelCSVModelReader(
+                f, columns=COLUMNS_1, fail_fast=False, workers=3)
+            self.assertFalse(reader._reads_ranges())
+            self.assertEqual(
+                self.read(reader), self.sequential(fail_fast=False))
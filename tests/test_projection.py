@@ -0,0 +1,104 @@
+import six
+import mock
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .base import BaseSmartCSVTestCase
+from .config import CURRENCY_CHOICES, is_number
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException, InvalidCSVHeaderException
+
+CSV_DATA = """
+id,price,vendor_code,title,currency,notes
+1,699,X-1,iPhone 5c blue,USD,
+2,599,X-2,iPad mini,ARS,refurbished
+3,abc,X-3,iPod,USD,
+4,99,X-4,Apple TV,EUR,
+5,10
+"""
+
+COLUMNS = [
+    {'name': 'title', 'required': True},
+    {'name': 'currency', 'required': True, 'choices': CURRENCY_CHOICES},
+    {'name': 'price', 'required': True, 'validator': is_number},
+]
+
+
+class ProjectionTestCase(BaseSmartCSVTestCase):
+    def test_only_declared_columns_are_read(self):
+        """Should match the declared columns by name and ignore the others"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS,
+                                 projection=True, fail_fast=False)
+        objs = list(reader)
+
+        self.assertEqual(objs, [
+            {'title': 'iPhone 5c blue', 'currency': 'USD', 'price': '699'},
+            {'title': 'iPad mini', 'currency': 'ARS', 'price': '599'},
+        ])
+        self.assertEqual(sorted(reader.errors['rows'].keys()), [2, 3, 4])
+        self.assertTrue('price' in reader.errors['rows'][2]['errors'])
+        self.assertTrue('currency' in reader.errors['rows'][3]['errors'])
+        self.assertTrue('row_length' in reader.errors['rows'][4]['errors'])
+        self.assertEqual(reader.errors['rows'][3]['row'],
+                         ['4', '99', 'X-4', 'Apple TV', 'EUR', ''])
+
+    def test_skipped_columns_are_not_evaluated(self):
+        """Should not evaluate skipped columns, even if they are required"""
+        validator = mock.MagicMock(return_value=True)
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'title', 'required': True},
+            {'name': 'notes', 'required': True, 'skip': True,
+             'validator': validator},
+        ], projection=True, fail_fast=False)
+
+        self.assertEqual([obj['title'] for obj in reader],
+                         ['iPhone 5c blue', 'iPad mini', 'iPod', 'Apple TV'])
+        self.assertEqual(validator.call_count, 0)
+
+    def test_single_column_with_records(self):
+        """Should work with a single column and records"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=[
+            {'name': 'vendor_code', 'required': True},
+        ], projection=True, fail_fast=False, row_type='record')
+        self.assertEqual([obj.vendor_code for obj in reader],
+                         ['X-1', 'X-2', 'X-3', 'X-4'])
+
+    def test_missing_columns_are_invalid(self):
+        """Should fail if a declared column is not in the header"""
+        self.assertRaises(
+            InvalidCSVHeaderException,
+            lambda: smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS + [
+                {'name': 'url'}], projection=True))
+
+    def test_projection_requires_a_header(self):
+        """Should fail to project columns without a header"""
+        self.assertRaises(ValueError, lambda: smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS, projection=True,
+            header_included=False))
+
+    def test_projection_without_extra_columns_fails_fast(self):
+        """Should keep the usual failure handling"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS,
+                                 projection=True)
+        next(reader)
+        next(reader)
+        self.assertRaises(InvalidCSVException, lambda: next(reader))
+
+    def test_projection_with_batches(self):
+        """Should read the projected columns in batches"""
+        if np is None:
+            self.skipTest("NumPy is not installed")
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS,
+                                 projection=True, fail_fast=False)
+        batch = reader.read_batch(10)
+        self.assertEqual(list(batch['title']), ['iPhone 5c blue', 'iPad mini'])
+        self.assertEqual(list(batch['price']), ['699', '599'])
+        self.assertEqual(sorted(reader.errors['rows'].keys()), [2, 3, 4])
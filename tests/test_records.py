@@ -0,0 +1,84 @@
+import pickle
+
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS
+
+import smartcsv
+from smartcsv.records import Record, make_record_class
+
+CSV_DATA = """
+title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Phones,Smartphones,USD,699,http://apple.com/iphone,http://apple.com/iphone.jpg
+  iPad mini  ,Tablets,,USD,699,http://apple.com/iphone,
+"""
+
+
+class RecordRowTypeTestCase(BaseSmartCSVTestCase):
+    def test_records_are_equivalent_to_dicts(self):
+        """Should return records with the same values as the dicts"""
+        dicts = list(smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1))
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 row_type='record')
+        records = list(reader)
+
+        self.assertEqual(records, dicts)
+        for record in records:
+            self.assertTrue(isinstance(record, Record))
+            self.assertTrue(isinstance(record, reader.record_class))
+        self.assertModelsEquals(dicts[1], records[1])
+
+    def test_record_access(self):
+        """Should access values by attribute, key and position"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 row_type='record')
+        ipad = list(reader)[1]
+
+        self.assertEqual(ipad.title, 'iPad mini')
+        self.assertEqual(ipad['title'], 'iPad mini')
+        self.assertEqual(ipad[0], 'iPad mini')
+        self.assertEqual(ipad.get('subcategory'), '')
+        self.assertEqual(ipad.get('unknown', 'default'), 'default')
+        self.assertRaises(KeyError, lambda: ipad['unknown'])
+        self.assertTrue('title' in ipad)
+        self.assertFalse('iPad mini' in ipad)
+        self.assertEqual(ipad.keys(), reader.model_fields)
+        self.assertEqual(dict(ipad.items())['currency'], 'USD')
+        self.assertEqual(hash(ipad), hash(tuple(ipad)))
+
+    def test_records_respect_skipped_columns_and_transforms(self):
+        """Should not include skipped columns in the record"""
+        columns = [dict(c) for c in COLUMNS_WITH_VALUE_TRANSFORMATIONS]
+        columns[1]['skip'] = True
+        reader = smartcsv.reader(StringIO("""title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,599,
+"""), columns=columns, row_type='record')
+
+        iphone, ipad = list(reader)
+        self.assertEqual(iphone.keys(), ['title', 'price', 'in_stock'])
+        self.assertEqual(iphone.in_stock, True)
+        self.assertEqual(str(ipad.price), '599')
+        self.assertEqual(ipad.in_stock, '')
+
+    def test_record_classes_are_shared_and_picklable(self):
+        """Should build one class per schema and pickle records"""
+        record_class = make_record_class(['title', 'image-url'])
+        self.assertTrue(
+            record_class is make_record_class(['title', 'image-url']))
+
+        record = tuple.__new__(record_class, ('iPhone', 'http://a.com/b.jpg'))
+        self.assertEqual(record['image-url'], 'http://a.com/b.jpg')
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        self.assertTrue(type(pickle.loads(pickle.dumps(record))) is
+                        record_class)
+
+    def test_invalid_row_type(self):
+        """Should fail with an unknown row_type"""
+        self.assertRaises(ValueError, lambda: smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, row_type='object'))
@@ -0,0 +1,164 @@
+import csv
+import json
+import pickle
+
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1
+from .test_csv_failures import ROW0, ROW1, ROW2, ROW3, ROW4
+
+import smartcsv
+from smartcsv.errors import RowError, SpillingErrorStore
+from smartcsv.exceptions import InvalidCSVException
+
+CSV_DATA = """title,category,subcategory,currency,price,url,image_url
+{r0}
+{r1}
+{r2}
+{r3}
+{r4}
+""".format(r0=ROW0, r1=ROW1, r2=ROW2, r3=ROW3, r4=ROW4)
+
+
+class CountingChoices(object):
+    """Choices that count how many times they're formatted"""
+    def __init__(self, choices):
+        self.choices = choices
+        self.formatted = 0
+
+    def __contains__(self, value):
+        return value in self.choices
+
+    def __str__(self):
+        self.formatted += 1
+        return 'CountingChoices'
+
+
+class RowErrorsTestCase(BaseSmartCSVTestCase):
+    def test_errors_are_structured(self):
+        """Should record the check, the column, its position and the value"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False)
+        rows = list(csv.reader(StringIO(CSV_DATA)))[1:5]
+
+        errors = [reader.validate_row(row)[1] for row in rows]
+        self.assertEqual(
+            [(error.code, error.column, error.position, error.value)
+             for error in errors],
+            [('row_length', 'row_length', None, None),
+             ('required', 'category', 1, None),
+             ('choices', 'currency', 3, 'INVALID'),
+             ('validator', 'url', 5, 'apple.com/iphone')])
+
+    def test_errors_keep_their_format(self):
+        """Should work like the dicts of messages of reader.errors"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False)
+        row = list(csv.reader(StringIO(CSV_DATA)))[3]
+
+        error = reader.validate_row(row)[1]
+        self.assertTrue(isinstance(error, RowError))
+        expected = {'currency': "Invalid choice. Expected "
+                                "['USD', 'ARS', 'JPY']. Got INVALID"}
+        self.assertEqual(error, expected)
+        self.assertEqual(dict(error), expected)
+        self.assertEqual(repr(error), repr(expected))
+        self.assertEqual(list(error), ['currency'])
+        self.assertRaises(KeyError, lambda: error['price'])
+
+    def test_errors_are_plain_dicts(self):
+        """Should return dicts of messages from reader.errors"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False)
+        list(reader)
+
+        errors = reader.errors['rows'][2]['errors']
+        self.assertEqual(type(errors), dict)
+        self.assertEqual(errors, {'currency': "Invalid choice. Expected "
+                                              "['USD', 'ARS', 'JPY']. Got "
+                                              "INVALID"})
+        errors['currency'] = 'Unknown currency'
+        self.assertEqual(reader.errors['rows'][2]['errors'],
+                         {'currency': 'Unknown currency'})
+        self.assertEqual(
+            reader.errors['rows'][3]['errors'], {'url': 'Validation failed'})
+        self.assertEqual(
+            json.loads(json.dumps(reader.errors))['rows']['1']['errors'],
+            {'category': 'Field required and not provided.'})
+
+    def test_messages_are_formatted_when_read(self):
+        """Should not format the choices of the failing rows until needed"""
+        choices = CountingChoices(['USD'])
+        columns = [dict(column) for column in COLUMNS_1]
+        columns[3]['choices'] = choices
+        data = CSV_DATA.replace(ROW0 + '\n', '').replace('INVALID', 'EUR')
+        reader = smartcsv.reader(StringIO(data), columns=columns,
+                                 fail_fast=False)
+        list(reader)
+
+        self.assertEqual(choices.formatted, 0)
+        self.assertEqual(
+            reader.errors['rows'][1]['errors']['currency'],
+            'Invalid choice. Expected CountingChoices. Got EUR')
+        self.assertEqual(choices.formatted, 1)
+
+    def test_exception_messages_are_formatted_when_shown(self):
+        """Should format the errors of the exceptions only when shown"""
+        choices = CountingChoices(['USD'])
+        columns = [dict(column) for column in COLUMNS_1]
+        columns[3]['choices'] = choices
+        data = CSV_DATA.replace(ROW0 + '\n', '').replace(ROW1 + '\n', '')
+        reader = smartcsv.reader(StringIO(data), columns=columns)
+        try:
+            next(reader)
+        except InvalidCSVException as e:
+            exception = e
+        else:
+            self.fail('The row is invalid')
+
+        self.assertEqual(choices.formatted, 0)
+        self.assertEqual(exception.message, 'Row 0 is invalid.')
+        self.assertEqual(
+            str(exception),
+            "Row 0 is invalid. Errors: {'currency': 'Invalid choice. "
+            "Expected CountingChoices. Got INVALID'}")
+        self.assertEqual(type(exception.errors), dict)
+        exception.errors['currency'] = 'Unknown currency'
+        self.assertEqual(exception.errors, {'currency': 'Unknown currency'})
+
+    def test_errors_can_be_pickled(self):
+        """Should pickle errors and exceptions with their messages"""
+        error = RowError('choices', 'currency', 'Expected {0}. Got {1}', 3,
+                         'EUR', ['USD'])
+        copy = pickle.loads(pickle.dumps(error))
+        self.assertEqual(copy, {'currency': "Expected ['USD']. Got EUR"})
+        self.assertEqual((copy.code, copy.position), ('choices', 3))
+
+        exception = InvalidCSVException('Row 2 is invalid.', error)
+        copy = pickle.loads(pickle.dumps(exception))
+        self.assertEqual(str(copy), str(exception))
+        self.assertEqual(copy.errors, error)
+
+    def test_errors_are_serialized(self):
+        """Should store the messages in checkpoints and spilled stores"""
+        store = SpillingErrorStore(memory_limit=0)
+        reader = smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False,
+            error_store=store)
+        list(reader)
+        self.assertTrue(store.spilled)
+        self.assertEqual(store.get(3)['errors'], {'url': 'Validation failed'})
+        store.close()
+
+        reader = smartcsv.reader(
+            StringIO(CSV_DATA), columns=COLUMNS_1, fail_fast=False)
+        next(reader)
+        state = json.loads(json.dumps(reader.error_store.checkpoint()))
+        self.assertEqual(state['rows'][0][2],
+                         {'row_length': 'Row length is invalid'})
+        self.assertEqual(state['rows'][3][2], {'url': 'Validation failed'})
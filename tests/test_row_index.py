@@ -0,0 +1,122 @@
+import io
+import json
+import os
+
+from .base import TemporaryDirectoryTestCase
+from .config import (
+    COLUMNS_1, MULTILINE_PRODUCT_ROW, make_products_csv, product_kinds)
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+from smartcsv.indexes import RowIndex
+from smartcsv.parallel import ParallelCSVModelReader
+
+CSV_DATA = make_products_csv(
+    product_kinds(250), valid_row=MULTILINE_PRODUCT_ROW)
+
+
+class RowIndexTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(RowIndexTestCase, self).setUp()
+        self.path = self.write('data.csv', CSV_DATA)
+        self.index_path = RowIndex.sidecar_path(self.path)
+
+    def reader(self, **kwargs):
+        reader = smartcsv.reader.from_path(
+            self.path, columns=COLUMNS_1, fail_fast=False, **kwargs)
+        self.addCleanup(reader.close)
+        return reader
+
+    def test_builds_a_sidecar_index(self):
+        """Should save the offsets of every Nth row once read"""
+        reader = self.reader(row_index=100, slab_size=64)
+        list(reader)
+        with open(self.index_path) as f:
+            state = json.load(f)
+        self.assertEqual(state['interval'], 100)
+        self.assertEqual(state['row_count'], 250)
+
+        data = CSV_DATA.encode('utf-8')
+        self.assertEqual(state['offsets'], [
+            data.index(b'"iPhone\n0"'), data.index(b'"iPhone\n100"'),
+            data.index(b'"iPhone\n200"')])
+
+    def test_loads_the_sidecar_index(self):
+        """Should reuse the index while the file doesn't change"""
+        list(self.reader(row_index=100))
+        reader = self.reader(row_index=100)
+        self.assertTrue(reader._row_index.complete)
+        self.assertFalse('next_value' in vars(reader))
+
+        reader = self.reader(row_index=50)
+        self.assertFalse(reader._row_index.complete)
+
+        with open(self.path, 'a') as f:
+            f.write(MULTILINE_PRODUCT_ROW.format('last'))
+        self.assertFalse(self.reader(row_index=100)._row_index.complete)
+
+    def test_get_rows(self):
+        """Should read any row by its number"""
+        list(self.reader(row_index=10))
+        for engine in ('csv', 'fast'):
+            reader = self.reader(row_index=10, engine=engine)
+            self.assertEqual(reader[0]['title'], 'iPhone\n0')
+            self.assertEqual(reader[249]['title'], 'iPhone\n249')
+            self.assertEqual(reader[56]['title'], 'iPhone\n56')
+            self.assertEqual(reader.row_counter, 57)
+            self.assertRaises(IndexError, lambda: reader[250])
+            self.assertRaises(IndexError, lambda: reader[-1])
+
+    def test_get_invalid_rows(self):
+        """Should raise the errors of invalid rows"""
+        reader = self.reader(row_index=10)
+        list(reader)
+        errors = reader.errors['rows']
+        row_number = list(errors)[5]
+        try:
+            reader[row_number]
+        except InvalidCSVException as e:
+            self.assertEqual(e.errors, errors[row_number]['errors'])
+        else:
+            self.fail("The row should be invalid")
+        self.assertEqual(reader.failure_count, len(errors))
+
+    def test_seek_row(self):
+        """Should go on reading from the row"""
+        expected = list(self.reader())
+        reader = self.reader(row_index=10)
+        reader.seek_row(100)
+        self.assertEqual(reader.row_counter, 100)
+        rest = list(reader)
+        self.assertEqual(rest[0]['title'], 'iPhone\n100')
+        self.assertEqual(rest, expected[len(expected) - len(rest):])
+
+    def test_partial_index(self):
+        """Should index the rows parsed while seeking"""
+        reader = self.reader(row_index=10)
+        self.assertEqual(reader[123]['title'], 'iPhone\n123')
+        self.assertEqual(reader._row_index.next_row, 130)
+        self.assertFalse(reader._row_index.complete)
+        reader.close()
+        self.assertEqual(len(RowIndex.for_file(self.path, 10).offsets), 13)
+
+    def test_memory_index(self):
+        """Should index seekable binary streams without saving anything"""
+        data = CSV_DATA.encode('utf-8')
+        reader = smartcsv.reader(
+            io.BytesIO(data), columns=COLUMNS_1, fail_fast=False,
+            row_index=RowIndex(interval=10))
+        self.assertEqual(reader[200]['title'], 'iPhone\n200')
+        self.assertEqual(reader[5]['title'], 'iPhone\n5')
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_needs_offsets(self):
+        """Should only index readers with offsets"""
+        self.assertRaises(
+            ValueError, smartcsv.reader, io.StringIO(CSV_DATA),
+            columns=COLUMNS_1, row_index=RowIndex())
+        self.assertRaises(
+            ValueError, ParallelCSVModelReader, io.BytesIO(b''),
+            columns=COLUMNS_1, row_index=RowIndex())
+        reader = self.reader()
+        self.assertRaises(ValueError, reader.seek_row, 10)
@@ -0,0 +1,138 @@
+import csv
+import io
+
+from .base import TemporaryDirectoryTestCase
+from .config import (
+    COLUMNS_1, MULTILINE_PRODUCT_ROW, PRODUCTS_HEADER, make_products_csv,
+    product_kinds)
+
+import smartcsv
+from smartcsv.sampling import find_record_start, wilson_interval
+
+
+
+def make_csv(rows=2000):
+    """A quarter of the rows are invalid"""
+    return make_products_csv(
+        product_kinds(rows, invalid_every=4, blank_lines=False),
+        valid_row=MULTILINE_PRODUCT_ROW)
+
+
+class SamplingTestCase(TemporaryDirectoryTestCase):
+    def setUp(self):
+        super(SamplingTestCase, self).setUp()
+        self.path = self.write('data.csv', make_csv())
+
+    def reader(self, **kwargs):
+        return smartcsv.reader(io.StringIO(make_csv(), newline=''),
+                               columns=COLUMNS_1, **kwargs)
+
+    def test_reservoir_sample(self):
+        """Should validate a uniform sample of the rows and count them"""
+        summary = self.reader().sample(size=400, seed=1)
+
+        self.assertEqual(summary['method'], 'reservoir')
+        self.assertEqual(summary['population'], 2000)
+        self.assertEqual(summary['sample_size'], 400)
+        rate = summary['failure_rate']
+        self.assertTrue(rate['low'] < 0.25 < rate['high'])
+        self.assertEqual(
+            summary['columns']['price']['estimate'], rate['estimate'])
+        self.assertEqual(len(summary['errors']['rows']), 10)
+        for row_number, error in summary['errors']['rows'].items():
+            self.assertEqual(row_number % 4, 3)
+            self.assertEqual(error['row'][0], 'Camera {0}'.format(row_number))
+            self.assertTrue('price' in error['errors'])
+
+    def test_sample_bigger_than_the_file(self):
+        """Should validate every row if the sample is bigger than the file"""
+        summary = self.reader().sample(size=5000)
+
+        self.assertEqual(summary['population'], 2000)
+        self.assertEqual(summary['sample_size'], 2000)
+        self.assertEqual(summary['failure_count'], 500)
+        self.assertEqual(summary['failure_rate']['estimate'], 0.25)
+
+    def test_samples_are_reproducible(self):
+        """Should draw the same sample with the same seed"""
+        first = self.reader().sample(size=50, seed=7)
+        second = self.reader().sample(size=50, seed=7)
+        self.assertEqual(first, second)
+
+    def test_offset_sample(self):
+        """Should seek to random offsets of files and read whole records"""
+        reader = smartcsv.CSVModelReader.from_path(
+            self.path, columns=COLUMNS_1)
+        try:
+            summary = reader.sample(size=300, seed=3)
+        finally:
+            reader.close()
+
+        self.assertEqual(summary['method'], 'offsets')
+        self.assertEqual(summary['population'], None)
+        self.assertEqual(summary['sample_size'], 300)
+        # Records start with multi-line fields: none was cut in half
+        self.assertEqual(list(summary['columns']), ['price'])
+        rate = summary['failure_rate']
+        self.assertTrue(rate['low'] < 0.25 < rate['high'])
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for offset, error in summary['errors']['rows'].items():
+            line = data[offset:data.index(b'\n', offset)].decode('utf-8')
+            self.assertEqual(next(csv.reader([line])), error['row'])
+
+    def test_offset_sample_of_binary_streams(self):
+        """Should sample seekable binary streams by offsets"""
+        data = make_csv().encode('utf-8')
+        reader = smartcsv.reader(io.BytesIO(data), columns=COLUMNS_1)
+        summary = reader.sample(size=100, seed=3)
+        self.assertEqual(summary['method'], 'offsets')
+        self.assertEqual(summary['sample_size'], 100)
+        self.assertEqual(list(summary['columns']), ['price'])
+
+    def test_offsets_need_random_access(self):
+        """Should not sample text streams by offsets"""
+        self.assertRaises(
+            ValueError, self.reader().sample, method='offsets')
+        self.assertRaises(ValueError, self.reader().sample, method='other')
+        self.assertRaises(ValueError, self.reader().sample, size=0)
+
+    def test_stratified_sample(self):
+        """Should sample every value of a column and weight the results"""
+        summary = self.reader().sample(size=100, stratify_by='category',
+                                       seed=5)
+
+        self.assertEqual(summary['method'], 'stratified')
+        self.assertEqual(summary['population'], 2000)
+        self.assertEqual(summary['sample_size'], 200)
+        self.assertEqual(summary['failure_count'], 100)
+        self.assertEqual(summary['failure_rate']['estimate'], 0.25)
+        self.assertEqual(summary['columns']['price']['estimate'], 0.25)
+
+        phones = summary['strata']['Phones']
+        self.assertEqual(phones['population'], 1500)
+        self.assertEqual(phones['sample_size'], 100)
+        self.assertEqual(phones['failure_count'], 0)
+        cameras = summary['strata']['Cameras']
+        self.assertEqual(cameras['population'], 500)
+        self.assertEqual(cameras['failure_rate']['estimate'], 1.0)
+        self.assertEqual(len(cameras['errors']['rows']), 10)
+
+    def test_find_record_start(self):
+        """Should tell line breaks inside quoted fields from row ends"""
+        dialect = csv.get_dialect('excel')
+        text = make_csv(10)[len(PRODUCTS_HEADER):]
+        self.assertEqual(find_record_start(text, dialect, 7), 0)
+        # Right after the line break of the first quoted field
+        text = text[text.index('\n') + 1:]
+        self.assertEqual(find_record_start(text, dialect, 7), 1)
+
+    def test_wilson_interval(self):
+        """Should bound proportions, even with no failures"""
+        low, high = wilson_interval(0, 100)
+        self.assertEqual(low, 0.0)
+        self.assertTrue(0.03 < high < 0.04)
+        low, high = wilson_interval(50, 100, confidence=0.99)
+        self.assertTrue(low < 0.5 < high)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
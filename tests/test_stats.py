@@ -0,0 +1,84 @@
+import six
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS
+
+import smartcsv
+
+CSV_DATA = """title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Phones,Smartphones,USD,399,http://apple.com/iphone,http://apple.com/iphone.jpg
+iPad mini,Tablets,Apple,USD,not a price,http://apple.com/ipad,
+
+Macbook,Computers,,USD,999,http://apple.com/mac,
+"""
+
+TRANSFORM_CSV_DATA = """title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,599,no
+"""
+
+
+class StatsTestCase(BaseSmartCSVTestCase):
+    def test_stats_are_disabled_by_default(self):
+        """Should not record stats nor change next_value by default"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False)
+        list(reader)
+        self.assertTrue(reader.stats is None)
+        self.assertTrue('next_value' not in vars(reader))
+
+    def test_column_stats(self):
+        """Should count the calls and the time of every validator"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False, stats=True)
+        objs = list(reader)
+        self.assertEqual(len(objs), 2)
+        self.assertEqual(len(reader.errors['rows']), 1)
+
+        stats = reader.stats
+        self.assertEqual(stats['rows'], 3)
+        self.assertEqual(sorted(stats['columns']),
+                         ['image_url', 'price', 'url'])
+        self.assertEqual(stats['columns']['price']['validator']['calls'], 3)
+        self.assertEqual(stats['columns']['url']['validator']['calls'], 2)
+        self.assertEqual(
+            stats['columns']['image_url']['validator']['calls'], 1)
+        self.assertTrue(stats['columns']['price']['validator']['time'] > 0)
+
+    def test_phase_stats(self):
+        """Should record the time spent in every phase"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False, stats=True)
+        list(reader)
+        phases = reader.stats['phases']
+        self.assertEqual(sorted(phases),
+                         ['build', 'errors', 'tokenize', 'validate'])
+        for phase, seconds in phases.items():
+            self.assertTrue(seconds > 0, phase)
+
+    def test_transform_stats(self):
+        """Should count the calls of the transforms too"""
+        reader = smartcsv.reader(StringIO(TRANSFORM_CSV_DATA),
+                                 columns=COLUMNS_WITH_VALUE_TRANSFORMATIONS,
+                                 stats=True)
+        objs = list(reader)
+        self.assertEqual(objs[0]['price'], 699)
+
+        transform_stats = reader.stats['columns']['price']['transform']
+        self.assertEqual(transform_stats['calls'], 2)
+
+    def test_stats_with_cache(self):
+        """Should count every call, including the cached ones"""
+        columns = [dict(column) for column in COLUMNS_1]
+        columns[4]['cache'] = True
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=columns,
+                                 fail_fast=False, stats=True)
+        list(reader)
+        self.assertEqual(
+            reader.stats['columns']['price']['validator']['calls'], 3)
+        self.assertEqual(
+            reader.cache_stats['price']['validator']['misses'], 3)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import os
+import shutil
+import tempfile
+from os.path import dirname, join
+
+import mock
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1
+
+import smartcsv
+from smartcsv.tokenizer import FastReader
+
+LPNK_PATH = join(dirname(os.path.realpath(__file__)),
+                 'integration', 'lpnk', 'lpnk-data.csv')
+
+CSV_DATA = u"""title,category,subcategory,currency,price,url,image_url
+iPhone 5c blue,Phones,Smartphones,USD,399,http://apple.com/iphone,http://apple.com/iphone.jpg\r
+"iPad\r\nmini",Tablets,Apple,USD,699,http://apple.com/ipad,
+
+Cámara, Cameras,,USD,not a price,http://example.com/camera,
+Macbook,Computers,,"USD",999,http://apple.com/mac,"""
+
+
+class FastReaderTestCase(BaseSmartCSVTestCase):
+    def assertSameRows(self, text, **fmtparams):
+        for chunk_size in (1, 2, 3, FastReader.CHUNK_SIZE):
+            expected = csv.reader(
+                io.StringIO(text, newline=''), **fmtparams)
+            with mock.patch.object(FastReader, 'CHUNK_SIZE', chunk_size):
+                reader = FastReader(
+                    io.StringIO(text, newline=''), **fmtparams)
+            for row in expected:
+                self.assertEqual(next(reader), row)
+                self.assertEqual(reader.line_num, expected.line_num)
+            self.assertRaises(StopIteration, next, reader)
+
+    def test_same_rows_as_csv(self):
+        """Should produce exactly the same rows as csv.reader"""
+        self.assertSameRows(CSV_DATA)
+        self.assertSameRows(CSV_DATA, delimiter=';')
+        self.assertSameRows(CSV_DATA, skipinitialspace=True)
+        self.assertSameRows(CSV_DATA, quoting=csv.QUOTE_NONE)
+        self.assertSameRows(CSV_DATA.replace(',', '\t'), dialect='excel-tab')
+        self.assertSameRows(u'a,b\\,c\n1,"2\\"3"\n', escapechar='\\')
+        self.assertSameRows(u'1,2\r3,4\n5\x0c,6\n\n\r\n7\n')
+
+    def test_same_rows_as_csv_for_lpnk(self):
+        """Should read the multi-line fields of lpnk like csv.reader"""
+        with io.open(LPNK_PATH, encoding='utf-8', newline='') as f:
+            self.assertSameRows(f.read())
+
+    def test_nonnumeric_dialects(self):
+        """Should convert values like csv.reader"""
+        self.assertSameRows(u'1,"a",2.5\n', quoting=csv.QUOTE_NONNUMERIC)
+
+    def test_errors(self):
+        """Should raise the errors of csv.reader and go on reading"""
+        reader = FastReader(io.StringIO(u'a,b\n"x"y,1\nc,d\n'), strict=True)
+        self.assertEqual(next(reader), ['a', 'b'])
+        self.assertRaises(csv.Error, next, reader)
+        self.assertEqual(next(reader), ['c', 'd'])
+
+
+class FastEngineTestCase(BaseSmartCSVTestCase):
+    def read(self, engine):
+        reader = smartcsv.reader(io.StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False, engine=engine)
+        return list(reader), reader.errors
+
+    def test_reader_engine(self):
+        """Should read the same objects and errors with the fast engine"""
+        self.assertEqual(self.read('fast'), self.read('csv'))
+
+    def test_invalid_engine(self):
+        """Should reject unknown engines"""
+        self.assertRaises(ValueError, self.read, 'c')
+
+    def test_offsets(self):
+        """Should track offsets with the fast engine"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = join(directory, 'data.csv')
+            with io.open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(CSV_DATA)
+
+            offsets = []
+            for engine in ('csv', 'fast'):
+                reader = smartcsv.reader.from_path(
+                    path, columns=COLUMNS_1, fail_fast=False, engine=engine)
+                offsets.append([reader.offset for _ in reader])
+            self.assertEqual(offsets[0], offsets[1])
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,81 @@
+import six
+import mock
+if six.PY3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+from .base import BaseSmartCSVTestCase
+from .config import COLUMNS_1, COLUMNS_WITH_VALUE_TRANSFORMATIONS
+from .test_csv_failures import ROW0, ROW1, ROW2, ROW3, ROW4
+
+import smartcsv
+from smartcsv.exceptions import InvalidCSVException
+
+CSV_DATA = """
+title,category,subcategory,currency,price,url,image_url
+{r0}
+{r1}
+
+{r2}
+{r3}
+{r4}
+""".format(r0=ROW0, r1=ROW1, r2=ROW2, r3=ROW3, r4=ROW4)
+
+TRANSFORM_CSV_DATA = """title,currency,price,in_stock
+iPhone,USD,699,yes
+iPad,USD,599,no
+iPod,ARS,,no
+"""
+
+
+class ValidateOnlyTestCase(BaseSmartCSVTestCase):
+    def test_validate_returns_a_summary(self):
+        """Should validate every row and return the summary of the errors"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False)
+        summary = reader.validate()
+
+        self.assertEqual(summary['row_count'], 5)
+        self.assertEqual(summary['failure_count'], 4)
+        self.assertEqual(summary['errors'], reader.errors)
+        self.assertRowError(reader.errors, ROW0, 0, 'row_length')
+        self.assertRowError(reader.errors, ROW1, 1, 'category')
+        self.assertRowError(reader.errors, ROW2, 2, 'currency')
+        self.assertRowError(reader.errors, ROW3, 3, 'url')
+
+    def test_validate_doesnt_build_objects(self):
+        """Should not build objects nor apply transformations by default"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1,
+                                 fail_fast=False)
+        with mock.patch.object(reader, '_build_object') as build_object:
+            with mock.patch.object(reader, '_process_row') as process_row:
+                reader.validate()
+        self.assertEqual(build_object.call_count, 0)
+        self.assertEqual(process_row.call_count, 0)
+
+    def test_validate_can_check_transformations(self):
+        """Should report transformation errors if asked to"""
+        transform = mock.MagicMock(side_effect=[1, ValueError('oops')])
+        columns = [dict(c) for c in COLUMNS_WITH_VALUE_TRANSFORMATIONS]
+        columns[2]['transform'] = transform
+
+        summary = smartcsv.validate_file(
+            StringIO(TRANSFORM_CSV_DATA), columns=columns)
+        self.assertEqual(transform.call_count, 0)
+        self.assertEqual(summary['row_count'], 3)
+        self.assertEqual(list(summary['errors']['rows'].keys()), [2])
+
+        summary = smartcsv.validate_file(
+            StringIO(TRANSFORM_CSV_DATA), columns=columns,
+            check_transforms=True)
+        self.assertEqual(transform.call_args_list,
+                         [mock.call('699'), mock.call('599')])
+        self.assertEqual(sorted(summary['errors']['rows'].keys()), [1, 2])
+        self.assertTrue(
+            'transform' in summary['errors']['rows'][1]['errors'])
+
+    def test_validate_fails_fast(self):
+        """Should honor fail_fast"""
+        reader = smartcsv.reader(StringIO(CSV_DATA), columns=COLUMNS_1)
+        self.assertRaises(InvalidCSVException, reader.validate)